@@ -1,38 +1,83 @@
+import base64
+import binascii
+import hashlib
+import logging
 import random
-from datetime import datetime
-from typing import Any
-
-import requests
-from fastapi import APIRouter, Body, Depends, HTTPException, Query
+from collections.abc import Callable
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from statistics import fmean
+from typing import Any, Literal
+
+import httpx
+import orjson
+from fastapi import APIRouter, Body, Depends, Header, HTTPException, Query, Request, Response
+from fastapi.responses import JSONResponse, ORJSONResponse, StreamingResponse
+from pydantic import ValidationError
 from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
 from app.core.config import settings as app_settings
-from app.core.database import get_db
-from app.crud import actuator_crud, alert_crud, sensor_crud
+from app.core.database import SessionLocal, get_db, get_read_db, unit_of_work
+from app.crud import (
+    actuator_crud,
+    alert_crud,
+    reading_counter_crud,
+    resource_version_crud,
+    sensor_crud,
+    threshold_profile_crud,
+)
 from app.models.control_state import ControlState
 from app.models.runtime_mode import RuntimeMode
 from app.models.sensor_data import SensorData
 from app.models.system_settings import SystemSettings
+from app.models.threshold_profile import ThresholdProfile
 from app.schemas import (
     AlertListResponse,
     AlertOut,
     ControlCommand,
     ControlResponse,
+    FleetDeviceIn,
+    SensorBatchItemResult,
+    SensorBatchResponse,
     SensorHistoryResponse,
     SensorIn,
     SensorOut,
 )
-from app.services import build_threshold_alerts, esp32_client
+from app.services import (
+    EVENT_TYPES,
+    ExportFormatUnavailable,
+    FleetDevice,
+    IngestQueueFull,
+    alert_tracker,
+    config_cache,
+    downsample_history,
+    esp32_client,
+    event_hub,
+    export_format,
+    fleet_poller,
+    ingest_queue,
+    reading_buffer,
+    retention_engine,
+    scan_violations,
+    stream_sensor_export,
+)
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+MAX_INGEST_BATCH = 1000
+RECENT_ALERT_HOURS = 168
+
 
 def _clamp(value: float, low: float, high: float) -> float:
     return max(low, min(high, value))
 
 
-def _serialize_thresholds(row: SystemSettings) -> dict[str, Any]:
+def _serialize_thresholds(row: SystemSettings | ThresholdProfile) -> dict[str, Any]:
     return {
         "temp_min": row.temp_min,
         "temp_max": row.temp_max,
@@ -43,6 +88,10 @@ def _serialize_thresholds(row: SystemSettings) -> dict[str, Any]:
     }
 
 
+def _serialize_threshold_profile(row: ThresholdProfile) -> dict[str, Any]:
+    return {"id": row.id, "created_at": row.created_at, **_serialize_thresholds(row)}
+
+
 def _serialize_control_state(row: ControlState) -> dict[str, Any]:
     return {
         "mode": row.mode,
@@ -78,6 +127,87 @@ def _parameter_status(value: float, min_value: float, max_value: float) -> str:
     return "optimal"
 
 
+def _utc_naive(value: datetime | None) -> datetime | None:
+    # Stored timestamps are naive UTC; aware query parameters are converted to match.
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _encode_history_cursor(row: dict[str, Any]) -> str:
+    key = f"{_utc_naive(row['timestamp']).isoformat()}|{row['id']}"
+    return base64.urlsafe_b64encode(key.encode()).decode().rstrip("=")
+
+
+def _decode_history_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        key = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        timestamp, item_id = key.rsplit("|", 1)
+        return datetime.fromisoformat(timestamp), int(item_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as exc:
+        raise HTTPException(status_code=400, detail="Invalid cursor") from exc
+
+
+def _etag(*parts: Any) -> str:
+    # Weak: equal tags promise the same data, not the same bytes (the report's generated_at moves on).
+    return f'W/"{hashlib.blake2b(orjson.dumps(parts), digest_size=12).hexdigest()}"'
+
+
+def _resource_versions(db: Session, *names: str) -> tuple[list[Any], datetime | None]:
+    """Version tokens for ``names`` from one indexed lookup, plus the newest write time among them."""
+    versions = resource_version_crud.get_many(db, names)
+    tokens = [versions.get(name, (0, None)) for name in names]
+    written = [_utc_naive(updated_at) for _, updated_at in tokens if updated_at is not None]
+    return tokens, max(written, default=None)
+
+
+def _last_modified(*values: datetime | None) -> datetime | None:
+    return max((_utc_naive(value) for value in values if value is not None), default=None)
+
+
+def _validators(etag: str, last_modified: datetime | None) -> dict[str, str]:
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(last_modified.replace(tzinfo=timezone.utc), usegmt=True)
+    return headers
+
+
+def _opaque_tag(tag: str) -> str:
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def _is_fresh(request: Request, etag: str, last_modified: datetime | None) -> bool:
+    # If-None-Match takes precedence; If-Modified-Since only has one-second resolution.
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        if if_none_match.strip() == "*":
+            return True
+        return _opaque_tag(etag) in {_opaque_tag(tag) for tag in if_none_match.split(",")}
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is None or last_modified is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    return last_modified.replace(microsecond=0) <= _utc_naive(since.replace(tzinfo=since.tzinfo or timezone.utc))
+
+
+def _conditional_json(
+    request: Request,
+    etag: str,
+    last_modified: datetime | None,
+    build: Callable[[], Any],
+) -> Response:
+    """304 if the client's copy is current, otherwise ``build()`` as JSON. ``build`` is not called on a 304."""
+    headers = _validators(etag, last_modified)
+    if _is_fresh(request, etag, last_modified):
+        return Response(status_code=304, headers=headers)
+    return ORJSONResponse(build(), headers=headers)
+
+
 def _bool_from_value(value: Any) -> bool:
     if isinstance(value, bool):
         return value
@@ -86,31 +216,33 @@ def _bool_from_value(value: Any) -> bool:
     return bool(value)
 
 
-def _get_or_create_settings(db: Session) -> SystemSettings:
+def _insert_singleton(db: Session, row: Any) -> Any:
+    db.add(row)
+    try:
+        db.commit()
+    except IntegrityError:
+        # A concurrent request created the row first; use theirs.
+        db.rollback()
+        return db.get(type(row), row.id)
+    db.refresh(row)
+    return row
+
+
+def _get_or_create_settings_row(db: Session) -> SystemSettings:
     settings = db.get(SystemSettings, 1)
     if settings:
         return settings
-
-    settings = SystemSettings(id=1)
-    db.add(settings)
-    db.commit()
-    db.refresh(settings)
-    return settings
+    return _insert_singleton(db, SystemSettings(id=1))
 
 
-def _get_or_create_control_state(db: Session) -> ControlState:
+def _get_or_create_control_state_row(db: Session) -> ControlState:
     state = db.get(ControlState, 1)
     if state:
         return state
-
-    state = ControlState(id=1)
-    db.add(state)
-    db.commit()
-    db.refresh(state)
-    return state
+    return _insert_singleton(db, ControlState(id=1))
 
 
-def _get_or_create_runtime_mode(db: Session) -> RuntimeMode:
+def _get_or_create_runtime_mode_row(db: Session) -> RuntimeMode:
     runtime_mode = db.get(RuntimeMode, 1)
     if runtime_mode:
         return runtime_mode
@@ -118,11 +250,19 @@ def _get_or_create_runtime_mode(db: Session) -> RuntimeMode:
     default_mode = str(app_settings.runtime_mode_default).strip().lower()
     if default_mode not in {"live", "mock"}:
         default_mode = "live"
-    runtime_mode = RuntimeMode(id=1, mode=default_mode)
-    db.add(runtime_mode)
-    db.commit()
-    db.refresh(runtime_mode)
-    return runtime_mode
+    return _insert_singleton(db, RuntimeMode(id=1, mode=default_mode))
+
+
+def _get_or_create_settings(db: Session) -> SystemSettings:
+    return config_cache.get(SystemSettings, lambda: _get_or_create_settings_row(db))
+
+
+def _get_or_create_control_state(db: Session) -> ControlState:
+    return config_cache.get(ControlState, lambda: _get_or_create_control_state_row(db))
+
+
+def _get_or_create_runtime_mode(db: Session) -> RuntimeMode:
+    return config_cache.get(RuntimeMode, lambda: _get_or_create_runtime_mode_row(db))
 
 
 def _normalize_sensor_payload(raw_payload: dict[str, Any], settings: SystemSettings) -> dict[str, Any]:
@@ -142,23 +282,80 @@ def _normalize_sensor_payload(raw_payload: dict[str, Any], settings: SystemSetti
     }
 
 
-def _create_alerts_for_payload(db: Session, raw_payload: dict[str, Any]) -> list[AlertOut]:
-    created: list[AlertOut] = []
-    for alert_payload in build_threshold_alerts(raw_payload):
-        alert = alert_crud.create(db, alert_payload)
-        created.append(AlertOut.model_validate(alert))
-    return created
+def _save_sensor_payload(db: Session, raw_payload: dict[str, Any], settings: SystemSettings) -> SensorOut:
+    row = _normalize_sensor_payload(raw_payload, settings)
+    with unit_of_work(db):
+        sensor_obj = sensor_crud.create(db, row)
+        serialized = SensorOut.model_validate({**row, "id": sensor_obj.id, "timestamp": sensor_obj.timestamp})
+        created = [serialized.model_dump()]
+        event_hub.stage(db, "readings", created)
+        alert_tracker.observe(db, [{**row, "timestamp": sensor_obj.timestamp}])
+    reading_buffer.extend(created)
+    return serialized
 
 
-def _save_sensor_payload(db: Session, raw_payload: dict[str, Any], settings: SystemSettings) -> SensorOut:
-    if "thresholds" not in raw_payload:
-        raw_payload["thresholds"] = _serialize_thresholds(settings)
-    sensor_obj = sensor_crud.create(db, _normalize_sensor_payload(raw_payload, settings))
-    _create_alerts_for_payload(db, raw_payload)
-    return SensorOut.model_validate(sensor_obj)
+def _latest_reading_rows(db: Session, limit: int) -> list[dict[str, Any]]:
+    if reading_buffer.covers(limit):
+        return reading_buffer.latest(limit)
+    return sensor_crud.get_page_rows(db, limit=limit)
+
+
+def _latest_readings(db: Session, limit: int) -> list[SensorOut]:
+    return [SensorOut.model_construct(**row) for row in _latest_reading_rows(db, limit)]
+
+
+def _format_validation_error(exc: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in error['loc']) or 'payload'}: {error['msg']}" for error in exc.errors()
+    )
+
+
+def _save_sensor_batch(
+    db: Session, raw_items: list[dict[str, Any]], settings: SystemSettings
+) -> SensorBatchResponse:
+    results: list[SensorBatchItemResult] = []
+    accepted: list[SensorBatchItemResult] = []
+    rows: list[dict[str, Any]] = []
+
+    for index, raw_item in enumerate(raw_items):
+        try:
+            raw_payload = SensorIn.model_validate(raw_item).model_dump(exclude_none=True)
+        except ValidationError as exc:
+            results.append(SensorBatchItemResult(index=index, error=_format_validation_error(exc)))
+            continue
+
+        result = SensorBatchItemResult(index=index)
+        results.append(result)
+        accepted.append(result)
+        rows.append(_normalize_sensor_payload(raw_payload, settings))
+
+    if rows:
+        with unit_of_work(db):
+            created = sensor_crud.create_multi(db, rows)
+            event_hub.stage(db, "readings", created)
+            alert_tracker.observe(db, created)
+        reading_buffer.extend(created)
+        for result, row in zip(accepted, created):
+            result.id = row["id"]
+
+    return SensorBatchResponse(items=results, created=len(accepted), failed=len(results) - len(accepted))
+
+
+def save_polled_readings(raw_payloads: list[dict[str, Any]]) -> None:
+    db = SessionLocal()
+    try:
+        settings = _get_or_create_settings(db)
+        result = _save_sensor_batch(db, raw_payloads, settings)
+    finally:
+        db.close()
+
+    for item in result.items:
+        if item.error:
+            device_id = raw_payloads[item.index].get("device_id")
+            logger.warning("Discarded invalid reading from %s: %s", device_id, item.error)
 
 
-def _build_simulated_payload(settings: SystemSettings, baseline: SensorData | None) -> dict[str, Any]:
+def _build_simulated_payload(settings: SystemSettings, baseline: SensorOut | None) -> dict[str, Any]:
     temp_mid = (settings.temp_min + settings.temp_max) / 2
     moisture_mid = (settings.moisture_min + settings.moisture_max) / 2
     ph_mid = (settings.ph_min + settings.ph_max) / 2
@@ -177,6 +374,13 @@ def _build_simulated_payload(settings: SystemSettings, baseline: SensorData | No
     }
 
 
+def _save_simulated_payload(db: Session, settings: SystemSettings) -> SensorOut:
+    latest = _latest_readings(db, 1)
+    baseline = latest[0] if latest else None
+    simulated = _build_simulated_payload(settings, baseline)
+    return _save_sensor_payload(db, simulated, settings)
+
+
 def _build_control_payload(command: ControlCommand) -> dict[str, Any]:
     outgoing: dict[str, Any] = {}
 
@@ -199,7 +403,7 @@ def _build_control_payload(command: ControlCommand) -> dict[str, Any]:
 
 
 def _update_control_state(db: Session, outgoing: dict[str, Any]) -> ControlState:
-    state = _get_or_create_control_state(db)
+    state = _get_or_create_control_state_row(db)
 
     if "mode" in outgoing:
         state.mode = str(outgoing["mode"]).upper()
@@ -208,11 +412,138 @@ def _update_control_state(db: Session, outgoing: dict[str, Any]) -> ControlState
         if key in outgoing:
             setattr(state, key, _bool_from_value(outgoing[key]))
 
-    db.commit()
-    db.refresh(state)
+    db.flush()
     return state
 
 
+def _apply_control_command(db: Session, outgoing: dict[str, Any]) -> dict[str, Any]:
+    latest = _latest_readings(db, 1)
+    latest_row = latest[0] if latest else None
+
+    with unit_of_work(db):
+        state = _update_control_state(db, outgoing)
+
+        for actuator in ("fan", "heater", "humidifier", "ph_actuator"):
+            if actuator not in outgoing:
+                continue
+            actuator_crud.create(
+                db,
+                {
+                    "actuator_type": actuator,
+                    "action": str(outgoing[actuator]),
+                    "duration_seconds": 0.0,
+                    "triggered_by": "manual_api",
+                    "sensor_temperature": latest_row.temperature if latest_row else None,
+                    "sensor_moisture": latest_row.moisture if latest_row else None,
+                    "sensor_ph": latest_row.ph if latest_row else None,
+                },
+            )
+        serialized_state = _serialize_control_state(state)
+        event_hub.stage(db, "control", serialized_state)
+
+    config_cache.invalidate(ControlState)
+    return serialized_state
+
+
+def _report_readings(db: Session, limit: int) -> tuple[list[dict[str, Any]], dict[str, float | None]]:
+    """Newest ``limit`` readings (timestamp and metrics, pH defaulting to 7.0) and their averages."""
+    if reading_buffer.covers(limit):
+        rows = [
+            {
+                "timestamp": row["timestamp"],
+                "temperature": row["temperature"],
+                "moisture": row["moisture"],
+                "ph": 7.0 if row["ph"] is None else float(row["ph"]),
+            }
+            for row in reading_buffer.latest(limit)
+        ]
+    else:
+        rows = sensor_crud.get_latest_metrics(db, limit)
+    # The rows are in hand already; averaging them here beats a second pass in SQL.
+    averages = {metric: fmean(row[metric] for row in rows) if rows else None for metric in ("temperature", "moisture", "ph")}
+    return rows, averages
+
+
+def _build_monitoring_report(db: Session, points: int, log_items: int, series: bool = True) -> dict[str, Any]:
+    settings = _get_or_create_settings(db)
+    state = _get_or_create_control_state(db)
+    runtime_mode = _get_or_create_runtime_mode(db)
+
+    # One fetch serves the chart, the log and the averages; both lists share its row dicts.
+    history_desc, averages = _report_readings(db, max(points, log_items))
+    latest = history_desc[0] if history_desc else None
+    live_series = history_desc[:points][::-1]
+    readings_log = history_desc[:log_items]
+
+    total_readings = reading_counter_crud.get_total(db)
+    if total_readings is None:
+        total_readings = db.execute(select(func.count(SensorData.id))).scalar_one() or 0
+
+    if latest:
+        temp_status = _parameter_status(latest["temperature"], settings.temp_min, settings.temp_max)
+        moisture_status = _parameter_status(float(latest["moisture"]), settings.moisture_min, settings.moisture_max)
+        ph_status = _parameter_status(latest["ph"], settings.ph_min, settings.ph_max)
+    else:
+        temp_status = moisture_status = ph_status = "unknown"
+
+    avg_temp = round(averages["temperature"], 2) if averages["temperature"] is not None else None
+    avg_moisture = round(averages["moisture"], 1) if averages["moisture"] is not None else None
+    avg_ph = round(averages["ph"], 2) if averages["ph"] is not None else None
+
+    active_actuators = sum([state.fan, state.heater, state.humidifier, state.ph_actuator])
+
+    report = {
+        "generated_at": datetime.utcnow(),
+        "runtime_mode": _serialize_runtime_mode(runtime_mode),
+        "targets": _serialize_thresholds(settings),
+        "control_state": _serialize_control_state(state),
+        "current": {
+            "temperature": latest["temperature"] if latest else None,
+            "moisture": latest["moisture"] if latest else None,
+            "ph": latest["ph"] if latest else None,
+            "timestamp": latest["timestamp"] if latest else None,
+        },
+        "deviation": {
+            "temperature": {
+                "status": temp_status,
+                "current": latest["temperature"] if latest else None,
+                "target": round((settings.temp_min + settings.temp_max) / 2, 2),
+            },
+            "moisture": {
+                "status": moisture_status,
+                "current": latest["moisture"] if latest else None,
+                "target": round((settings.moisture_min + settings.moisture_max) / 2, 1),
+            },
+            "ph": {
+                "status": ph_status,
+                "current": latest["ph"] if latest else None,
+                "target": round((settings.ph_min + settings.ph_max) / 2, 2),
+            },
+        },
+        "live_series": live_series,
+        "readings_log": readings_log,
+        "report": {
+            "status": {
+                "temperature": temp_status,
+                "moisture": moisture_status,
+                "ph": ph_status,
+            },
+            "averages": {
+                "temperature": avg_temp,
+                "moisture": avg_moisture,
+                "ph": avg_ph,
+            },
+            "total_readings": total_readings,
+            "active_actuators": active_actuators,
+            "max_actuators": 4,
+        },
+    }
+    if not series:
+        # The averages still cover max(points, log_items) readings; only the lists are dropped.
+        del report["live_series"], report["readings_log"]
+    return report
+
+
 @router.get("/health")
 def health() -> dict[str, str]:
     return {"status": "ok"}
@@ -229,22 +560,25 @@ def update_runtime_mode(payload: dict[str, Any] = Body(...), db: Session = Depen
     if "mode" not in payload:
         raise HTTPException(status_code=400, detail="mode is required")
 
-    runtime_mode = _get_or_create_runtime_mode(db)
+    runtime_mode = _get_or_create_runtime_mode_row(db)
     runtime_mode.mode = _normalize_runtime_mode(str(payload["mode"]))
+    event_hub.stage(db, "runtime_mode", _serialize_runtime_mode(runtime_mode))
     db.commit()
     db.refresh(runtime_mode)
+    config_cache.set(RuntimeMode, runtime_mode)
     return _serialize_runtime_mode(runtime_mode)
 
 
 @router.get("/settings/targets")
-def get_targets(db: Session = Depends(get_db)) -> dict[str, Any]:
+def get_targets(request: Request, db: Session = Depends(get_db)) -> Response:
     settings = _get_or_create_settings(db)
-    return _serialize_thresholds(settings)
+    targets = _serialize_thresholds(settings)
+    return _conditional_json(request, _etag("targets", targets), _last_modified(settings.updated_at), lambda: targets)
 
 
 @router.put("/settings/targets")
 def update_targets(payload: dict[str, Any] = Body(...), db: Session = Depends(get_db)) -> dict[str, Any]:
-    settings = _get_or_create_settings(db)
+    settings = _get_or_create_settings_row(db)
 
     updates = {
         "temp_min": payload.get("temp_min", settings.temp_min),
@@ -262,6 +596,7 @@ def update_targets(payload: dict[str, Any] = Body(...), db: Session = Depends(ge
     if float(updates["ph_min"]) >= float(updates["ph_max"]):
         raise HTTPException(status_code=400, detail="ph_min must be lower than ph_max")
 
+    previous = _serialize_thresholds(settings)
     settings.temp_min = float(updates["temp_min"])
     settings.temp_max = float(updates["temp_max"])
     settings.moisture_min = int(updates["moisture_min"])
@@ -269,28 +604,63 @@ def update_targets(payload: dict[str, Any] = Body(...), db: Session = Depends(ge
     settings.ph_min = float(updates["ph_min"])
     settings.ph_max = float(updates["ph_max"])
 
+    if _serialize_thresholds(settings) != previous:
+        threshold_profile_crud.create_version(db, _serialize_thresholds(settings))
+        event_hub.stage(db, "targets", _serialize_thresholds(settings))
     db.commit()
     db.refresh(settings)
+    config_cache.set(SystemSettings, settings)
     return _serialize_thresholds(settings)
 
 
+@router.get("/settings/profiles")
+def get_threshold_profiles(
+    limit: int = Query(default=50, ge=1, le=500),
+    db: Session = Depends(get_read_db),
+) -> dict[str, Any]:
+    profiles = threshold_profile_crud.get_multi(db, limit=limit)
+    return {"items": [_serialize_threshold_profile(row) for row in profiles], "count": len(profiles)}
+
+
 @router.get("/control/state")
 def get_control_state(db: Session = Depends(get_db)) -> dict[str, Any]:
     state = _get_or_create_control_state(db)
     return _serialize_control_state(state)
 
 
-@router.post("/sensor/ingest", response_model=SensorOut)
-def ingest_sensor_data(payload: SensorIn, db: Session = Depends(get_db)) -> SensorOut:
+@router.post("/sensor/ingest", response_model=SensorOut, responses={202: {"description": "Queued for write-behind"}})
+def ingest_sensor_data(payload: SensorIn, db: Session = Depends(get_db)) -> SensorOut | JSONResponse:
     settings = _get_or_create_settings(db)
     raw_payload = payload.model_dump(exclude_none=True)
-    return _save_sensor_payload(db, raw_payload, settings)
 
+    if not ingest_queue.running:
+        return _save_sensor_payload(db, raw_payload, settings)
 
-@router.post("/sensor/sync", response_model=SensorOut)
-def sync_sensor_data(db: Session = Depends(get_db)) -> SensorOut:
+    try:
+        depth = ingest_queue.submit(_normalize_sensor_payload(raw_payload, settings))
+    except IngestQueueFull as exc:
+        raise HTTPException(status_code=429, detail=f"Ingest queue is full, retry later: {exc}") from exc
+    return JSONResponse(status_code=202, content={"queued": True, "queue_depth": depth})
+
+
+@router.get("/sensor/ingest/queue")
+def get_ingest_queue_stats() -> dict[str, Any]:
+    return ingest_queue.stats()
+
+
+@router.post("/sensor/ingest/batch", response_model=SensorBatchResponse)
+def ingest_sensor_batch(
+    payload: list[dict[str, Any]] = Body(..., min_length=1, max_length=MAX_INGEST_BATCH),
+    db: Session = Depends(get_db),
+) -> SensorBatchResponse:
     settings = _get_or_create_settings(db)
-    runtime_mode = _get_or_create_runtime_mode(db)
+    return _save_sensor_batch(db, payload, settings)
+
+
+@router.post("/sensor/sync", response_model=SensorOut)
+async def sync_sensor_data(db: Session = Depends(get_db)) -> SensorOut:
+    settings = await run_in_threadpool(_get_or_create_settings, db)
+    runtime_mode = await run_in_threadpool(_get_or_create_runtime_mode, db)
 
     if runtime_mode.mode != "live":
         raise HTTPException(
@@ -299,11 +669,11 @@ def sync_sensor_data(db: Session = Depends(get_db)) -> SensorOut:
         )
 
     try:
-        raw_payload = esp32_client.fetch_current_data()
-    except requests.RequestException as exc:
+        raw_payload = await esp32_client.fetch_current_data()
+    except httpx.HTTPError as exc:
         raise HTTPException(status_code=502, detail=f"Failed to fetch ESP32 data: {exc}") from exc
 
-    return _save_sensor_payload(db, raw_payload, settings)
+    return await run_in_threadpool(_save_sensor_payload, db, raw_payload, settings)
 
 
 @router.post("/sensor/simulate", response_model=SensorOut)
@@ -317,77 +687,245 @@ def simulate_sensor_data(db: Session = Depends(get_db)) -> SensorOut:
             detail="Mock simulation is disabled while runtime mode is 'live'. Switch to 'mock' first.",
         )
 
-    latest = sensor_crud.get_multi(db, limit=1)
-    baseline = latest[0] if latest else None
-    simulated = _build_simulated_payload(settings, baseline)
-    return _save_sensor_payload(db, simulated, settings)
+    return _save_simulated_payload(db, settings)
 
 
 @router.post("/sensor/collect", response_model=SensorOut)
-def collect_sensor_data(db: Session = Depends(get_db)) -> SensorOut:
-    settings = _get_or_create_settings(db)
-    runtime_mode = _get_or_create_runtime_mode(db)
+async def collect_sensor_data(db: Session = Depends(get_db)) -> SensorOut:
+    settings = await run_in_threadpool(_get_or_create_settings, db)
+    runtime_mode = await run_in_threadpool(_get_or_create_runtime_mode, db)
 
     if runtime_mode.mode == "live":
         try:
-            raw_payload = esp32_client.fetch_current_data()
-        except requests.RequestException as exc:
+            raw_payload = await esp32_client.fetch_current_data()
+        except httpx.HTTPError as exc:
             raise HTTPException(status_code=502, detail=f"Failed to fetch ESP32 data: {exc}") from exc
-        return _save_sensor_payload(db, raw_payload, settings)
+        return await run_in_threadpool(_save_sensor_payload, db, raw_payload, settings)
 
-    latest = sensor_crud.get_multi(db, limit=1)
-    baseline = latest[0] if latest else None
-    simulated = _build_simulated_payload(settings, baseline)
-    return _save_sensor_payload(db, simulated, settings)
+    return await run_in_threadpool(_save_simulated_payload, db, settings)
 
 
 @router.get("/sensor/latest", response_model=SensorOut)
-def get_latest_sensor_data(db: Session = Depends(get_db)) -> SensorOut:
-    items = sensor_crud.get_multi(db, limit=1)
+def get_latest_sensor_data(
+    device_id: str | None = Query(default=None),
+    db: Session = Depends(get_read_db),
+) -> SensorOut:
+    if device_id is None:
+        items = _latest_readings(db, 1)
+    else:
+        buffered = reading_buffer.latest_for_device(device_id, 1)
+        if buffered:
+            items = [SensorOut.model_construct(**row) for row in buffered]
+        else:
+            items = [SensorOut.model_construct(**row) for row in sensor_crud.get_page_rows(db, limit=1, device_id=device_id)]
     if not items:
         raise HTTPException(status_code=404, detail="No sensor data available")
-    return SensorOut.model_validate(items[0])
+    return items[0]
 
 
 @router.get("/sensor/history", response_model=SensorHistoryResponse)
 def get_sensor_history(
+    request: Request,
     limit: int = Query(default=100, ge=1, le=2000),
+    start: datetime | None = Query(default=None),
+    end: datetime | None = Query(default=None),
+    device_id: str | None = Query(default=None),
+    cursor: str | None = Query(default=None, description="next_cursor from the previous page"),
+    db: Session = Depends(get_read_db),
+) -> Response:
+    before = _decode_history_cursor(cursor) if cursor else None
+    versions, last_modified = _resource_versions(db, "readings")
+
+    def build() -> dict[str, Any]:
+        # Column tuples encoded straight to JSON; response_model only documents the shape.
+        items = sensor_crud.get_page_rows(
+            db,
+            limit=limit,
+            start_time=_utc_naive(start),
+            end_time=_utc_naive(end),
+            device_id=device_id,
+            before=before,
+        )
+        next_cursor = _encode_history_cursor(items[-1]) if len(items) == limit else None
+        return {"items": items, "count": len(items), "next_cursor": next_cursor}
+
+    return _conditional_json(request, _etag("history", versions), last_modified, build)
+
+
+@router.get("/sensor/history/downsampled")
+def get_sensor_history_downsampled(
+    start: datetime | None = Query(default=None),
+    end: datetime | None = Query(default=None),
+    device_id: str | None = Query(default=None),
+    points: int = Query(default=500, ge=10, le=5000),
+    method: Literal["lttb", "minmax"] = Query(default="lttb"),
+    db: Session = Depends(get_read_db),
+) -> ORJSONResponse:
+    end = _utc_naive(end) or datetime.utcnow()
+    start = _utc_naive(start) or end - timedelta(hours=24)
+    if start > end:
+        raise HTTPException(status_code=400, detail="start must not be after end")
+    downsampled = downsample_history(
+        db,
+        start,
+        end,
+        device_id=device_id,
+        points=points,
+        method=method,
+        max_source_rows=app_settings.downsample_max_source_rows,
+        chunk_size=app_settings.export_chunk_rows,
+    )
+    return ORJSONResponse(
+        {"start": start, "end": end, "device_id": device_id, "method": method, "points": points, **downsampled}
+    )
+
+
+@router.get("/sensor/since")
+def get_sensor_readings_since(
+    after_id: int | None = Query(default=None, ge=0, description="last_id from the previous call"),
+    after: datetime | None = Query(default=None),
+    device_id: str | None = Query(default=None),
+    limit: int = Query(default=500, ge=1, le=5000),
+    db: Session = Depends(get_read_db),
+) -> ORJSONResponse:
+    items = sensor_crud.get_rows_after(
+        db,
+        after_id=after_id,
+        after_time=_utc_naive(after),
+        device_id=device_id,
+        limit=limit,
+    )
+    following = after_id is not None or after is not None
+    return ORJSONResponse(
+        {
+            "items": items,
+            "count": len(items),
+            "last_id": max((item["id"] for item in items), default=after_id),
+            "has_more": following and len(items) == limit,
+        }
+    )
+
+
+@router.get("/sensor/export", response_class=StreamingResponse)
+def export_sensor_data(
+    format: Literal["csv", "ndjson", "parquet", "arrow"] = Query(default="csv"),
+    start: datetime | None = Query(default=None),
+    end: datetime | None = Query(default=None),
+    device_id: str | None = Query(default=None),
+) -> StreamingResponse:
+    try:
+        export = export_format(format)
+    except ExportFormatUnavailable as exc:
+        raise HTTPException(status_code=501, detail=str(exc)) from exc
+
+    filename = f"sensor-data-{datetime.utcnow():%Y%m%dT%H%M%SZ}.{export.extension}"
+    return StreamingResponse(
+        stream_sensor_export(format, _utc_naive(start), _utc_naive(end), device_id),
+        media_type=export.media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@router.get("/sensor/stats")
+def get_sensor_stats(
+    start: datetime | None = Query(default=None),
+    end: datetime | None = Query(default=None),
+    device_id: str | None = Query(default=None),
+    db: Session = Depends(get_read_db),
+) -> dict[str, Any]:
+    end = _utc_naive(end) or datetime.utcnow()
+    start = _utc_naive(start) or end - timedelta(hours=24)
+    if start > end:
+        raise HTTPException(status_code=400, detail="start must not be after end")
+    return {
+        "start": start,
+        "end": end,
+        "device_id": device_id,
+        **sensor_crud.get_statistics(db, start, end, device_id=device_id),
+    }
+
+
+@router.get("/sensor/violations")
+def get_sensor_violations(
+    start: datetime | None = Query(default=None),
+    end: datetime | None = Query(default=None),
+    device_id: str | None = Query(default=None),
+    against: Literal["current", "recorded"] = Query(default="current"),
     db: Session = Depends(get_db),
-) -> SensorHistoryResponse:
-    items = sensor_crud.get_multi(db, limit=limit)
-    serialized = [SensorOut.model_validate(item) for item in items]
-    return SensorHistoryResponse(items=serialized, count=len(serialized))
+) -> dict[str, Any]:
+    end = _utc_naive(end) or datetime.utcnow()
+    start = _utc_naive(start) or end - timedelta(hours=24)
+    if start > end:
+        raise HTTPException(status_code=400, detail="start must not be after end")
+    thresholds = _serialize_thresholds(_get_or_create_settings(db)) if against == "current" else None
+    return {
+        "start": start,
+        "end": end,
+        "device_id": device_id,
+        "against": against,
+        "thresholds": thresholds,
+        **scan_violations(db, start, end, device_id, thresholds, chunk_size=app_settings.export_chunk_rows),
+    }
+
+
+@router.get("/sensor/counts")
+def get_sensor_counts(
+    days: int = Query(default=30, ge=1, le=3650),
+    db: Session = Depends(get_read_db),
+) -> dict[str, Any]:
+    by_device = reading_counter_crud.get_scope(db, "device")
+    by_day = reading_counter_crud.get_scope(db, "day", limit=days)
+    return {
+        "total": reading_counter_crud.get_total(db) or 0,
+        "by_device": [{"device_id": key or None, "count": count} for key, count in by_device.items()],
+        "by_day": [{"day": key, "count": count} for key, count in by_day.items()],
+    }
 
 
 @router.get("/alerts", response_model=AlertListResponse)
 def get_alerts(
+    request: Request,
     unresolved_only: bool = Query(default=True),
     severity: str | None = Query(default=None),
-    db: Session = Depends(get_db),
-) -> AlertListResponse:
-    if unresolved_only:
-        alerts = alert_crud.get_unresolved_alerts(db, severity=severity)
-    else:
-        alerts = alert_crud.get_recent_alerts(db, hours=168, limit=500)
-        if severity:
-            alerts = [alert for alert in alerts if alert.severity == severity]
+    db: Session = Depends(get_read_db),
+) -> Response:
+    versions, last_modified = _resource_versions(db, "alerts")
+    # The recent list is a sliding window; alerts ageing out of it change the count.
+    window = None if unresolved_only else alert_crud.count_recent(db, hours=RECENT_ALERT_HOURS)
+
+    def build() -> dict[str, Any]:
+        if unresolved_only:
+            alerts = alert_crud.get_unresolved_alert_rows(db, severity=severity)
+        else:
+            alerts = alert_crud.get_recent_alert_rows(db, hours=RECENT_ALERT_HOURS, limit=500)
+            if severity:
+                alerts = [alert for alert in alerts if alert["severity"] == severity]
+        return {"items": alerts, "count": len(alerts)}
+
+    return _conditional_json(request, _etag("alerts", versions, window), last_modified, build)
+
 
-    serialized = [AlertOut.model_validate(alert) for alert in alerts]
-    return AlertListResponse(items=serialized, count=len(serialized))
+@router.get("/alerts/engine")
+def get_alert_engine_stats() -> dict[str, Any]:
+    return alert_tracker.stats()
 
 
 @router.post("/alerts/{alert_id}/resolve", response_model=AlertOut)
 def resolve_alert(alert_id: int, db: Session = Depends(get_db)) -> AlertOut:
-    alert = alert_crud.resolve_alert(db, alert_id)
-    if alert is None:
-        raise HTTPException(status_code=404, detail="Alert not found")
-    return AlertOut.model_validate(alert)
+    with unit_of_work(db):
+        alert = alert_crud.resolve_alert(db, alert_id)
+        if alert is None:
+            raise HTTPException(status_code=404, detail="Alert not found")
+        resolved = AlertOut.model_validate(alert)
+        event_hub.stage(db, "alert", {"action": "resolved", **resolved.model_dump()})
+    alert_tracker.forget(alert_id)
+    return resolved
 
 
 @router.post("/control", response_model=ControlResponse)
-def send_control_command(command: ControlCommand, db: Session = Depends(get_db)) -> ControlResponse:
+async def send_control_command(command: ControlCommand, db: Session = Depends(get_db)) -> ControlResponse:
     outgoing = _build_control_payload(command)
-    runtime_mode = _get_or_create_runtime_mode(db)
+    runtime_mode = await run_in_threadpool(_get_or_create_runtime_mode, db)
     outgoing_for_esp32 = dict(outgoing)
     response_payload: dict[str, Any] = {}
     forwarded = False
@@ -403,34 +941,15 @@ def send_control_command(command: ControlCommand, db: Session = Depends(get_db))
     else:
         if outgoing_for_esp32:
             try:
-                response_payload = esp32_client.send_control(outgoing_for_esp32)
+                response_payload = await esp32_client.send_control(outgoing_for_esp32)
                 forwarded = True
-            except requests.RequestException as exc:
+            except httpx.HTTPError as exc:
                 if app_settings.allow_live_fallback:
                     warnings.append(f"ESP32 unavailable, applied locally only: {exc}")
                 else:
                     raise HTTPException(status_code=502, detail=f"Failed to send command to ESP32: {exc}") from exc
 
-    state = _update_control_state(db, outgoing)
-
-    latest = sensor_crud.get_multi(db, limit=1)
-    latest_row = latest[0] if latest else None
-
-    for actuator in ("fan", "heater", "humidifier", "ph_actuator"):
-        if actuator not in outgoing:
-            continue
-        actuator_crud.create(
-            db,
-            {
-                "actuator_type": actuator,
-                "action": str(outgoing[actuator]),
-                "duration_seconds": 0.0,
-                "triggered_by": "manual_api",
-                "sensor_temperature": latest_row.temperature if latest_row else None,
-                "sensor_moisture": latest_row.moisture if latest_row else None,
-                "sensor_ph": latest_row.ph if latest_row else None,
-            },
-        )
+    serialized_state = await run_in_threadpool(_apply_control_command, db, outgoing)
 
     payload = {
         "runtime_mode": runtime_mode.mode,
@@ -439,7 +958,7 @@ def send_control_command(command: ControlCommand, db: Session = Depends(get_db))
         "forwarded_to_esp32": forwarded,
         "esp32_response": response_payload,
         "warning": " | ".join(warnings) if warnings else None,
-        "state": _serialize_control_state(state),
+        "state": serialized_state,
     }
     message = "Control command applied"
     if warnings:
@@ -448,120 +967,65 @@ def send_control_command(command: ControlCommand, db: Session = Depends(get_db))
     return ControlResponse(success=True, message=message, payload=payload)
 
 
-@router.get("/monitoring/report")
+@router.get("/fleet/devices")
+async def get_fleet_devices() -> dict[str, Any]:
+    return fleet_poller.stats()
+
+
+@router.post("/fleet/devices")
+async def register_fleet_device(payload: FleetDeviceIn) -> dict[str, Any]:
+    device = FleetDevice(
+        device_id=payload.device_id,
+        base_url=payload.base_url.rstrip("/"),
+        location=payload.location,
+        poll_interval=payload.poll_interval,
+        timeout=payload.timeout,
+    )
+    fleet_poller.register(device)
+    return next(item for item in fleet_poller.stats()["devices"] if item["device_id"] == device.device_id)
+
+
+@router.delete("/fleet/devices/{device_id}")
+async def unregister_fleet_device(device_id: str) -> dict[str, Any]:
+    if not fleet_poller.unregister(device_id):
+        raise HTTPException(status_code=404, detail="Device not registered")
+    return {"success": True, "device_id": device_id}
+
+
+@router.get("/monitoring/report", response_class=ORJSONResponse)
 def get_monitoring_report(
+    request: Request,
     points: int = Query(default=20, ge=5, le=500),
     log_items: int = Query(default=10, ge=5, le=100),
+    series: bool = Query(default=True),
     db: Session = Depends(get_db),
-) -> dict[str, Any]:
+) -> Response:
     settings = _get_or_create_settings(db)
     state = _get_or_create_control_state(db)
     runtime_mode = _get_or_create_runtime_mode(db)
-
-    max_rows = max(points, log_items, 100)
-    history_desc = sensor_crud.get_multi(db, limit=max_rows)
-
-    latest = history_desc[0] if history_desc else None
-    live_rows = list(reversed(history_desc[:points]))
-    log_rows = history_desc[:log_items]
-
-    total_readings = db.execute(select(func.count(SensorData.id))).scalar_one() or 0
-
-    if latest:
-        temp_status = _parameter_status(latest.temperature, settings.temp_min, settings.temp_max)
-        moisture_status = _parameter_status(float(latest.moisture), settings.moisture_min, settings.moisture_max)
-        ph_status = _parameter_status(float(latest.ph or 7.0), settings.ph_min, settings.ph_max)
-    else:
-        temp_status = moisture_status = ph_status = "unknown"
-
-    sample = history_desc[: max(points, log_items)]
-    if sample:
-        avg_temp = round(sum(item.temperature for item in sample) / len(sample), 2)
-        avg_moisture = round(sum(item.moisture for item in sample) / len(sample), 1)
-        avg_ph = round(sum(float(item.ph or 7.0) for item in sample) / len(sample), 2)
-    else:
-        avg_temp = avg_moisture = avg_ph = None
-
-    live_series = [
-        {
-            "timestamp": item.timestamp,
-            "temperature": item.temperature,
-            "moisture": item.moisture,
-            "ph": float(item.ph or 7.0),
-        }
-        for item in live_rows
-    ]
-
-    readings_log = [
-        {
-            "timestamp": item.timestamp,
-            "temperature": item.temperature,
-            "moisture": item.moisture,
-            "ph": float(item.ph or 7.0),
-        }
-        for item in log_rows
-    ]
-
-    active_actuators = sum([state.fan, state.heater, state.humidifier, state.ph_actuator])
-
-    return {
-        "generated_at": datetime.utcnow(),
-        "runtime_mode": _serialize_runtime_mode(runtime_mode),
-        "targets": _serialize_thresholds(settings),
-        "control_state": _serialize_control_state(state),
-        "current": {
-            "temperature": latest.temperature if latest else None,
-            "moisture": latest.moisture if latest else None,
-            "ph": float(latest.ph or 7.0) if latest else None,
-            "timestamp": latest.timestamp if latest else None,
-        },
-        "deviation": {
-            "temperature": {
-                "status": temp_status,
-                "current": latest.temperature if latest else None,
-                "target": round((settings.temp_min + settings.temp_max) / 2, 2),
-            },
-            "moisture": {
-                "status": moisture_status,
-                "current": latest.moisture if latest else None,
-                "target": round((settings.moisture_min + settings.moisture_max) / 2, 1),
-            },
-            "ph": {
-                "status": ph_status,
-                "current": float(latest.ph or 7.0) if latest else None,
-                "target": round((settings.ph_min + settings.ph_max) / 2, 2),
-            },
-        },
-        "live_series": live_series,
-        "readings_log": readings_log,
-        "report": {
-            "status": {
-                "temperature": temp_status,
-                "moisture": moisture_status,
-                "ph": ph_status,
-            },
-            "averages": {
-                "temperature": avg_temp,
-                "moisture": avg_moisture,
-                "ph": avg_ph,
-            },
-            "total_readings": total_readings,
-            "active_actuators": active_actuators,
-            "max_actuators": 4,
-        },
-    }
+    versions, readings_modified = _resource_versions(db, "readings")
+    etag = _etag(
+        "report",
+        series,
+        versions,
+        _serialize_thresholds(settings),
+        _serialize_control_state(state),
+        _serialize_runtime_mode(runtime_mode),
+    )
+    last_modified = _last_modified(readings_modified, settings.updated_at, state.updated_at, runtime_mode.updated_at)
+    return _conditional_json(request, etag, last_modified, lambda: _build_monitoring_report(db, points, log_items, series))
 
 
 @router.get("/system/overview")
 def get_system_overview(db: Session = Depends(get_db)) -> dict[str, Any]:
-    latest_items = sensor_crud.get_multi(db, limit=1)
+    latest_items = _latest_readings(db, 1)
     unresolved = alert_crud.get_unresolved_alerts(db)
     recent_actuation = actuator_crud.get_actuator_history(db, limit=10)
     state = _get_or_create_control_state(db)
     runtime_mode = _get_or_create_runtime_mode(db)
 
     return {
-        "latest": SensorOut.model_validate(latest_items[0]).model_dump() if latest_items else None,
+        "latest": latest_items[0].model_dump() if latest_items else None,
         "unresolved_alerts": len(unresolved),
         "runtime_mode": _serialize_runtime_mode(runtime_mode),
         "control_state": _serialize_control_state(state),
@@ -576,3 +1040,29 @@ def get_system_overview(db: Session = Depends(get_db)) -> dict[str, Any]:
             for item in recent_actuation
         ],
     }
+
+
+@router.get("/stream", response_class=StreamingResponse)
+async def stream_events(
+    types: str | None = Query(default=None, description="Comma-separated event types; all when omitted"),
+    last_event_id: int | None = Header(default=None),
+) -> StreamingResponse:
+    selected = [item.strip() for item in types.split(",") if item.strip()] if types else list(EVENT_TYPES)
+    unknown = sorted(set(selected) - set(EVENT_TYPES))
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown event types {unknown}; choose from {list(EVENT_TYPES)}")
+    return StreamingResponse(
+        event_hub.stream(selected, last_event_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/system/stream")
+def get_stream_stats() -> dict[str, Any]:
+    return event_hub.stats()
+
+
+@router.get("/system/retention")
+def get_retention_stats() -> dict[str, Any]:
+    return retention_engine.stats()
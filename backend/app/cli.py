@@ -0,0 +1,109 @@
+"""Maintenance commands, run from the backend directory:
+
+    python -m app.cli rebuild-rollups
+    python -m app.cli rebuild-counters
+    python -m app.cli retention
+    python -m app.cli vacuum
+    python -m app.cli check-query-plans
+"""
+
+import argparse
+import json
+import logging
+import sys
+import time
+
+from app.core import settings
+from app.core.database import SessionLocal, engine, unit_of_work
+from app.core.migrations import upgrade_database
+from app.crud import reading_counter_crud, sensor_rollup_crud
+import app.models  # noqa: F401
+from app.services import explain_hot_queries, retention_engine
+
+logger = logging.getLogger("app.cli")
+
+
+def rebuild_rollups(args: argparse.Namespace) -> int:
+    started = time.monotonic()
+    with SessionLocal() as db, unit_of_work(db):
+        readings = sensor_rollup_crud.rebuild(db)
+    logger.info("Rebuilt sensor rollups from %s readings in %.2fs", readings, time.monotonic() - started)
+    return 0
+
+
+def rebuild_counters(args: argparse.Namespace) -> int:
+    started = time.monotonic()
+    with SessionLocal() as db, unit_of_work(db):
+        total = reading_counter_crud.rebuild(db)
+    logger.info("Rebuilt reading counters (%s readings) in %.2fs", total, time.monotonic() - started)
+    return 0
+
+
+def run_retention(args: argparse.Namespace) -> int:
+    report = retention_engine.run_once()
+    print(json.dumps(report.as_dict(), default=str, indent=2))
+    return 0
+
+
+def vacuum(args: argparse.Namespace) -> int:
+    if engine.dialect.name != "sqlite":
+        logger.error("vacuum only applies to SQLite databases")
+        return 1
+    started = time.monotonic()
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        size_before = connection.exec_driver_sql("PRAGMA page_count").scalar() * connection.exec_driver_sql("PRAGMA page_size").scalar()
+        # VACUUM applies a changed auto_vacuum mode, so later retention runs can shrink the file incrementally.
+        connection.exec_driver_sql("PRAGMA auto_vacuum=INCREMENTAL")
+        connection.exec_driver_sql("VACUUM")
+        size_after = connection.exec_driver_sql("PRAGMA page_count").scalar() * connection.exec_driver_sql("PRAGMA page_size").scalar()
+    logger.info("Vacuumed database from %s to %s bytes in %.2fs", size_before, size_after, time.monotonic() - started)
+    return 0
+
+
+def check_query_plans(args: argparse.Namespace) -> int:
+    with SessionLocal() as db:
+        plans = explain_hot_queries(db)
+    failures = [plan for plan in plans if plan.table_scans]
+    for plan in plans:
+        if plan.table_scans or args.verbose:
+            status = "SCAN " + ", ".join(plan.table_scans) if plan.table_scans else "ok"
+            print(f"[{status}] {plan.name}: {plan.statement}")
+            for step in plan.plan:
+                print(f"    {step}")
+    print(f"{len(plans) - len(failures)}/{len(plans)} hot query statements use indexes")
+    return 1 if failures else 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description="Mushroom monitor maintenance commands")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser(
+        "rebuild-rollups", help="Recompute the minute/hour/day sensor rollups from raw readings"
+    ).set_defaults(handler=rebuild_rollups)
+    commands.add_parser(
+        "rebuild-counters", help="Recompute the total/device/day reading counters from raw readings"
+    ).set_defaults(handler=rebuild_counters)
+    commands.add_parser(
+        "retention", help="Delete rows older than the RETENTION_* policies now and print what was freed"
+    ).set_defaults(handler=run_retention)
+    commands.add_parser(
+        "vacuum", help="Rebuild the SQLite file and switch it to incremental auto-vacuum (locks the database)"
+    ).set_defaults(handler=vacuum)
+    check = commands.add_parser(
+        "check-query-plans", help="EXPLAIN the hot queries and exit non-zero if any of them scans a whole table"
+    )
+    check.add_argument("--verbose", action="store_true", help="print every plan, not only the failing ones")
+    check.set_defaults(handler=check_query_plans)
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    logging.basicConfig(level=getattr(logging, settings.log_level.upper(), logging.INFO))
+    args = build_parser().parse_args(argv)
+    upgrade_database()
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,4 +1,4 @@
 from app.core.config import settings
-from app.core.database import Base, engine, get_db
+from app.core.database import Base, engine, get_db, get_read_db, timestamp_bound, unit_of_work
 
-__all__ = ["settings", "Base", "engine", "get_db"]
+__all__ = ["settings", "Base", "engine", "get_db", "get_read_db", "timestamp_bound", "unit_of_work"]
@@ -10,11 +10,67 @@ class Settings:
     port: int = int(os.getenv("PORT", "8000"))
     cors_origins_raw: str = os.getenv("CORS_ORIGINS", "http://localhost:8501")
     database_url: str = os.getenv("DATABASE_URL", "sqlite:///./mushroom.db")
+    db_pool_class: str = os.getenv("DB_POOL_CLASS", "queue")
+    db_pool_size: int = int(os.getenv("DB_POOL_SIZE", "5"))
+    db_max_overflow: int = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    db_read_pool_size: int = int(os.getenv("DB_READ_POOL_SIZE", "0"))
+    sqlite_performance_profile: bool = os.getenv("SQLITE_PERFORMANCE_PROFILE", "true").lower() == "true"
+    sqlite_journal_mode: str = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+    sqlite_synchronous: str = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+    sqlite_mmap_size: int = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+    sqlite_cache_size_kb: int = int(os.getenv("SQLITE_CACHE_SIZE_KB", str(64 * 1024)))
+    sqlite_busy_timeout_ms: int = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "10000"))
+    sqlite_temp_store: str = os.getenv("SQLITE_TEMP_STORE", "MEMORY")
     esp32_base_url: str = os.getenv("ESP32_BASE_URL", "http://192.168.1.100")
     esp32_timeout: int = int(os.getenv("ESP32_TIMEOUT", "10"))
+    esp32_connect_timeout: float = float(os.getenv("ESP32_CONNECT_TIMEOUT", "3"))
+    esp32_read_timeout: float = float(os.getenv("ESP32_READ_TIMEOUT", os.getenv("ESP32_TIMEOUT", "10")))
+    esp32_max_connections: int = int(os.getenv("ESP32_MAX_CONNECTIONS", "20"))
+    esp32_keepalive_expiry: float = float(os.getenv("ESP32_KEEPALIVE_EXPIRY", "30"))
+    fleet_polling_enabled: bool = os.getenv("FLEET_POLLING_ENABLED", "false").lower() == "true"
+    fleet_devices_raw: str = os.getenv("FLEET_DEVICES", "")
+    fleet_poll_interval: float = float(os.getenv("FLEET_POLL_INTERVAL", "30"))
+    fleet_poll_timeout: float = float(os.getenv("FLEET_POLL_TIMEOUT", "5"))
+    fleet_poll_jitter: float = float(os.getenv("FLEET_POLL_JITTER", "0.1"))
+    fleet_write_batch_size: int = int(os.getenv("FLEET_WRITE_BATCH_SIZE", "50"))
+    fleet_write_interval_ms: int = int(os.getenv("FLEET_WRITE_INTERVAL_MS", "1000"))
     runtime_mode_default: str = os.getenv("RUNTIME_MODE_DEFAULT", "live")
     allow_live_fallback: bool = os.getenv("ALLOW_LIVE_FALLBACK", "false").lower() == "true"
     log_level: str = os.getenv("LOG_LEVEL", "INFO")
+    config_cache_ttl: float = float(os.getenv("CONFIG_CACHE_TTL", "30"))
+    config_cache_stamp_file: str = os.getenv("CONFIG_CACHE_STAMP_FILE", "")
+    reading_buffer_size: int = int(os.getenv("READING_BUFFER_SIZE", "500"))
+    reading_buffer_max_devices: int = int(os.getenv("READING_BUFFER_MAX_DEVICES", "100"))
+    export_chunk_rows: int = int(os.getenv("EXPORT_CHUNK_ROWS", "5000"))
+    retention_enabled: bool = os.getenv("RETENTION_ENABLED", "false").lower() == "true"
+    retention_interval_minutes: float = float(os.getenv("RETENTION_INTERVAL_MINUTES", "60"))
+    retention_raw_days: int = int(os.getenv("RETENTION_RAW_DAYS", "30"))
+    retention_minute_rollup_days: int = int(os.getenv("RETENTION_MINUTE_ROLLUP_DAYS", "30"))
+    retention_hour_rollup_days: int = int(os.getenv("RETENTION_HOUR_ROLLUP_DAYS", "365"))
+    retention_day_rollup_days: int = int(os.getenv("RETENTION_DAY_ROLLUP_DAYS", "0"))
+    retention_resolved_alert_days: int = int(os.getenv("RETENTION_RESOLVED_ALERT_DAYS", "90"))
+    retention_actuator_log_days: int = int(os.getenv("RETENTION_ACTUATOR_LOG_DAYS", "90"))
+    retention_batch_rows: int = int(os.getenv("RETENTION_BATCH_ROWS", "500"))
+    retention_batch_pause_ms: int = int(os.getenv("RETENTION_BATCH_PAUSE_MS", "50"))
+    retention_vacuum_pages: int = int(os.getenv("RETENTION_VACUUM_PAGES", "1000"))
+    alert_hysteresis_temperature: float = float(os.getenv("ALERT_HYSTERESIS_TEMPERATURE", "0.3"))
+    alert_hysteresis_moisture: float = float(os.getenv("ALERT_HYSTERESIS_MOISTURE", "1"))
+    alert_hysteresis_ph: float = float(os.getenv("ALERT_HYSTERESIS_PH", "0.05"))
+    alert_min_resolve_seconds: float = float(os.getenv("ALERT_MIN_RESOLVE_SECONDS", "60"))
+    alert_update_interval_seconds: float = float(os.getenv("ALERT_UPDATE_INTERVAL_SECONDS", "30"))
+    stream_heartbeat_seconds: float = float(os.getenv("STREAM_HEARTBEAT_SECONDS", "15"))
+    stream_replay_events: int = int(os.getenv("STREAM_REPLAY_EVENTS", "500"))
+    stream_subscriber_queue: int = int(os.getenv("STREAM_SUBSCRIBER_QUEUE", "1000"))
+    downsample_max_source_rows: int = int(os.getenv("DOWNSAMPLE_MAX_SOURCE_ROWS", "100000"))
+    metrics_enabled: bool = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+    ingest_write_behind: bool = os.getenv("INGEST_WRITE_BEHIND", "false").lower() == "true"
+    ingest_queue_maxsize: int = int(os.getenv("INGEST_QUEUE_MAXSIZE", "10000"))
+    ingest_flush_rows: int = int(os.getenv("INGEST_FLUSH_ROWS", "200"))
+    ingest_flush_interval_ms: int = int(os.getenv("INGEST_FLUSH_INTERVAL_MS", "250"))
+    ingest_backpressure: str = os.getenv("INGEST_BACKPRESSURE", "block")
+    ingest_block_timeout_ms: int = int(os.getenv("INGEST_BLOCK_TIMEOUT_MS", "2000"))
+    ingest_write_retries: int = int(os.getenv("INGEST_WRITE_RETRIES", "5"))
+    ingest_retry_backoff_ms: int = int(os.getenv("INGEST_RETRY_BACKOFF_MS", "200"))
 
     @property
     def cors_origins(self) -> list[str]:
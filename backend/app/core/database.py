@@ -1,20 +1,160 @@
-from collections.abc import Generator
+from collections.abc import Generator, Iterator
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any
 
-from sqlalchemy import create_engine
+from sqlalchemy import Engine, String, create_engine, event, literal
 from sqlalchemy.orm import declarative_base, sessionmaker, Session
+from sqlalchemy.pool import NullPool, QueuePool, SingletonThreadPool, StaticPool
 
 from app.core.config import settings
+from app.core.metrics import metrics
 
+POOL_CLASSES = {
+    "queue": QueuePool,
+    "null": NullPool,
+    "singleton": SingletonThreadPool,
+    "static": StaticPool,
+}
 
-connect_args = {"check_same_thread": False} if settings.database_url.startswith("sqlite") else {}
-engine = create_engine(settings.database_url, connect_args=connect_args)
+
+def _is_sqlite(url: str) -> bool:
+    return url.startswith("sqlite")
+
+
+def _is_memory_sqlite(url: str) -> bool:
+    return _is_sqlite(url) and (url.rstrip("/") in ("sqlite:", "sqlite:///:memory:") or "mode=memory" in url)
+
+
+def sqlite_pragmas(read_only: bool = False) -> list[str]:
+    """PRAGMAs run on every new SQLite connection.
+
+    WAL lets readers proceed while a write is in progress, and
+    ``synchronous=NORMAL`` only syncs at checkpoints instead of on every
+    commit; a power loss can drop the last transactions but never corrupts
+    the file.
+    """
+    pragmas = []
+    if settings.sqlite_performance_profile:
+        pragmas += [
+            # Only takes effect on a new, empty database; retention then returns freed pages to the filesystem.
+            "PRAGMA auto_vacuum=INCREMENTAL",
+            f"PRAGMA journal_mode={settings.sqlite_journal_mode}",
+            f"PRAGMA synchronous={settings.sqlite_synchronous}",
+            f"PRAGMA mmap_size={settings.sqlite_mmap_size}",
+            f"PRAGMA cache_size={-settings.sqlite_cache_size_kb}",
+            f"PRAGMA busy_timeout={settings.sqlite_busy_timeout_ms}",
+            f"PRAGMA temp_store={settings.sqlite_temp_store}",
+        ]
+    if read_only:
+        pragmas.append("PRAGMA query_only=ON")
+    return pragmas
+
+
+def _pool_options(url: str, pool_size: int) -> dict[str, Any]:
+    if _is_memory_sqlite(url):
+        # Every pooled connection would open its own empty database.
+        return {}
+    try:
+        pool_class = POOL_CLASSES[settings.db_pool_class.lower()]
+    except KeyError:
+        raise ValueError(f"DB_POOL_CLASS must be one of {', '.join(POOL_CLASSES)}") from None
+    if pool_class is QueuePool:
+        return {"poolclass": pool_class, "pool_size": pool_size, "max_overflow": settings.db_max_overflow}
+    return {"poolclass": pool_class}
+
+
+def _create_engine(pool_size: int, read_only: bool = False) -> Engine:
+    url = settings.database_url
+    connect_args = {"check_same_thread": False} if _is_sqlite(url) else {}
+    new_engine = create_engine(url, connect_args=connect_args, **_pool_options(url, pool_size))
+
+    if _is_sqlite(url):
+        pragmas = sqlite_pragmas(read_only)
+
+        @event.listens_for(new_engine, "connect")
+        def _apply_pragmas(dbapi_connection: Any, connection_record: Any) -> None:
+            cursor = dbapi_connection.cursor()
+            for pragma in pragmas:
+                cursor.execute(pragma)
+            cursor.close()
+
+    elif read_only and new_engine.dialect.name == "postgresql":
+        new_engine = new_engine.execution_options(postgresql_readonly=True)
+    return new_engine
+
+
+engine = _create_engine(settings.db_pool_size)
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+
+# Read-only endpoints get their own pool so long exports and history scans
+# never wait behind ingest for a connection. Disabled by DB_READ_POOL_SIZE=0.
+if settings.db_read_pool_size > 0 and not _is_memory_sqlite(settings.database_url):
+    read_engine = _create_engine(settings.db_read_pool_size, read_only=True)
+    ReadSessionLocal = sessionmaker(bind=read_engine, autoflush=False, autocommit=False)
+else:
+    read_engine = engine
+    ReadSessionLocal = SessionLocal
+
 Base = declarative_base()
 
 
+def _pool_usage() -> Iterator[tuple[tuple[str, ...], float]]:
+    engines = {"write": engine} if read_engine is engine else {"write": engine, "read": read_engine}
+    for name, pooled in engines.items():
+        pool = pooled.pool
+        if isinstance(pool, QueuePool):
+            yield (name, "checked_out"), pool.checkedout()
+            yield (name, "capacity"), pool.size() + max(settings.db_max_overflow, 0)
+
+
+metrics.gauge(
+    "db_pool_connections",
+    "Connections checked out of each QueuePool, and the most it will hand out (pool size plus overflow).",
+    _pool_usage,
+    ("pool", "state"),
+)
+
+
 def get_db() -> Generator[Session, None, None]:
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+
+def get_read_db() -> Generator[Session, None, None]:
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+@contextmanager
+def unit_of_work(db: Session) -> Iterator[Session]:
+    try:
+        yield db
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+
+def timestamp_bound(value: datetime, end_inclusive: bool = False) -> Any:
+    """Bind value for comparisons against stored timestamp columns.
+
+    SQLite keeps timestamps as text, and ``CURRENT_TIMESTAMP`` defaults are
+    stored without fractional seconds while SQLAlchemy writes a ``.000000``
+    suffix, so the same instant sorts differently depending on how the row was
+    written. Whole-second bounds use the short form for ``>=`` and ``<`` and
+    the long form (``end_inclusive=True``) for ``<=`` and ``>``, which matches
+    both spellings.
+    """
+    if engine.dialect.name != "sqlite":
+        return value
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    short = not value.microsecond and not end_inclusive
+    return literal(value.strftime("%Y-%m-%d %H:%M:%S" if short else "%Y-%m-%d %H:%M:%S.%f"), String)
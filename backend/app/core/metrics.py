@@ -0,0 +1,250 @@
+import math
+import threading
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from collections.abc import Callable, Iterable
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+
+CONTENT_TYPE = "text/plain; version=0.0.4"
+STAGED_KEY = "metrics_staged"
+
+# Seconds; covers a cached read (~1 ms) up to an ESP32 read timeout.
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+Samples = Iterable[tuple[tuple[str, ...], float]]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class _Metric(ABC):
+    type = ""
+
+    def __init__(self, registry: "MetricsRegistry", name: str, documentation: str, labelnames: tuple[str, ...]) -> None:
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._lock = threading.Lock()
+
+    def header(self) -> list[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+
+    @abstractmethod
+    def render(self) -> list[str]:
+        """Exposition lines for this metric, headers included."""
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def __init__(self, *args: Any) -> None:
+        super().__init__(*args)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, *labelvalues: str) -> None:
+        if not self.registry.enabled:
+            return
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0.0) + amount
+
+    def inc_on_commit(self, db: Session, amount: float = 1.0, *labelvalues: str) -> None:
+        """Count once ``db`` commits; nothing is counted if it rolls back."""
+        if self.registry.enabled and amount:
+            db.info.setdefault(STAGED_KEY, []).append((self, amount, labelvalues))
+
+    def render(self) -> list[str]:
+        with self._lock:
+            values = list(self._values.items())
+        return self.header() + [
+            f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}" for labels, value in values
+        ]
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, *args: Any, buckets: tuple[float, ...] = LATENCY_BUCKETS) -> None:
+        super().__init__(*args)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: one count per bucket plus +Inf, then sum. Cumulated only when rendered.
+        self._values: dict[tuple[str, ...], list[float]] = {}
+
+    def observe(self, value: float, *labelvalues: str) -> None:
+        if not self.registry.enabled:
+            return
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._values.get(labelvalues)
+            if counts is None:
+                counts = self._values[labelvalues] = [0.0] * (len(self.buckets) + 2)
+            counts[index] += 1
+            counts[-1] += value
+
+    def render(self) -> list[str]:
+        with self._lock:
+            values = [(labels, list(counts)) for labels, counts in self._values.items()]
+        lines = self.header()
+        for labels, counts in values:
+            cumulative = 0.0
+            for bound, count in zip((*self.buckets, math.inf), counts):
+                cumulative += count
+                le = 'le="%s"' % _number(bound)
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {_number(cumulative)}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {_number(counts[-1])}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {_number(cumulative)}")
+        return lines
+
+
+class Gauge(_Metric):
+    """Read from ``collect`` at scrape time, so the code it describes pays nothing."""
+
+    type = "gauge"
+
+    def __init__(self, *args: Any, collect: Callable[[], Samples]) -> None:
+        super().__init__(*args)
+        self.collect = collect
+
+    def render(self) -> list[str]:
+        return self.header() + [
+            f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}" for labels, value in self.collect()
+        ]
+
+
+class MetricsRegistry:
+    """Process-local metrics rendered in the Prometheus text exposition format.
+
+    Recording is a dict update under a per-metric lock, cheap enough for
+    every request and insert. Label values are passed positionally in
+    ``labelnames`` order and must come from small, fixed sets (route
+    templates, device ids, severities), never from raw request data.
+    """
+
+    def __init__(self, namespace: str, enabled: bool) -> None:
+        self.namespace = namespace
+        self.enabled = enabled
+        self._metrics: dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> Any:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def _name(self, name: str) -> str:
+        return f"{self.namespace}_{name}"
+
+    def counter(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter(self, self._name(name), documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(self, self._name(name), documentation, labelnames, buckets=buckets))
+
+    def gauge(
+        self,
+        name: str,
+        documentation: str,
+        collect: Callable[[], Samples],
+        labelnames: tuple[str, ...] = (),
+    ) -> Gauge:
+        return self._register(Gauge(self, self._name(name), documentation, labelnames, collect=collect))
+
+    def render(self) -> bytes:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = [line for metric in metrics for line in metric.render()]
+        return ("\n".join(lines) + "\n").encode()
+
+
+metrics = MetricsRegistry("mushroom", settings.metrics_enabled)
+
+http_request_duration = metrics.histogram(
+    "http_request_duration_seconds",
+    "Time from receiving a request to sending the last byte of its response, by route template.",
+    ("method", "route"),
+)
+http_requests = metrics.counter(
+    "http_requests_total", "Requests answered, by route template and status code.", ("method", "route", "status")
+)
+readings_ingested = metrics.counter("readings_ingested_total", "Sensor readings committed to the database.")
+alerts_opened = metrics.counter("alerts_opened_total", "Alerts committed to the database, by severity.", ("severity",))
+
+
+class MetricsMiddleware:
+    """Times every HTTP request and labels it with the matched route's path template.
+
+    A plain ASGI middleware rather than ``BaseHTTPMiddleware``, which would
+    buffer streaming responses. Server-Sent Events streams are counted but
+    not timed: they stay open for as long as the client is connected.
+    """
+
+    def __init__(self, app: Any) -> None:
+        self.app = app
+
+    async def __call__(self, scope: dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = "500"
+        timed = True
+
+        async def send_wrapper(message: dict[str, Any]) -> None:
+            nonlocal status, timed
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+                for key, value in message.get("headers", ()):
+                    if key.lower() == b"content-type" and value.startswith(b"text/event-stream"):
+                        timed = False
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # FastAPI stores the matched route in the scope; unmatched paths share one label.
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "unmatched"
+            method = scope["method"]
+            if timed:
+                http_request_duration.observe(time.perf_counter() - started, method, path)
+            http_requests.inc(1.0, method, path, status)
+
+
+@event.listens_for(Session, "after_commit")
+def _count_staged(session: Session) -> None:
+    for counter, amount, labelvalues in session.info.pop(STAGED_KEY, ()):
+        counter.inc(amount, *labelvalues)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _drop_staged(session: Session, previous_transaction: Any) -> None:
+    session.info.pop(STAGED_KEY, None)
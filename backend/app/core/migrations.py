@@ -0,0 +1,19 @@
+from pathlib import Path
+
+from alembic import command
+from alembic.config import Config
+
+BACKEND_DIR = Path(__file__).resolve().parents[2]
+
+
+def alembic_config() -> Config:
+    config = Config(str(BACKEND_DIR / "alembic.ini"))
+    config.set_main_option("script_location", str(BACKEND_DIR / "migrations"))
+    # The application configures logging itself; keep alembic.ini from replacing it.
+    config.attributes["configure_logger"] = False
+    return config
+
+
+def upgrade_database(revision: str = "head") -> None:
+    """Apply pending schema migrations to the configured database."""
+    command.upgrade(alembic_config(), revision)
@@ -1,5 +1,9 @@
 from app.crud.crud_sensor import sensor_crud
 from app.crud.crud_actuator import actuator_crud
 from app.crud.crud_alert import alert_crud
+from app.crud.crud_counter import reading_counter_crud
+from app.crud.crud_rollup import sensor_rollup_crud
+from app.crud.crud_threshold_profile import threshold_profile_crud
+from app.crud.crud_version import resource_version_crud
 
-__all__ = ["sensor_crud", "actuator_crud", "alert_crud"]
+__all__ = ["sensor_crud", "actuator_crud", "alert_crud", "reading_counter_crud", "sensor_rollup_crud", "threshold_profile_crud", "resource_version_crud"]
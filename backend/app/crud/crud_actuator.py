@@ -1,16 +1,20 @@
 from typing import List, Optional, Dict, Any
 from sqlalchemy.orm import Session
-from sqlalchemy import select, desc
+from sqlalchemy import select, desc, delete
 from datetime import datetime, timedelta
 
+from app.core.database import timestamp_bound
 from app.models.actuator_log import ActuatorLog
 
 class CRUDActuator:
-    def create(self, db: Session, obj_in: Dict[str, Any]) -> ActuatorLog:
+    def create(self, db: Session, obj_in: Dict[str, Any], commit: bool = False) -> ActuatorLog:
         db_obj = ActuatorLog(**obj_in)
         db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
+        if commit:
+            db.commit()
+            db.refresh(db_obj)
+        else:
+            db.flush()
         return db_obj
     
     def get_actuator_history(
@@ -40,5 +44,18 @@ class CRUDActuator:
         
         result = db.execute(query)
         return result.scalars().all()
+    
+    def delete_older_than(self, db: Session, cutoff: datetime, limit: int = 500, commit: bool = False) -> int:
+        ids = db.execute(
+            select(ActuatorLog.id)
+            .where(ActuatorLog.timestamp < timestamp_bound(cutoff))
+            .order_by(ActuatorLog.timestamp, ActuatorLog.id)
+            .limit(limit)
+        ).scalars().all()
+        if ids:
+            db.execute(delete(ActuatorLog).where(ActuatorLog.id.in_(ids)))
+        if commit:
+            db.commit()
+        return len(ids)
 
 actuator_crud = CRUDActuator()
@@ -1,43 +1,166 @@
 from typing import List, Optional, Dict, Any
 from sqlalchemy.orm import Session
-from sqlalchemy import select, desc
+from sqlalchemy import select, desc, insert, update, delete, func
 from datetime import datetime, timedelta
+from collections import Counter
 
+from app.core.database import timestamp_bound
+from app.core.metrics import alerts_opened
+from app.crud.crud_version import resource_version_crud
 from app.models.alert import Alert
 
+ALERT_COLUMNS = (
+    "id", "timestamp", "severity", "parameter", "message",
+    "threshold_value", "current_value", "resolved", "resolved_at",
+    "device_id", "peak_value", "occurrences", "last_seen_at"
+)
+
+ALERT_STATE_COLUMNS = (
+    "id", "timestamp", "device_id", "parameter", "message", "threshold_value",
+    "current_value", "peak_value", "occurrences", "last_seen_at"
+)
+
 class CRUDAlert:
-    def create(self, db: Session, obj_in: Dict[str, Any]) -> Alert:
+    def _count_opened(self, db: Session, objs_in: List[Dict[str, Any]]) -> None:
+        for severity, count in Counter(obj_in["severity"] for obj_in in objs_in).items():
+            alerts_opened.inc_on_commit(db, count, severity)
+    
+    def create(self, db: Session, obj_in: Dict[str, Any], commit: bool = False) -> Alert:
         db_obj = Alert(**obj_in)
         db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
+        resource_version_crud.bump(db, "alerts")
+        self._count_opened(db, [obj_in])
+        if commit:
+            db.commit()
+            db.refresh(db_obj)
+        else:
+            db.flush()
         return db_obj
     
-    def get_unresolved_alerts(
+    def create_multi(self, db: Session, objs_in: List[Dict[str, Any]], commit: bool = False) -> None:
+        if not objs_in:
+            return
+        db.execute(insert(Alert), objs_in)
+        resource_version_crud.bump(db, "alerts")
+        self._count_opened(db, objs_in)
+        if commit:
+            db.commit()
+    
+    def open_multi(self, db: Session, objs_in: List[Dict[str, Any]], commit: bool = False) -> List[Optional[int]]:
+        """Insert alerts and return their ids in input order.
+
+        The id is ``None`` where the (device, parameter) already has an open
+        alert, e.g. one opened by another worker; the partial unique index
+        allows only one.
+        """
+        if not objs_in:
+            return []
+        dialect = db.get_bind().dialect.name
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        elif dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        else:
+            dialect_insert = None
+        if dialect_insert is None:
+            result = db.execute(insert(Alert).returning(Alert.id, sort_by_parameter_order=True), objs_in)
+            ids = list(result.scalars())
+        else:
+            # One row per statement so a conflict skips only that row. Opens are rare.
+            stmt = dialect_insert(Alert).on_conflict_do_nothing().returning(Alert.id)
+            ids = [db.execute(stmt.values(**obj_in)).scalar() for obj_in in objs_in]
+        opened = [obj_in for obj_in, alert_id in zip(objs_in, ids) if alert_id is not None]
+        if opened:
+            resource_version_crud.bump(db, "alerts")
+            self._count_opened(db, opened)
+        if commit:
+            db.commit()
+        return ids
+    
+    def update_multi(self, db: Session, objs_in: List[Dict[str, Any]], commit: bool = False) -> None:
+        """Bulk UPDATE by primary key; every dict carries ``id`` and the same set of columns."""
+        if not objs_in:
+            return
+        db.execute(update(Alert), objs_in)
+        resource_version_crud.bump(db, "alerts")
+        if commit:
+            db.commit()
+    
+    def update_open_multi(self, db: Session, objs_in: List[Dict[str, Any]], commit: bool = False) -> List[int]:
+        """``update_multi`` restricted to alerts still open; returns the ids that were already resolved."""
+        if not objs_in:
+            return []
+        closed = list(db.execute(
+            select(Alert.id).where(Alert.id.in_([obj_in["id"] for obj_in in objs_in]), Alert.resolved == True)
+        ).scalars())
+        db.execute(
+            update(Alert).where(Alert.resolved == False).execution_options(synchronize_session=None),
+            objs_in
+        )
+        resource_version_crud.bump(db, "alerts")
+        if commit:
+            db.commit()
+        return closed
+    
+    def get_open_alert_states(
         self,
         db: Session,
-        severity: Optional[str] = None
-    ) -> List[Alert]:
-        query = select(Alert).where(Alert.resolved == False)
+        device_id: Optional[str] = None,
+        parameter: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Open alerts oldest first, optionally for one (device, parameter) pair."""
+        query = select(*(getattr(Alert, name) for name in ALERT_STATE_COLUMNS)).where(Alert.resolved == False)
+        if parameter is not None:
+            device_match = Alert.device_id.is_(None) if device_id is None else Alert.device_id == device_id
+            query = query.where(Alert.parameter == parameter, device_match)
+        query = query.order_by(Alert.timestamp, Alert.id)
+        return [dict(zip(ALERT_STATE_COLUMNS, row)) for row in db.execute(query)]
+    
+    def _unresolved_query(self, *entities: Any, severity: Optional[str] = None) -> Any:
+        query = select(*entities).where(Alert.resolved == False)
         
         if severity:
             query = query.where(Alert.severity == severity)
         
-        query = query.order_by(desc(Alert.timestamp))
-        result = db.execute(query)
+        return query.order_by(desc(Alert.timestamp))
+    
+    def _recent_query(self, *entities: Any, hours: int, limit: int) -> Any:
+        start_time = datetime.utcnow() - timedelta(hours=hours)
+        return select(*entities).where(
+            Alert.timestamp >= start_time
+        ).order_by(desc(Alert.timestamp)).limit(limit)
+    
+    def _rows(self, db: Session, query: Any) -> List[Dict[str, Any]]:
+        return [dict(zip(ALERT_COLUMNS, row)) for row in db.execute(query)]
+    
+    def get_unresolved_alerts(
+        self,
+        db: Session,
+        severity: Optional[str] = None
+    ) -> List[Alert]:
+        result = db.execute(self._unresolved_query(Alert, severity=severity))
         return result.scalars().all()
     
-    def resolve_alert(self, db: Session, alert_id: int) -> Optional[Alert]:
-        result = db.execute(
-            select(Alert).where(Alert.id == alert_id)
-        )
-        alert = result.scalar_one_or_none()
+    def get_unresolved_alert_rows(
+        self,
+        db: Session,
+        severity: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        columns = [getattr(Alert, name) for name in ALERT_COLUMNS]
+        return self._rows(db, self._unresolved_query(*columns, severity=severity))
+    
+    def resolve_alert(self, db: Session, alert_id: int, commit: bool = False) -> Optional[Alert]:
+        alert = db.get(Alert, alert_id)
         
         if alert:
             alert.resolved = True
             alert.resolved_at = datetime.utcnow()
-            db.commit()
-            db.refresh(alert)
+            resource_version_crud.bump(db, "alerts")
+            if commit:
+                db.commit()
+                db.refresh(alert)
+            else:
+                db.flush()
         
         return alert
     
@@ -47,12 +170,38 @@ class CRUDAlert:
         hours: int = 24,
         limit: int = 100
     ) -> List[Alert]:
-        start_time = datetime.utcnow() - timedelta(hours=hours)
-        query = select(Alert).where(
-            Alert.timestamp >= start_time
-        ).order_by(desc(Alert.timestamp)).limit(limit)
-        
-        result = db.execute(query)
+        result = db.execute(self._recent_query(Alert, hours=hours, limit=limit))
         return result.scalars().all()
+    
+    def get_recent_alert_rows(
+        self,
+        db: Session,
+        hours: int = 24,
+        limit: int = 100
+    ) -> List[Dict[str, Any]]:
+        columns = [getattr(Alert, name) for name in ALERT_COLUMNS]
+        return self._rows(db, self._recent_query(*columns, hours=hours, limit=limit))
+    
+    def count_recent(self, db: Session, hours: int = 24) -> int:
+        start_time = datetime.utcnow() - timedelta(hours=hours)
+        return db.execute(select(func.count()).where(Alert.timestamp >= start_time)).scalar_one()
+    
+    def delete_resolved_before(self, db: Session, cutoff: datetime, limit: int = 500, commit: bool = False) -> int:
+        """Delete up to ``limit`` alerts resolved before ``cutoff``. Open alerts are never deleted."""
+        ids = db.execute(
+            select(Alert.id)
+            .where(
+                Alert.resolved == True,
+                func.coalesce(Alert.resolved_at, Alert.timestamp) < timestamp_bound(cutoff)
+            )
+            .order_by(Alert.id)
+            .limit(limit)
+        ).scalars().all()
+        if ids:
+            db.execute(delete(Alert).where(Alert.id.in_(ids)))
+            resource_version_crud.bump(db, "alerts")
+        if commit:
+            db.commit()
+        return len(ids)
 
 alert_crud = CRUDAlert()
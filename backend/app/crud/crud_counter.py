@@ -0,0 +1,114 @@
+from typing import Optional, Dict, Any, Iterable, Tuple
+from collections import Counter
+from datetime import datetime
+from sqlalchemy.orm import Session
+from sqlalchemy import select, desc, delete, func
+
+from app.models.reading_counter import ReadingCounter
+from app.models.sensor_data import SensorData
+
+TOTAL_KEY = ("total", "all")
+
+
+def _device_key(device_id: Optional[str]) -> str:
+    return device_id or ""
+
+
+def _day_key(timestamp: Any) -> str:
+    if isinstance(timestamp, datetime):
+        return timestamp.date().isoformat()
+    return str(timestamp)[:10]
+
+
+class CRUDReadingCounter:
+    def deltas_for(self, rows: Iterable[Dict[str, Any]], sign: int = 1) -> Counter:
+        deltas: Counter = Counter()
+        for row in rows:
+            deltas[TOTAL_KEY] += sign
+            deltas[("device", _device_key(row.get("device_id")))] += sign
+            deltas[("day", _day_key(row["timestamp"]))] += sign
+        return deltas
+
+    def apply(self, db: Session, deltas: Dict[Tuple[str, str], int]) -> None:
+        values = [
+            {"scope": scope, "key": key, "count": count}
+            for (scope, key), count in deltas.items()
+            if count
+        ]
+        if not values:
+            return
+
+        dialect = db.get_bind().dialect.name
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert
+        elif dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            for value in values:
+                counter = db.get(ReadingCounter, (value["scope"], value["key"]))
+                if counter is None:
+                    db.add(ReadingCounter(**value))
+                else:
+                    counter.count += value["count"]
+            db.flush()
+            return
+
+        stmt = insert(ReadingCounter).values(values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[ReadingCounter.scope, ReadingCounter.key],
+            set_={"count": ReadingCounter.count + stmt.excluded.count}
+        )
+        db.execute(stmt)
+
+    def record(self, db: Session, rows: Iterable[Dict[str, Any]], sign: int = 1) -> None:
+        self.apply(db, self.deltas_for(rows, sign))
+
+    def prune(self, db: Session) -> int:
+        """Drop device and day counters that retention has brought down to zero."""
+        return db.execute(
+            delete(ReadingCounter).where(ReadingCounter.scope != TOTAL_KEY[0], ReadingCounter.count <= 0)
+        ).rowcount
+
+    def get_total(self, db: Session) -> Optional[int]:
+        counter = db.get(ReadingCounter, TOTAL_KEY)
+        return counter.count if counter else None
+
+    def get_scope(self, db: Session, scope: str, limit: Optional[int] = None) -> Dict[str, int]:
+        query = select(ReadingCounter.key, ReadingCounter.count).where(
+            ReadingCounter.scope == scope,
+            ReadingCounter.count > 0
+        ).order_by(desc(ReadingCounter.key))
+        if limit:
+            query = query.limit(limit)
+        return {key: count for key, count in db.execute(query).all()}
+
+    def rebuild(self, db: Session) -> int:
+        db.execute(delete(ReadingCounter))
+
+        day = func.date(SensorData.timestamp)
+        grouped = db.execute(
+            select(SensorData.device_id, day.label("day"), func.count(SensorData.id))
+            .group_by(SensorData.device_id, day)
+        ).all()
+
+        deltas: Counter = Counter()
+        for device_id, day_value, count in grouped:
+            deltas[TOTAL_KEY] += count
+            deltas[("device", _device_key(device_id))] += count
+            deltas[("day", _day_key(day_value))] += count
+
+        db.add(ReadingCounter(scope=TOTAL_KEY[0], key=TOTAL_KEY[1], count=deltas.pop(TOTAL_KEY, 0)))
+        db.add_all(
+            ReadingCounter(scope=scope, key=key, count=count)
+            for (scope, key), count in deltas.items()
+        )
+        db.flush()
+        return self.get_total(db) or 0
+
+    def ensure_initialized(self, db: Session) -> None:
+        if self.get_total(db) is None:
+            self.rebuild(db)
+            db.commit()
+
+
+reading_counter_crud = CRUDReadingCounter()
@@ -0,0 +1,375 @@
+from typing import Optional, Dict, Any, Iterable, List, Tuple
+from datetime import datetime, timedelta, timezone
+import math
+from sqlalchemy.orm import Session
+from sqlalchemy import select, delete, func, and_, or_, case, insert
+
+from app.core.database import timestamp_bound
+from app.models.sensor_data import SensorData
+from app.models.sensor_rollup import SensorRollup
+
+GRANULARITIES = ("minute", "hour", "day")
+METRICS = ("temperature", "moisture", "ph")
+SUM_COLUMNS = ("count", "ph_count") + tuple(
+    f"{metric}_{suffix}" for metric in METRICS for suffix in ("sum", "sumsq")
+)
+MIN_COLUMNS = tuple(f"{metric}_min" for metric in METRICS)
+MAX_COLUMNS = tuple(f"{metric}_max" for metric in METRICS)
+UPSERT_CHUNK = 500
+
+RollupKey = Tuple[str, datetime, str]
+
+
+def _naive_utc(value: datetime) -> datetime:
+    if value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def bucket_floor(value: datetime, granularity: str) -> datetime:
+    value = value.replace(second=0, microsecond=0)
+    if granularity in ("hour", "day"):
+        value = value.replace(minute=0)
+    if granularity == "day":
+        value = value.replace(hour=0)
+    return value
+
+
+def bucket_ceil(value: datetime, granularity: str) -> datetime:
+    floor = bucket_floor(value, granularity)
+    if floor == value:
+        return floor
+    step = {"minute": timedelta(minutes=1), "hour": timedelta(hours=1), "day": timedelta(days=1)}[granularity]
+    return floor + step
+
+
+def _empty() -> Dict[str, Any]:
+    values: Dict[str, Any] = {column: 0 for column in SUM_COLUMNS}
+    values.update({column: None for column in MIN_COLUMNS + MAX_COLUMNS})
+    return values
+
+
+def _add_reading(acc: Dict[str, Any], row: Dict[str, Any]) -> None:
+    acc["count"] += 1
+    for metric in METRICS:
+        value = row.get(metric)
+        if value is None:
+            continue
+        if metric == "ph":
+            acc["ph_count"] += 1
+        acc[f"{metric}_sum"] += value
+        acc[f"{metric}_sumsq"] += value * value
+        low, high = acc[f"{metric}_min"], acc[f"{metric}_max"]
+        acc[f"{metric}_min"] = value if low is None else min(low, value)
+        acc[f"{metric}_max"] = value if high is None else max(high, value)
+
+
+def _merge(acc: Dict[str, Any], other: Dict[str, Any]) -> None:
+    for column in SUM_COLUMNS:
+        acc[column] += other[column] or 0
+    for column in MIN_COLUMNS:
+        if other[column] is not None:
+            acc[column] = other[column] if acc[column] is None else min(acc[column], other[column])
+    for column in MAX_COLUMNS:
+        if other[column] is not None:
+            acc[column] = other[column] if acc[column] is None else max(acc[column], other[column])
+
+
+def _covering_buckets(start: datetime, end: datetime, level: int = 0) -> List[Tuple[str, datetime, datetime]]:
+    """Split the aligned range [start, end) into the coarsest whole buckets that fit."""
+    granularity = GRANULARITIES[level]
+    if level + 1 < len(GRANULARITIES):
+        coarser = GRANULARITIES[level + 1]
+        inner_start, inner_end = bucket_ceil(start, coarser), bucket_floor(end, coarser)
+        if inner_start < inner_end:
+            parts = _covering_buckets(inner_start, inner_end, level + 1)
+            if start < inner_start:
+                parts.append((granularity, start, inner_start))
+            if inner_end < end:
+                parts.append((granularity, inner_end, end))
+            return parts
+    return [(granularity, start, end)]
+
+
+def _metric_summary(acc: Dict[str, Any], metric: str) -> Dict[str, Optional[float]]:
+    n = acc["ph_count"] if metric == "ph" else acc["count"]
+    if not n:
+        return {"average": None, "min": None, "max": None, "stddev": None}
+    mean = acc[f"{metric}_sum"] / n
+    variance = max(acc[f"{metric}_sumsq"] / n - mean * mean, 0.0)
+    return {
+        "average": mean,
+        "min": acc[f"{metric}_min"],
+        "max": acc[f"{metric}_max"],
+        "stddev": math.sqrt(variance),
+    }
+
+
+def _raw_aggregates() -> List[Any]:
+    columns = [func.count(SensorData.id), func.count(SensorData.ph)]
+    for metric in METRICS:
+        value = getattr(SensorData, metric)
+        columns += [func.sum(value), func.sum(value * value)]
+    columns += [func.min(getattr(SensorData, metric)) for metric in METRICS]
+    columns += [func.max(getattr(SensorData, metric)) for metric in METRICS]
+    return columns
+
+
+def _rollup_aggregates() -> List[Any]:
+    return (
+        [func.sum(getattr(SensorRollup, column)) for column in SUM_COLUMNS]
+        + [func.min(getattr(SensorRollup, column)) for column in MIN_COLUMNS]
+        + [func.max(getattr(SensorRollup, column)) for column in MAX_COLUMNS]
+    )
+
+
+def _row_to_acc(row: Any) -> Dict[str, Any]:
+    values = dict(zip(SUM_COLUMNS + MIN_COLUMNS + MAX_COLUMNS, row))
+    for column in SUM_COLUMNS:
+        values[column] = values[column] or 0
+    return values
+
+
+class CRUDSensorRollup:
+    def deltas_for(self, rows: Iterable[Dict[str, Any]]) -> Dict[RollupKey, Dict[str, Any]]:
+        deltas: Dict[RollupKey, Dict[str, Any]] = {}
+        for row in rows:
+            timestamp = _naive_utc(row["timestamp"])
+            device_id = row.get("device_id") or ""
+            for granularity in GRANULARITIES:
+                key = (granularity, bucket_floor(timestamp, granularity), device_id)
+                acc = deltas.get(key)
+                if acc is None:
+                    acc = deltas[key] = _empty()
+                _add_reading(acc, row)
+        return deltas
+
+    def apply(self, db: Session, deltas: Dict[RollupKey, Dict[str, Any]]) -> None:
+        values = [
+            {"granularity": granularity, "bucket_start": bucket_start, "device_id": device_id, **acc}
+            for (granularity, bucket_start, device_id), acc in deltas.items()
+        ]
+        if not values:
+            return
+
+        dialect = db.get_bind().dialect.name
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as upsert
+        elif dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as upsert
+        else:
+            for value in values:
+                rollup = db.get(SensorRollup, (value["granularity"], value["bucket_start"], value["device_id"]))
+                if rollup is None:
+                    db.add(SensorRollup(**value))
+                    continue
+                current = {column: getattr(rollup, column) for column in SUM_COLUMNS + MIN_COLUMNS + MAX_COLUMNS}
+                _merge(current, value)
+                for column, merged in current.items():
+                    setattr(rollup, column, merged)
+            db.flush()
+            return
+
+        for offset in range(0, len(values), UPSERT_CHUNK):
+            stmt = upsert(SensorRollup).values(values[offset:offset + UPSERT_CHUNK])
+            excluded = stmt.excluded
+            updates: Dict[str, Any] = {}
+            for column in SUM_COLUMNS:
+                updates[column] = getattr(SensorRollup, column) + getattr(excluded, column)
+            for column in MIN_COLUMNS + MAX_COLUMNS:
+                current, incoming = getattr(SensorRollup, column), getattr(excluded, column)
+                better = incoming < current if column in MIN_COLUMNS else incoming > current
+                updates[column] = case(
+                    (current.is_(None), incoming),
+                    (and_(incoming.is_not(None), better), incoming),
+                    else_=current
+                )
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[SensorRollup.granularity, SensorRollup.bucket_start, SensorRollup.device_id],
+                set_=updates
+            )
+            db.execute(stmt)
+
+    def record(self, db: Session, rows: Iterable[Dict[str, Any]]) -> None:
+        self.apply(db, self.deltas_for(rows))
+
+    def _minute_buckets(self, db: Session) -> Iterable[Tuple[datetime, Optional[str], Dict[str, Any]]]:
+        dialect = db.get_bind().dialect.name
+        if dialect == "sqlite":
+            minute = func.strftime("%Y-%m-%d %H:%M", SensorData.timestamp)
+        elif dialect == "postgresql":
+            minute = func.date_trunc("minute", SensorData.timestamp)
+        else:
+            columns = [SensorData.timestamp, SensorData.device_id] + [getattr(SensorData, m) for m in METRICS]
+            for row in db.execute(select(*columns)).mappings().yield_per(5000):
+                acc = _empty()
+                _add_reading(acc, row)
+                yield bucket_floor(_naive_utc(row["timestamp"]), "minute"), row["device_id"], acc
+            return
+
+        query = select(
+            minute.label("minute"), SensorData.device_id, *_raw_aggregates()
+        ).group_by(minute, SensorData.device_id)
+        for row in db.execute(query).yield_per(5000):
+            bucket = row[0]
+            if isinstance(bucket, str):
+                bucket = datetime.strptime(bucket, "%Y-%m-%d %H:%M")
+            yield _naive_utc(bucket), row[1], _row_to_acc(row[2:])
+
+    def _rebuild_from(self, db: Session) -> Optional[Dict[str, datetime]]:
+        """First bucket of each granularity that raw readings fully cover.
+
+        None means no reading has been expired by retention, so every bucket
+        can be recomputed. Otherwise older buckets hold the only copy of the
+        expired readings and must be kept.
+        """
+        oldest = db.execute(select(func.min(SensorData.timestamp))).scalar()
+        if oldest is None:
+            has_rollups = db.execute(select(SensorRollup.granularity).limit(1)).first() is not None
+            return {granularity: datetime.max for granularity in GRANULARITIES} if has_rollups else None
+        oldest = _naive_utc(oldest)
+        expired = db.execute(
+            select(SensorRollup.granularity).where(or_(*(
+                and_(SensorRollup.granularity == granularity, SensorRollup.bucket_start < bucket_floor(oldest, granularity))
+                for granularity in GRANULARITIES
+            ))).limit(1)
+        ).first()
+        if expired is None:
+            return None
+        return {granularity: bucket_ceil(oldest, granularity) for granularity in GRANULARITIES}
+
+    def rebuild(self, db: Session) -> int:
+        rebuild_from = self._rebuild_from(db)
+        if rebuild_from is None:
+            db.execute(delete(SensorRollup))
+        else:
+            db.execute(delete(SensorRollup).where(or_(*(
+                and_(SensorRollup.granularity == granularity, SensorRollup.bucket_start >= start)
+                for granularity, start in rebuild_from.items()
+            ))))
+
+        deltas: Dict[RollupKey, Dict[str, Any]] = {}
+        for minute, device_id, acc in self._minute_buckets(db):
+            for granularity in GRANULARITIES:
+                if rebuild_from is not None and minute < rebuild_from[granularity]:
+                    continue
+                key = (granularity, bucket_floor(minute, granularity), device_id or "")
+                target = deltas.get(key)
+                if target is None:
+                    target = deltas[key] = _empty()
+                _merge(target, acc)
+
+        values = [
+            {"granularity": granularity, "bucket_start": bucket_start, "device_id": device_id, **acc}
+            for (granularity, bucket_start, device_id), acc in deltas.items()
+        ]
+        for offset in range(0, len(values), UPSERT_CHUNK):
+            db.execute(insert(SensorRollup), values[offset:offset + UPSERT_CHUNK])
+        db.flush()
+        return sum(acc["count"] for (granularity, _, _), acc in deltas.items() if granularity == "day")
+
+    def delete_older_than(
+        self, db: Session, granularity: str, cutoff: datetime, limit: int = 500, commit: bool = False
+    ) -> int:
+        """Delete the oldest ``granularity`` buckets starting before ``cutoff``, about ``limit`` rows at a time."""
+        older = and_(SensorRollup.granularity == granularity, SensorRollup.bucket_start < _naive_utc(cutoff))
+        last = db.execute(
+            select(SensorRollup.bucket_start).where(older)
+            .order_by(SensorRollup.bucket_start).offset(limit - 1).limit(1)
+        ).scalar()
+        if last is not None:
+            older = and_(older, SensorRollup.bucket_start <= last)
+        deleted = db.execute(delete(SensorRollup).where(older)).rowcount
+        if commit:
+            db.commit()
+        return deleted
+
+    def ensure_initialized(self, db: Session) -> None:
+        has_rollups = db.execute(select(SensorRollup.granularity).limit(1)).first() is not None
+        if has_rollups or db.execute(select(SensorData.id).limit(1)).first() is None:
+            return
+        self.rebuild(db)
+        db.commit()
+
+    def get_statistics(
+        self,
+        db: Session,
+        start_time: datetime,
+        end_time: datetime,
+        device_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Aggregate [start_time, end_time] from whole rollup buckets plus raw readings at the ragged edges."""
+        start_time, end_time = _naive_utc(start_time), _naive_utc(end_time)
+        acc = _empty()
+        if end_time < start_time:
+            return acc
+
+        first_minute, last_minute = bucket_ceil(start_time, "minute"), bucket_floor(end_time, "minute")
+        if first_minute < last_minute:
+            buckets = _covering_buckets(first_minute, last_minute)
+            raw_filter = or_(
+                and_(SensorData.timestamp >= timestamp_bound(start_time),
+                     SensorData.timestamp < timestamp_bound(first_minute)),
+                and_(SensorData.timestamp >= timestamp_bound(last_minute),
+                     SensorData.timestamp <= timestamp_bound(end_time, end_inclusive=True))
+            )
+        else:
+            buckets = []
+            raw_filter = and_(
+                SensorData.timestamp >= timestamp_bound(start_time),
+                SensorData.timestamp <= timestamp_bound(end_time, end_inclusive=True)
+            )
+
+        raw_query = select(*_raw_aggregates()).where(raw_filter)
+        if device_id is not None:
+            raw_query = raw_query.where(SensorData.device_id == device_id)
+        _merge(acc, _row_to_acc(db.execute(raw_query).one()))
+
+        if buckets:
+            rollup_query = select(*_rollup_aggregates()).where(
+                or_(*(
+                    and_(
+                        SensorRollup.granularity == granularity,
+                        SensorRollup.bucket_start >= bucket_start,
+                        SensorRollup.bucket_start < bucket_end
+                    )
+                    for granularity, bucket_start, bucket_end in buckets
+                ))
+            )
+            if device_id is not None:
+                rollup_query = rollup_query.where(SensorRollup.device_id == device_id)
+            _merge(acc, _row_to_acc(db.execute(rollup_query).one()))
+
+        return acc
+
+    def get_buckets(
+        self,
+        db: Session,
+        granularity: str,
+        start_time: datetime,
+        end_time: datetime,
+        device_id: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Oldest-first ``granularity`` buckets touching [start_time, end_time], merged across devices."""
+        query = (
+            select(SensorRollup.bucket_start, *_rollup_aggregates())
+            .where(
+                SensorRollup.granularity == granularity,
+                SensorRollup.bucket_start >= bucket_floor(_naive_utc(start_time), granularity),
+                SensorRollup.bucket_start <= _naive_utc(end_time)
+            )
+            .group_by(SensorRollup.bucket_start)
+            .order_by(SensorRollup.bucket_start)
+        )
+        if device_id is not None:
+            query = query.where(SensorRollup.device_id == device_id)
+        return [
+            {"bucket_start": row[0], **_row_to_acc(row[1:])}
+            for row in db.execute(query)
+        ]
+
+    def summarize(self, acc: Dict[str, Any]) -> Dict[str, Any]:
+        return {"count": acc["count"], **{metric: _metric_summary(acc, metric) for metric in METRICS}}
+
+
+sensor_rollup_crud = CRUDSensorRollup()
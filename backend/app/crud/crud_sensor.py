@@ -1,21 +1,78 @@
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple, Iterator, Sequence
 from sqlalchemy.orm import Session
-from sqlalchemy import select, desc, func, and_
+from sqlalchemy import select, desc, insert, delete, func, or_, Select
 from datetime import datetime, timedelta
 import logging
 
+from app.core.database import timestamp_bound
+from app.core.metrics import readings_ingested
+from app.crud.crud_counter import reading_counter_crud
+from app.crud.crud_rollup import sensor_rollup_crud
+from app.crud.crud_threshold_profile import threshold_profile_crud
+from app.crud.crud_version import resource_version_crud
 from app.models.sensor_data import SensorData
+from app.models.threshold_profile import THRESHOLD_DEFAULTS, THRESHOLD_FIELDS, ThresholdProfile
 
 logger = logging.getLogger(__name__)
 
+METRIC_COLUMNS = ("temperature", "moisture", "ph")
+
+READING_COLUMNS = (
+    "id", "timestamp", "temperature", "moisture", "ph",
+    "temp_min", "temp_max", "moisture_min", "moisture_max", "ph_min", "ph_max",
+    "device_id", "location"
+)
+
 class CRUDSensor:
-    def create(self, db: Session, obj_in: Dict[str, Any]) -> SensorData:
-        db_obj = SensorData(**obj_in)
+    def _with_thresholds(self, obj_in: Dict[str, Any]) -> Dict[str, Any]:
+        return {**THRESHOLD_DEFAULTS, **obj_in}
+    
+    def _to_row(self, db: Session, obj_in: Dict[str, Any]) -> Dict[str, Any]:
+        # Thresholds are stored once per distinct set in threshold_profiles.
+        row = {key: value for key, value in obj_in.items() if key not in THRESHOLD_FIELDS}
+        row["threshold_profile_id"] = threshold_profile_crud.resolve_id(db, obj_in)
+        return row
+    
+    def select_columns(self, columns: Sequence[str]) -> Select:
+        """SELECT of reading columns by name, with thresholds joined from the reading's profile."""
+        return select(*(
+            getattr(ThresholdProfile if name in THRESHOLD_FIELDS else SensorData, name) for name in columns
+        )).select_from(SensorData).outerjoin(ThresholdProfile, SensorData.threshold_profile_id == ThresholdProfile.id)
+    
+    def create(self, db: Session, obj_in: Dict[str, Any], commit: bool = False) -> SensorData:
+        obj_in = self._with_thresholds(obj_in)
+        db_obj = SensorData(**self._to_row(db, obj_in))
         db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
+        db.flush()
+        self._record_aggregates(db, [{**obj_in, "id": db_obj.id, "timestamp": db_obj.timestamp}])
+        if commit:
+            db.commit()
+            db.refresh(db_obj)
         return db_obj
     
+    def create_multi(self, db: Session, objs_in: List[Dict[str, Any]], commit: bool = False) -> List[Dict[str, Any]]:
+        if not objs_in:
+            return []
+        objs_in = [self._with_thresholds(obj_in) for obj_in in objs_in]
+        result = db.execute(
+            insert(SensorData).returning(SensorData.id, SensorData.timestamp, sort_by_parameter_order=True),
+            [self._to_row(db, obj_in) for obj_in in objs_in]
+        )
+        created = [
+            {**obj_in, "id": row.id, "timestamp": row.timestamp}
+            for obj_in, row in zip(objs_in, result.all())
+        ]
+        self._record_aggregates(db, created)
+        if commit:
+            db.commit()
+        return created
+    
+    def _record_aggregates(self, db: Session, rows: List[Dict[str, Any]]) -> None:
+        reading_counter_crud.record(db, rows)
+        sensor_rollup_crud.record(db, rows)
+        resource_version_crud.bump(db, "readings")
+        readings_ingested.inc_on_commit(db, len(rows))
+    
     def get(self, db: Session, id: int) -> Optional[SensorData]:
         result = db.execute(
             select(SensorData).where(SensorData.id == id)
@@ -28,10 +85,13 @@ class CRUDSensor:
         skip: int = 0, 
         limit: int = 100,
         start_time: Optional[datetime] = None,
-        end_time: Optional[datetime] = None
+        end_time: Optional[datetime] = None,
+        device_id: Optional[str] = None
     ) -> List[SensorData]:
         query = select(SensorData).order_by(desc(SensorData.timestamp))
         
+        if device_id is not None:
+            query = query.where(SensorData.device_id == device_id)
         if start_time:
             query = query.where(SensorData.timestamp >= start_time)
         if end_time:
@@ -41,50 +101,159 @@ class CRUDSensor:
         result = db.execute(query)
         return result.scalars().all()
     
+    def get_page_rows(
+        self,
+        db: Session,
+        limit: int = 100,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None,
+        device_id: Optional[str] = None,
+        before: Optional[Tuple[datetime, int]] = None
+    ) -> List[Dict[str, Any]]:
+        """Newest-first page of readings strictly older than the ``before`` (timestamp, id) key.
+
+        Rows are plain dicts of ``READING_COLUMNS`` built from column tuples,
+        skipping ORM identity-map and model construction.
+        """
+        query = self.select_columns(READING_COLUMNS).order_by(desc(SensorData.timestamp), desc(SensorData.id))
+        
+        if device_id is not None:
+            query = query.where(SensorData.device_id == device_id)
+        if start_time:
+            query = query.where(SensorData.timestamp >= timestamp_bound(start_time))
+        if end_time:
+            query = query.where(SensorData.timestamp <= timestamp_bound(end_time, end_inclusive=True))
+        if before is not None:
+            before_timestamp, before_id = before
+            query = query.where(
+                SensorData.timestamp <= timestamp_bound(before_timestamp, end_inclusive=True),
+                or_(
+                    SensorData.timestamp < timestamp_bound(before_timestamp),
+                    SensorData.id < before_id
+                )
+            )
+        
+        return [dict(zip(READING_COLUMNS, row)) for row in db.execute(query.limit(limit))]
+    
+    def get_latest_metrics(self, db: Session, limit: int) -> List[Dict[str, Any]]:
+        """Newest-first timestamp and metrics of the newest ``limit`` readings; a missing pH reads as 7.0.
+
+        Skips the thresholds join that ``get_page_rows`` carries.
+        """
+        query = select(
+            SensorData.timestamp,
+            SensorData.temperature,
+            SensorData.moisture,
+            func.coalesce(SensorData.ph, 7.0)
+        ).order_by(desc(SensorData.timestamp), desc(SensorData.id)).limit(limit)
+        columns = ("timestamp",) + METRIC_COLUMNS
+        return [dict(zip(columns, row)) for row in db.execute(query)]
+    
+    def get_rows_after(
+        self,
+        db: Session,
+        after_id: Optional[int] = None,
+        after_time: Optional[datetime] = None,
+        device_id: Optional[str] = None,
+        limit: int = 500
+    ) -> List[Dict[str, Any]]:
+        """Oldest-first readings with an id above ``after_id`` or taken after ``after_time``.
+
+        With neither, the newest ``limit`` readings (still oldest first), so a
+        client can seed a buffer and then follow it by id.
+
+        Following by id assumes ids become visible in order, which holds on
+        SQLite's single writer. On PostgreSQL a reading whose id was assigned
+        before ``after_id`` but committed after it is never returned.
+        """
+        if after_id is None and after_time is None:
+            return list(reversed(self.get_page_rows(db, limit=limit, device_id=device_id)))
+        
+        query = self.select_columns(READING_COLUMNS)
+        if device_id is not None:
+            query = query.where(SensorData.device_id == device_id)
+        if after_id is not None:
+            query = query.where(SensorData.id > after_id).order_by(SensorData.id)
+        if after_time is not None:
+            query = query.where(SensorData.timestamp > timestamp_bound(after_time, end_inclusive=True))
+            if after_id is None:
+                query = query.order_by(SensorData.timestamp, SensorData.id)
+        
+        return [dict(zip(READING_COLUMNS, row)) for row in db.execute(query.limit(limit))]
+    
+    def iter_chunks(
+        self,
+        db: Session,
+        columns: Sequence[str],
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None,
+        device_id: Optional[str] = None,
+        chunk_size: int = 5000
+    ) -> Iterator[Sequence[Tuple[Any, ...]]]:
+        """Oldest-first column tuples in chunks, read through a server-side cursor."""
+        query = self.select_columns(columns).order_by(SensorData.timestamp, SensorData.id)
+        
+        if device_id is not None:
+            query = query.where(SensorData.device_id == device_id)
+        if start_time:
+            query = query.where(SensorData.timestamp >= timestamp_bound(start_time))
+        if end_time:
+            query = query.where(SensorData.timestamp <= timestamp_bound(end_time, end_inclusive=True))
+        
+        result = db.execute(query.execution_options(stream_results=True, yield_per=chunk_size))
+        for partition in result.partitions():
+            yield [tuple(row) for row in partition]
+    
+    def delete_older_than(self, db: Session, cutoff: datetime, limit: int = 500, commit: bool = False) -> int:
+        """Delete up to ``limit`` of the oldest readings taken before ``cutoff``.
+
+        Reading counters are decremented; rollups keep the deleted readings.
+        """
+        rows = db.execute(
+            select(SensorData.id, SensorData.device_id, SensorData.timestamp)
+            .where(SensorData.timestamp < timestamp_bound(cutoff))
+            .order_by(SensorData.timestamp, SensorData.id)
+            .limit(limit)
+        ).mappings().all()
+        if rows:
+            db.execute(delete(SensorData).where(SensorData.id.in_([row["id"] for row in rows])))
+            reading_counter_crud.record(db, rows, sign=-1)
+            resource_version_crud.bump(db, "readings")
+        if commit:
+            db.commit()
+        return len(rows)
+    
     def get_statistics(
         self,
         db: Session,
         start_time: datetime,
-        end_time: datetime
+        end_time: datetime,
+        device_id: Optional[str] = None
     ) -> Dict[str, Any]:
-        result = db.execute(
-            select(
-                func.count(SensorData.id).label("count"),
-                func.avg(SensorData.temperature).label("avg_temperature"),
-                func.min(SensorData.temperature).label("min_temperature"),
-                func.max(SensorData.temperature).label("max_temperature"),
-                func.avg(SensorData.moisture).label("avg_moisture"),
-                func.min(SensorData.moisture).label("min_moisture"),
-                func.max(SensorData.moisture).label("max_moisture"),
-                func.avg(SensorData.ph).label("avg_ph"),
-                func.min(SensorData.ph).label("min_ph"),
-                func.max(SensorData.ph).label("max_ph")
-            ).where(
-                and_(
-                    SensorData.timestamp >= start_time,
-                    SensorData.timestamp <= end_time
-                )
-            )
+        stats = sensor_rollup_crud.summarize(
+            sensor_rollup_crud.get_statistics(db, start_time, end_time, device_id=device_id)
         )
-        
-        stats = result.first()
+        temperature, moisture, ph = stats["temperature"], stats["moisture"], stats["ph"]
         
         return {
-            "count": stats.count if stats.count else 0,
+            "count": stats["count"],
             "temperature": {
-                "average": round(float(stats.avg_temperature or 0), 2),
-                "min": round(float(stats.min_temperature or 0), 2),
-                "max": round(float(stats.max_temperature or 0), 2)
+                "average": round(float(temperature["average"] or 0), 2),
+                "min": round(float(temperature["min"] or 0), 2),
+                "max": round(float(temperature["max"] or 0), 2),
+                "stddev": round(float(temperature["stddev"] or 0), 2)
             },
             "moisture": {
-                "average": int(stats.avg_moisture or 0),
-                "min": int(stats.min_moisture or 0),
-                "max": int(stats.max_moisture or 0)
+                "average": int(moisture["average"] or 0),
+                "min": int(moisture["min"] or 0),
+                "max": int(moisture["max"] or 0),
+                "stddev": round(float(moisture["stddev"] or 0), 2)
             },
             "ph": {
-                "average": round(float(stats.avg_ph or 0), 2),
-                "min": round(float(stats.min_ph or 0), 2),
-                "max": round(float(stats.max_ph or 0), 2)
+                "average": round(float(ph["average"] or 0), 2),
+                "min": round(float(ph["min"] or 0), 2),
+                "max": round(float(ph["max"] or 0), 2),
+                "stddev": round(float(ph["stddev"] or 0), 2)
             }
         }
     
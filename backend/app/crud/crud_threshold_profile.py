@@ -0,0 +1,100 @@
+from typing import List, Optional, Dict, Any, Tuple
+import threading
+from sqlalchemy import event, select, desc, and_
+from sqlalchemy.orm import Session
+
+from app.models.threshold_profile import THRESHOLD_FIELDS, ThresholdProfile
+
+PENDING_KEY = "threshold_profiles_pending"
+
+ProfileKey = Tuple[float, float, int, int, float, float]
+
+
+def profile_key(values: Dict[str, Any]) -> ProfileKey:
+    return (
+        float(values["temp_min"]),
+        float(values["temp_max"]),
+        int(values["moisture_min"]),
+        int(values["moisture_max"]),
+        float(values["ph_min"]),
+        float(values["ph_max"]),
+    )
+
+
+class CRUDThresholdProfile:
+    """Threshold profiles are immutable, so value -> id lookups are cached per process.
+
+    Ids of profiles inserted by a session are only cached once that session
+    commits, so a rolled-back insert never leaks a dangling id.
+    """
+
+    def __init__(self) -> None:
+        self._ids: Dict[ProfileKey, int] = {}
+        self._lock = threading.Lock()
+
+    def _remember(self, entries: Dict[ProfileKey, int]) -> None:
+        with self._lock:
+            for key, profile_id in entries.items():
+                if profile_id > self._ids.get(key, 0):
+                    self._ids[key] = profile_id
+
+    def _pending(self, db: Session) -> Dict[ProfileKey, int]:
+        return db.info.setdefault(PENDING_KEY, {})
+
+    def resolve_id(self, db: Session, values: Dict[str, Any]) -> int:
+        key = profile_key(values)
+        with self._lock:
+            cached = self._ids.get(key)
+        if cached is not None:
+            return cached
+        pending = self._pending(db)
+        if key in pending:
+            return pending[key]
+
+        existing = db.execute(
+            select(ThresholdProfile.id).where(
+                and_(*(getattr(ThresholdProfile, name) == value for name, value in zip(THRESHOLD_FIELDS, key)))
+            ).order_by(desc(ThresholdProfile.id)).limit(1)
+        ).scalar_one_or_none()
+        if existing is not None:
+            self._remember({key: existing})
+            return existing
+
+        return self.create_version(db, values).id
+
+    def create_version(self, db: Session, values: Dict[str, Any]) -> ThresholdProfile:
+        key = profile_key(values)
+        profile = ThresholdProfile(**dict(zip(THRESHOLD_FIELDS, key)))
+        db.add(profile)
+        db.flush()
+        self._pending(db)[key] = profile.id
+        return profile
+
+    def get_latest(self, db: Session) -> Optional[ThresholdProfile]:
+        return db.execute(
+            select(ThresholdProfile).order_by(desc(ThresholdProfile.id)).limit(1)
+        ).scalar_one_or_none()
+
+    def get_multi(self, db: Session, limit: int = 50) -> List[ThresholdProfile]:
+        return db.execute(
+            select(ThresholdProfile).order_by(desc(ThresholdProfile.id)).limit(limit)
+        ).scalars().all()
+
+    def clear_cache(self) -> None:
+        with self._lock:
+            self._ids.clear()
+
+
+threshold_profile_crud = CRUDThresholdProfile()
+
+
+@event.listens_for(Session, "after_commit")
+def _cache_committed_profiles(session: Session) -> None:
+    pending = session.info.pop(PENDING_KEY, None)
+    if pending:
+        threshold_profile_crud._remember(pending)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _drop_rolled_back_profiles(session: Session, previous_transaction: Any) -> None:
+    session.info.pop(PENDING_KEY, None)
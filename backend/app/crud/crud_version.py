@@ -0,0 +1,49 @@
+from typing import Dict, Iterable, Tuple
+from datetime import datetime
+from sqlalchemy.orm import Session
+from sqlalchemy import select
+
+from app.models.resource_version import ResourceVersion
+
+
+class CRUDResourceVersion:
+    def bump(self, db: Session, *names: str) -> None:
+        """Advance each resource's version within the caller's transaction."""
+        if not names:
+            return
+        now = datetime.utcnow()
+        values = [{"name": name, "version": 1, "updated_at": now} for name in dict.fromkeys(names)]
+
+        dialect = db.get_bind().dialect.name
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert
+        elif dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            for value in values:
+                row = db.get(ResourceVersion, value["name"])
+                if row is None:
+                    db.add(ResourceVersion(**value))
+                else:
+                    row.version += 1
+                    row.updated_at = now
+            db.flush()
+            return
+
+        stmt = insert(ResourceVersion).values(values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[ResourceVersion.name],
+            set_={"version": ResourceVersion.version + 1, "updated_at": stmt.excluded.updated_at}
+        )
+        db.execute(stmt)
+
+    def get_many(self, db: Session, names: Iterable[str]) -> Dict[str, Tuple[int, datetime]]:
+        """``{name: (version, updated_at)}``; resources never written are missing."""
+        rows = db.execute(
+            select(ResourceVersion.name, ResourceVersion.version, ResourceVersion.updated_at)
+            .where(ResourceVersion.name.in_(list(names)))
+        ).all()
+        return {name: (version, updated_at) for name, version, updated_at in rows}
+
+
+resource_version_crud = CRUDResourceVersion()
@@ -1,11 +1,37 @@
 import logging
 
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Response
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.api import router
-from app.core import Base, engine, settings
-from app.models import ActuatorLog, Alert, ControlState, RuntimeMode, SensorData, SystemSettings  # noqa: F401
+from app.api.routes import save_polled_readings
+from app.core import settings
+from app.core.database import SessionLocal, unit_of_work
+from app.core.metrics import CONTENT_TYPE, MetricsMiddleware, metrics
+from app.core.migrations import upgrade_database
+from app.crud import reading_counter_crud, sensor_rollup_crud
+from app.models import (  # noqa: F401
+    ActuatorLog,
+    Alert,
+    ControlState,
+    ReadingCounter,
+    ResourceVersion,
+    RuntimeMode,
+    SensorData,
+    SensorRollup,
+    SystemSettings,
+    ThresholdProfile,
+)
+from app.services import (
+    alert_tracker,
+    configured_fleet_devices,
+    esp32_client,
+    event_hub,
+    fleet_poller,
+    ingest_queue,
+    reading_buffer,
+    retention_engine,
+)
 
 logging.basicConfig(level=getattr(logging, settings.log_level.upper(), logging.INFO))
 
@@ -23,14 +49,58 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+if settings.metrics_enabled:
+    # Added last so it wraps CORS too and times the whole request.
+    app.add_middleware(MetricsMiddleware)
+
 app.include_router(router, prefix="/api")
 
 
 @app.on_event("startup")
 def on_startup() -> None:
-    Base.metadata.create_all(bind=engine)
+    upgrade_database()
+    with SessionLocal() as db, unit_of_work(db):
+        reading_counter_crud.ensure_initialized(db)
+        sensor_rollup_crud.ensure_initialized(db)
+        reading_buffer.warm(db)
+        alert_tracker.warm(db)
+    if settings.ingest_write_behind:
+        ingest_queue.start()
+    if settings.retention_enabled:
+        retention_engine.start()
+
+
+@app.on_event("startup")
+async def start_fleet_poller() -> None:
+    if not settings.fleet_polling_enabled:
+        return
+    for device in configured_fleet_devices():
+        fleet_poller.register(device)
+    fleet_poller.start(save_polled_readings)
+
+
+@app.on_event("shutdown")
+async def stop_device_io() -> None:
+    await fleet_poller.stop()
+    await esp32_client.aclose()
+
+
+@app.on_event("shutdown")
+def on_shutdown() -> None:
+    event_hub.close()
+    ingest_queue.stop()
+    retention_engine.stop()
+    with SessionLocal() as db, unit_of_work(db):
+        alert_tracker.flush(db)
 
 
 @app.get("/")
 def root() -> dict[str, str]:
     return {"message": "Mushroom backend is running", "docs": "/docs"}
+
+
+@app.get("/metrics", include_in_schema=False)
+def get_metrics() -> Response:
+    if not metrics.enabled:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    return Response(metrics.render(), media_type=CONTENT_TYPE)
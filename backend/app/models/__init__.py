@@ -4,5 +4,9 @@ from app.models.alert import Alert
 from app.models.system_settings import SystemSettings
 from app.models.control_state import ControlState
 from app.models.runtime_mode import RuntimeMode
+from app.models.reading_counter import ReadingCounter
+from app.models.sensor_rollup import SensorRollup
+from app.models.threshold_profile import ThresholdProfile
+from app.models.resource_version import ResourceVersion
 
-__all__ = ["SensorData", "ActuatorLog", "Alert", "SystemSettings", "ControlState", "RuntimeMode"]
+__all__ = ["SensorData", "ActuatorLog", "Alert", "SystemSettings", "ControlState", "RuntimeMode", "ReadingCounter", "SensorRollup", "ThresholdProfile", "ResourceVersion"]
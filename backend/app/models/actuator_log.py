@@ -1,9 +1,13 @@
-from sqlalchemy import Column, Integer, String, DateTime, Float
+from sqlalchemy import Column, Integer, String, DateTime, Float, Index
 from sqlalchemy.sql import func
 from app.core.database import Base
 
 class ActuatorLog(Base):
     __tablename__ = "actuator_logs"
+    __table_args__ = (
+        # Backs per-actuator history, newest first.
+        Index("ix_actuator_logs_actuator_type_timestamp", "actuator_type", "timestamp"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     timestamp = Column(DateTime(timezone=True), server_default=func.now(), index=True)
@@ -1,9 +1,27 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, Float
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, Float, Index, text
 from sqlalchemy.sql import func
 from app.core.database import Base
 
 class Alert(Base):
     __tablename__ = "alerts"
+    __table_args__ = (
+        # Only open alerts are indexed; the dashboard lists them newest first on every refresh.
+        Index(
+            "ix_alerts_unresolved_timestamp",
+            "timestamp",
+            sqlite_where=text("resolved = 0"),
+            postgresql_where=text("NOT resolved"),
+        ),
+        # One open alert per (device, parameter), whichever API worker opens it.
+        Index(
+            "uq_alerts_open_device_parameter",
+            func.coalesce(text("device_id"), text("''")),
+            "parameter",
+            unique=True,
+            sqlite_where=text("resolved = 0"),
+            postgresql_where=text("NOT resolved"),
+        ),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     timestamp = Column(DateTime(timezone=True), server_default=func.now(), index=True)
@@ -14,6 +32,10 @@ class Alert(Base):
     current_value = Column(Float, nullable=True)
     resolved = Column(Boolean, default=False)
     resolved_at = Column(DateTime(timezone=True), nullable=True)
+    device_id = Column(String, nullable=True)
+    peak_value = Column(Float, nullable=True)  # furthest out of band while open
+    occurrences = Column(Integer, nullable=False, default=1, server_default="1")  # out-of-band readings
+    last_seen_at = Column(DateTime(timezone=True), nullable=True)
     
     def __repr__(self):
         return f"<Alert(severity={self.severity}, parameter={self.parameter})>"
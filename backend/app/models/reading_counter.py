@@ -0,0 +1,14 @@
+from sqlalchemy import Column, Integer, String
+
+from app.core.database import Base
+
+
+class ReadingCounter(Base):
+    __tablename__ = "reading_counters"
+
+    scope = Column(String, primary_key=True)  # total, device, day
+    key = Column(String, primary_key=True)
+    count = Column(Integer, default=0, nullable=False)
+
+    def __repr__(self) -> str:
+        return f"<ReadingCounter(scope={self.scope}, key={self.key}, count={self.count})>"
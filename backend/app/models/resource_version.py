@@ -0,0 +1,14 @@
+from sqlalchemy import Column, DateTime, Integer, String
+
+from app.core.database import Base
+
+
+class ResourceVersion(Base):
+    __tablename__ = "resource_versions"
+
+    name = Column(String, primary_key=True)  # readings, alerts
+    version = Column(Integer, default=0, nullable=False)
+    updated_at = Column(DateTime, nullable=False)
+
+    def __repr__(self) -> str:
+        return f"<ResourceVersion(name={self.name}, version={self.version}, updated_at={self.updated_at})>"
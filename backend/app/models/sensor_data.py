@@ -1,23 +1,38 @@
-from sqlalchemy import Column, Integer, Float, DateTime, String
+from sqlalchemy import Column, Integer, Float, DateTime, String, Index, ForeignKey
+from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.core.database import Base
+from app.models.threshold_profile import ThresholdProfile
+
+def _threshold(name: str) -> property:
+    def getter(self):
+        profile = self.threshold_profile
+        return getattr(profile, name) if profile is not None else None
+    return property(getter)
 
 class SensorData(Base):
     __tablename__ = "sensor_data"
+    __table_args__ = (
+        # Backs keyset pagination of a single device's history, newest first.
+        Index("ix_sensor_data_device_id_timestamp_id", "device_id", "timestamp", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     timestamp = Column(DateTime(timezone=True), server_default=func.now(), index=True)
     temperature = Column(Float, nullable=False)
     moisture = Column(Integer, nullable=False)
     ph = Column(Float, nullable=True)
-    temp_min = Column(Float, default=22.0)
-    temp_max = Column(Float, default=26.0)
-    moisture_min = Column(Integer, default=60)
-    moisture_max = Column(Integer, default=70)
-    ph_min = Column(Float, default=6.5)
-    ph_max = Column(Float, default=7.0)
+    threshold_profile_id = Column(Integer, ForeignKey("threshold_profiles.id"), nullable=True)
     device_id = Column(String, nullable=True)
     location = Column(String, nullable=True)
     
+    threshold_profile = relationship(ThresholdProfile, lazy="joined")
+    temp_min = _threshold("temp_min")
+    temp_max = _threshold("temp_max")
+    moisture_min = _threshold("moisture_min")
+    moisture_max = _threshold("moisture_max")
+    ph_min = _threshold("ph_min")
+    ph_max = _threshold("ph_max")
+    
     def __repr__(self):
         return f"<SensorData(id={self.id}, temp={self.temperature}, moisture={self.moisture})>"
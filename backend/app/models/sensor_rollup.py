@@ -0,0 +1,31 @@
+from sqlalchemy import Column, DateTime, Float, Integer, String
+
+from app.core.database import Base
+
+
+class SensorRollup(Base):
+    __tablename__ = "sensor_rollups"
+
+    granularity = Column(String, primary_key=True)  # minute, hour, day
+    bucket_start = Column(DateTime, primary_key=True)
+    device_id = Column(String, primary_key=True, default="")  # "" for readings without a device
+    count = Column(Integer, nullable=False, default=0)
+    temperature_sum = Column(Float, nullable=False, default=0.0)
+    temperature_sumsq = Column(Float, nullable=False, default=0.0)
+    temperature_min = Column(Float, nullable=True)
+    temperature_max = Column(Float, nullable=True)
+    moisture_sum = Column(Float, nullable=False, default=0.0)
+    moisture_sumsq = Column(Float, nullable=False, default=0.0)
+    moisture_min = Column(Float, nullable=True)
+    moisture_max = Column(Float, nullable=True)
+    ph_count = Column(Integer, nullable=False, default=0)
+    ph_sum = Column(Float, nullable=False, default=0.0)
+    ph_sumsq = Column(Float, nullable=False, default=0.0)
+    ph_min = Column(Float, nullable=True)
+    ph_max = Column(Float, nullable=True)
+
+    def __repr__(self) -> str:
+        return (
+            f"<SensorRollup(granularity={self.granularity}, bucket_start={self.bucket_start}, "
+            f"device_id={self.device_id}, count={self.count})>"
+        )
@@ -0,0 +1,37 @@
+from sqlalchemy import Column, DateTime, Float, Integer
+from sqlalchemy.sql import func
+
+from app.core.database import Base
+
+THRESHOLD_FIELDS = ("temp_min", "temp_max", "moisture_min", "moisture_max", "ph_min", "ph_max")
+
+# Applied to readings written without explicit thresholds.
+THRESHOLD_DEFAULTS = {
+    "temp_min": 22.0,
+    "temp_max": 26.0,
+    "moisture_min": 60,
+    "moisture_max": 70,
+    "ph_min": 6.5,
+    "ph_max": 7.0,
+}
+
+
+class ThresholdProfile(Base):
+    """Immutable set of target ranges; readings reference the one in force when they were taken."""
+
+    __tablename__ = "threshold_profiles"
+
+    id = Column(Integer, primary_key=True, index=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    temp_min = Column(Float, nullable=False)
+    temp_max = Column(Float, nullable=False)
+    moisture_min = Column(Integer, nullable=False)
+    moisture_max = Column(Integer, nullable=False)
+    ph_min = Column(Float, nullable=False)
+    ph_max = Column(Float, nullable=False)
+
+    def __repr__(self) -> str:
+        return (
+            f"<ThresholdProfile(id={self.id}, temp={self.temp_min}-{self.temp_max}, "
+            f"moisture={self.moisture_min}-{self.moisture_max}, ph={self.ph_min}-{self.ph_max})>"
+        )
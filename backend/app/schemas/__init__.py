@@ -1,12 +1,22 @@
 from app.schemas.alert import AlertListResponse, AlertOut
 from app.schemas.control import ControlCommand, ControlResponse
-from app.schemas.sensor import SensorHistoryResponse, SensorIn, SensorOut
+from app.schemas.fleet import FleetDeviceIn
+from app.schemas.sensor import (
+    SensorBatchItemResult,
+    SensorBatchResponse,
+    SensorHistoryResponse,
+    SensorIn,
+    SensorOut,
+)
 
 __all__ = [
     "AlertListResponse",
     "AlertOut",
     "ControlCommand",
     "ControlResponse",
+    "FleetDeviceIn",
+    "SensorBatchItemResult",
+    "SensorBatchResponse",
     "SensorHistoryResponse",
     "SensorIn",
     "SensorOut",
@@ -15,6 +15,10 @@ class AlertOut(BaseModel):
     current_value: float | None
     resolved: bool
     resolved_at: datetime | None
+    device_id: str | None = None
+    peak_value: float | None = None
+    occurrences: int = 1
+    last_seen_at: datetime | None = None
 
 
 class AlertListResponse(BaseModel):
@@ -0,0 +1,9 @@
+from pydantic import BaseModel, Field
+
+
+class FleetDeviceIn(BaseModel):
+    device_id: str = Field(..., min_length=1)
+    base_url: str = Field(..., min_length=1, description="Device HTTP base URL, e.g. http://192.168.1.101")
+    location: str | None = None
+    poll_interval: float = Field(default=30.0, ge=1.0, description="Seconds between polls")
+    timeout: float = Field(default=5.0, gt=0.0, description="Per-poll timeout in seconds")
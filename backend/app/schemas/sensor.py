@@ -43,3 +43,16 @@ class SensorOut(BaseModel):
 class SensorHistoryResponse(BaseModel):
     items: list[SensorOut]
     count: int
+    next_cursor: str | None = None
+
+
+class SensorBatchItemResult(BaseModel):
+    index: int
+    id: int | None = None
+    error: str | None = None
+
+
+class SensorBatchResponse(BaseModel):
+    items: list[SensorBatchItemResult]
+    created: int
+    failed: int
@@ -1,4 +1,53 @@
-from app.services.alert_engine import build_threshold_alerts
+from app.services.alert_engine import (
+    AlertTracker,
+    ParameterViolations,
+    alert_tracker,
+    build_threshold_alerts,
+    evaluate_rows,
+    evaluate_thresholds,
+    scan_violations,
+)
+from app.services.config_cache import config_cache
+from app.services.downsampling import downsample_history, lttb, min_max
 from app.services.esp32_client import esp32_client
+from app.services.event_stream import EVENT_TYPES, StreamEvent, event_hub
+from app.services.exporter import EXPORT_FORMATS, ExportFormatUnavailable, export_format, stream_sensor_export
+from app.services.fleet_poller import FleetDevice, configured_fleet_devices, fleet_poller
+from app.services.ingest_queue import IngestQueueFull, ingest_queue
+from app.services.query_plans import HOT_QUERIES, QueryPlan, explain_hot_queries
+from app.services.reading_buffer import reading_buffer
+from app.services.retention import RetentionReport, configured_policies, retention_engine
 
-__all__ = ["build_threshold_alerts", "esp32_client"]
+__all__ = [
+    "AlertTracker",
+    "alert_tracker",
+    "ParameterViolations",
+    "build_threshold_alerts",
+    "evaluate_rows",
+    "evaluate_thresholds",
+    "scan_violations",
+    "config_cache",
+    "downsample_history",
+    "lttb",
+    "min_max",
+    "esp32_client",
+    "EVENT_TYPES",
+    "StreamEvent",
+    "event_hub",
+    "EXPORT_FORMATS",
+    "ExportFormatUnavailable",
+    "export_format",
+    "stream_sensor_export",
+    "FleetDevice",
+    "configured_fleet_devices",
+    "fleet_poller",
+    "IngestQueueFull",
+    "ingest_queue",
+    "HOT_QUERIES",
+    "QueryPlan",
+    "explain_hot_queries",
+    "reading_buffer",
+    "RetentionReport",
+    "configured_policies",
+    "retention_engine",
+]
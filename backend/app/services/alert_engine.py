@@ -1,5 +1,30 @@
+import threading
+import time
+from collections.abc import Mapping, Sequence
+from dataclasses import dataclass
+from datetime import datetime
 from typing import Any
 
+import numpy as np
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.crud import alert_crud, sensor_crud
+from app.models.threshold_profile import THRESHOLD_DEFAULTS
+from app.services.event_stream import event_hub
+
+PENDING_KEY = "alert_tracker_pending"
+
+THRESHOLD_BOUNDS = {
+    "temperature": ("temp_min", "temp_max"),
+    "moisture": ("moisture_min", "moisture_max"),
+    "ph": ("ph_min", "ph_max"),
+}
+
+AlertKey = tuple[str | None, str]
+ArrayLike = float | Sequence[float] | np.ndarray
+
 
 def _threshold_message(parameter: str, value: float, min_value: float, max_value: float) -> tuple[str, float]:
     if value < min_value:
@@ -7,42 +32,470 @@ def _threshold_message(parameter: str, value: float, min_value: float, max_value
     return f"{parameter} above threshold ({value:.2f} > {max_value:.2f})", max_value
 
 
-def build_threshold_alerts(payload: dict[str, Any]) -> list[dict[str, Any]]:
-    thresholds = payload.get("thresholds", {})
+def _excess(value: float, min_value: float, max_value: float) -> float:
+    """How far ``value`` lies outside ``[min_value, max_value]``; zero or less when inside."""
+    return max(min_value - value, value - max_value)
+
+
+@dataclass(frozen=True)
+class ParameterViolations:
+    """Threshold check of one parameter over a batch; thresholds are broadcast to the values' shape."""
+
+    parameter: str
+    values: np.ndarray
+    min_values: np.ndarray
+    max_values: np.ndarray
+    direction: np.ndarray  # -1 below the band, 1 above it, 0 inside (or missing)
+
+    @property
+    def mask(self) -> np.ndarray:
+        return self.direction != 0
+
+    @property
+    def threshold_values(self) -> np.ndarray:
+        return np.where(self.direction < 0, self.min_values, self.max_values)
+
+    @property
+    def excess(self) -> np.ndarray:
+        """How far each value lies outside its band; zero or less when inside."""
+        return np.maximum(self.min_values - self.values, self.values - self.max_values)
+
+    def inside(self, margin: float = 0.0) -> np.ndarray:
+        """Values inside the band narrowed by ``margin`` on both sides, capped at half its width."""
+        margin = np.minimum(margin, (self.max_values - self.min_values) / 2)
+        return (self.values >= self.min_values + margin) & (self.values <= self.max_values - margin)
+
+    def messages(self) -> list[str | None]:
+        messages: list[str | None] = [None] * len(self.values)
+        for index in np.flatnonzero(self.mask).tolist():
+            messages[index] = _threshold_message(
+                self.parameter, self.values[index], self.min_values[index], self.max_values[index]
+            )[0]
+        return messages
+
 
-    temp = float(payload["temperature"])
-    moisture = float(payload["moisture"])
-    ph_value = float(payload.get("ph", 7.0))
+def evaluate_thresholds(
+    temperature: ArrayLike,
+    moisture: ArrayLike,
+    ph: ArrayLike,
+    thresholds: Mapping[str, ArrayLike] | None = None,
+) -> dict[str, ParameterViolations]:
+    """Check whole columns of readings against scalar or per-row thresholds in one pass.
 
-    temp_min = float(thresholds.get("temp_min", 22.0))
-    temp_max = float(thresholds.get("temp_max", 26.0))
-    moisture_min = float(thresholds.get("moisture_min", 60.0))
-    moisture_max = float(thresholds.get("moisture_max", 70.0))
-    ph_min = float(thresholds.get("ph_min", 6.5))
-    ph_max = float(thresholds.get("ph_max", 7.0))
+    Missing thresholds fall back to the model defaults. NaN values (a reading
+    without pH, say) never violate.
+    """
+    inputs = {
+        "temperature": temperature,
+        "moisture": moisture,
+        "ph": ph,
+        **THRESHOLD_DEFAULTS,
+        **(thresholds or {}),
+    }
+    arrays = (np.atleast_1d(np.asarray(value, dtype=np.float64)) for value in inputs.values())
+    columns = dict(zip(inputs, np.broadcast_arrays(*arrays)))
+    evaluation = {}
+    for parameter, (low, high) in THRESHOLD_BOUNDS.items():
+        values, min_values, max_values = columns[parameter], columns[low], columns[high]
+        direction = (values > max_values).astype(np.int8) - (values < min_values).astype(np.int8)
+        evaluation[parameter] = ParameterViolations(parameter, values, min_values, max_values, direction)
+    return evaluation
 
-    alerts: list[dict[str, Any]] = []
 
-    checks = [
-        ("temperature", temp, temp_min, temp_max),
-        ("moisture", moisture, moisture_min, moisture_max),
-        ("ph", ph_value, ph_min, ph_max),
+def _column(rows: Sequence[Mapping[str, Any]], name: str) -> np.ndarray:
+    return np.fromiter(
+        (np.nan if row.get(name) is None else row[name] for row in rows), dtype=np.float64, count=len(rows)
+    )
+
+
+def evaluate_rows(
+    rows: Sequence[Mapping[str, Any]], thresholds: Mapping[str, ArrayLike] | None = None
+) -> dict[str, ParameterViolations]:
+    """``evaluate_thresholds`` over reading dicts, against their own thresholds unless others are given."""
+    if thresholds is None:
+        thresholds = {name: _column(rows, name) for name in THRESHOLD_DEFAULTS}
+    return evaluate_thresholds(_column(rows, "temperature"), _column(rows, "moisture"), _column(rows, "ph"), thresholds)
+
+
+def build_threshold_alerts(payload: dict[str, Any]) -> list[dict[str, Any]]:
+    evaluation = evaluate_thresholds(
+        [float(payload["temperature"])],
+        [float(payload["moisture"])],
+        [float(payload.get("ph", 7.0))],
+        {name: [float(value)] for name, value in payload.get("thresholds", {}).items() if name in THRESHOLD_DEFAULTS},
+    )
+    return [
+        {
+            "severity": "critical",
+            "parameter": parameter,
+            "message": violations.messages()[0],
+            "threshold_value": float(violations.threshold_values[0]),
+            "current_value": float(violations.values[0]),
+            "resolved": False,
+        }
+        for parameter, violations in evaluation.items()
+        if violations.mask[0]
     ]
 
-    for parameter, value, min_value, max_value in checks:
-        if min_value <= value <= max_value:
-            continue
 
-        message, threshold_value = _threshold_message(parameter, value, min_value, max_value)
-        alerts.append(
-            {
-                "severity": "critical",
-                "parameter": parameter,
-                "message": message,
-                "threshold_value": threshold_value,
-                "current_value": value,
-                "resolved": False,
-            }
+def scan_violations(
+    db: Session,
+    start_time: datetime | None = None,
+    end_time: datetime | None = None,
+    device_id: str | None = None,
+    thresholds: Mapping[str, float] | None = None,
+    chunk_size: int = 5000,
+) -> dict[str, Any]:
+    """Re-check stored readings chunk by chunk against ``thresholds``, or against their own when ``None``."""
+    columns = ("timestamp", "temperature", "moisture", "ph", *THRESHOLD_DEFAULTS)
+    summary = {
+        parameter: {"below": 0, "above": 0, "first_at": None, "last_at": None, "peak_value": None, "_peak": 0.0}
+        for parameter in THRESHOLD_BOUNDS
+    }
+    readings = 0
+    flagged = 0
+    for chunk in sensor_crud.iter_chunks(db, columns, start_time, end_time, device_id, chunk_size=chunk_size):
+        rows = [dict(zip(columns, row)) for row in chunk]
+        evaluation = evaluate_rows(rows, thresholds)
+        readings += len(rows)
+        flagged += int(np.logical_or.reduce([violations.mask for violations in evaluation.values()]).sum())
+        for parameter, violations in evaluation.items():
+            indexes = np.flatnonzero(violations.mask)
+            if not len(indexes):
+                continue
+            entry = summary[parameter]
+            entry["below"] += int((violations.direction < 0).sum())
+            entry["above"] += int((violations.direction > 0).sum())
+            entry["first_at"] = entry["first_at"] or rows[indexes[0]]["timestamp"]
+            entry["last_at"] = rows[indexes[-1]]["timestamp"]
+            worst = int(indexes[np.argmax(violations.excess[indexes])])
+            if violations.excess[worst] > entry["_peak"]:
+                entry["_peak"] = float(violations.excess[worst])
+                entry["peak_value"] = float(violations.values[worst])
+    for entry in summary.values():
+        del entry["_peak"]
+    return {"readings": readings, "readings_out_of_band": flagged, "parameters": summary}
+
+
+@dataclass
+class AlertState:
+    device_id: str | None
+    parameter: str
+    opened_at: datetime
+    message: str
+    threshold_value: float | None
+    current_value: float
+    peak_value: float
+    occurrences: int = 1
+    last_seen_at: datetime | None = None
+    alert_id: int | None = None
+    recovering_since: datetime | None = None
+    dirty: bool = False
+    written_at: float = 0.0
+
+    @classmethod
+    def from_row(cls, row: dict[str, Any]) -> "AlertState":
+        value = row["current_value"] if row["current_value"] is not None else 0.0
+        return cls(
+            device_id=row["device_id"],
+            parameter=row["parameter"],
+            opened_at=row["timestamp"],
+            message=row["message"],
+            threshold_value=row["threshold_value"],
+            current_value=value,
+            peak_value=row["peak_value"] if row["peak_value"] is not None else value,
+            occurrences=row["occurrences"] or 1,
+            last_seen_at=row["last_seen_at"],
+            alert_id=row["id"],
+            written_at=time.monotonic(),
         )
 
-    return alerts
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "id": self.alert_id,
+            "message": self.message,
+            "threshold_value": self.threshold_value,
+            "current_value": self.current_value,
+            "peak_value": self.peak_value,
+            "occurrences": self.occurrences,
+            "last_seen_at": self.last_seen_at,
+        }
+
+
+class AlertTracker:
+    """Keeps one open alert per (device, parameter) in memory and writes only state changes.
+
+    The first out-of-band reading opens an alert. Later readings update its
+    ``current_value``, ``peak_value`` and ``occurrences`` in memory, and the
+    row is rewritten at most once per ``update_interval``. The alert resolves
+    once readings have stayed inside the band, narrowed on both sides by the
+    parameter's hysteresis, for ``min_resolve_seconds`` of reading time.
+
+    Memory is updated before the caller commits. If the session rolls back,
+    the keys it touched are dropped and reloaded from the database on their
+    next reading.
+
+    Each API worker has its own tracker. A unique index lets only one open
+    alert exist per key, so a worker that loses the race to open one loads
+    the winner's instead, and an alert found resolved when its row is next
+    written (by hand or by another worker) is dropped from memory.
+    """
+
+    def __init__(self, hysteresis: dict[str, float], min_resolve_seconds: float, update_interval_seconds: float) -> None:
+        self.hysteresis = {parameter: max(margin, 0.0) for parameter, margin in hysteresis.items()}
+        self.min_resolve_seconds = max(min_resolve_seconds, 0.0)
+        self.update_interval = max(update_interval_seconds, 0.0)
+
+        self._states: dict[AlertKey, AlertState] = {}
+        self._stale: set[AlertKey] = set()
+        self._loaded = False
+        self._lock = threading.Lock()
+
+        self._readings = 0
+        self._opened = 0
+        self._resolved = 0
+        self._updates_written = 0
+        self._updates_deferred = 0
+
+    def warm(self, db: Session) -> None:
+        """Load every open alert, resolving duplicates in the caller's transaction."""
+        states = self._newest_open(db, alert_crud.get_open_alert_states(db))
+        with self._lock:
+            self._states = states
+            self._stale.clear()
+            self._loaded = True
+
+    def observe(self, db: Session, readings: list[dict[str, Any]]) -> None:
+        """Evaluate stored readings (with ``timestamp`` and thresholds) and write the resulting alert changes."""
+        if not readings:
+            return
+        if not self._loaded:
+            self.warm(db)
+        self._reload_stale(db)
+
+        opening: dict[int, AlertState] = {}
+        resolving: list[tuple[AlertState, datetime]] = []
+        touched: set[AlertKey] = set()
+        evaluation = evaluate_rows(readings)
+        checks = {
+            parameter: list(zip(
+                violations.values.tolist(),
+                violations.min_values.tolist(),
+                violations.max_values.tolist(),
+                violations.mask.tolist(),
+                violations.inside(self.hysteresis.get(parameter, 0.0)).tolist(),
+            ))
+            for parameter, violations in evaluation.items()
+        }
+        with self._lock:
+            for index, reading in enumerate(readings):
+                at = reading.get("timestamp") or datetime.utcnow()
+                for parameter, checked in checks.items():
+                    key = (reading.get("device_id"), parameter)
+                    touched.add(key)
+                    self._step(key, *checked[index], at, opening, resolving)
+            self._readings += len(readings)
+            opens, updates, resolves = self._collect(touched, opening, resolving)
+
+        db.info.setdefault(PENDING_KEY, {}).setdefault(self, set()).update(touched)
+        ids = alert_crud.open_multi(db, [row for _, row in opens])
+        closed = set(alert_crud.update_open_multi(db, updates))
+        closed.update(alert_crud.update_open_multi(db, resolves))
+        # Another worker already has these keys open: track its alert instead of ours.
+        taken = {(state.device_id, state.parameter) for (state, _), alert_id in zip(opens, ids) if alert_id is None}
+        with self._lock:
+            for (state, _), alert_id in zip(opens, ids):
+                state.alert_id = alert_id
+            self._opened -= len(taken)
+        for (_, row), alert_id in zip(opens, ids):
+            if alert_id is None:
+                continue
+            event_hub.stage(db, "alert", {"action": "opened", **row, "id": alert_id})
+            if row["resolved"]:
+                event_hub.stage(db, "alert", {"action": "resolved", **row, "id": alert_id})
+        for row in resolves:
+            if row["id"] not in closed:
+                event_hub.stage(db, "alert", {"action": "resolved", **row})
+        # Resolved by hand or by another worker since this one loaded them.
+        for alert_id in closed:
+            self.forget(alert_id)
+        if taken:
+            self.invalidate(taken)
+            self._reload_stale(db)
+
+    def flush(self, db: Session) -> None:
+        """Write every open alert with changes still held back by ``update_interval``."""
+        with self._lock:
+            updates = [self._written(state) for state in self._states.values() if state.dirty and state.alert_id is not None]
+            self._updates_written += len(updates)
+        for alert_id in alert_crud.update_open_multi(db, updates):
+            self.forget(alert_id)
+
+    def forget(self, alert_id: int) -> None:
+        """Stop tracking an alert resolved by hand; the next out-of-band reading opens a new one."""
+        with self._lock:
+            for key, state in list(self._states.items()):
+                if state.alert_id == alert_id:
+                    del self._states[key]
+
+    def invalidate(self, keys: set[AlertKey]) -> None:
+        with self._lock:
+            for key in keys:
+                self._states.pop(key, None)
+            self._stale.update(keys)
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "open": len(self._states),
+                "readings": self._readings,
+                "opened": self._opened,
+                "resolved": self._resolved,
+                "updates_written": self._updates_written,
+                "updates_deferred": self._updates_deferred,
+                "hysteresis": dict(self.hysteresis),
+                "min_resolve_seconds": self.min_resolve_seconds,
+                "update_interval_seconds": self.update_interval,
+            }
+
+    def _reload_stale(self, db: Session) -> None:
+        with self._lock:
+            stale = list(self._stale)
+        for key in stale:
+            states = self._newest_open(db, alert_crud.get_open_alert_states(db, device_id=key[0], parameter=key[1]))
+            with self._lock:
+                if key not in self._stale:
+                    continue
+                self._stale.discard(key)
+                if key in states:
+                    self._states[key] = states[key]
+
+    def _newest_open(self, db: Session, rows: list[dict[str, Any]]) -> dict[AlertKey, AlertState]:
+        """The newest of ``rows`` (open alerts, oldest first) per key.
+
+        The stateless engine could leave several open alerts for one
+        parameter. Only the newest is tracked, so the older ones are resolved
+        here; otherwise nothing would ever close them.
+        """
+        newest = {(row["device_id"], row["parameter"]): row for row in rows}
+        kept = {row["id"] for row in newest.values()}
+        now = datetime.utcnow()
+        duplicates = [{"id": row["id"], "resolved": True, "resolved_at": now} for row in rows if row["id"] not in kept]
+        alert_crud.update_multi(db, duplicates)
+        for row in duplicates:
+            event_hub.stage(db, "alert", {"action": "resolved", **row})
+        return {key: AlertState.from_row(row) for key, row in newest.items()}
+
+    def _step(
+        self,
+        key: AlertKey,
+        value: float,
+        min_value: float,
+        max_value: float,
+        violated: bool,
+        recovered: bool,
+        at: datetime,
+        opening: dict[int, AlertState],
+        resolving: list[tuple[AlertState, datetime]],
+    ) -> None:
+        state = self._states.get(key)
+        if violated:
+            if state is None:
+                message, threshold_value = _threshold_message(key[1], value, min_value, max_value)
+                state = AlertState(key[0], key[1], at, message, threshold_value, value, value, last_seen_at=at)
+                self._states[key] = state
+                opening[id(state)] = state
+                return
+            if _excess(value, min_value, max_value) > _excess(state.peak_value, min_value, max_value):
+                state.peak_value = value
+                state.message, state.threshold_value = _threshold_message(key[1], value, min_value, max_value)
+            state.occurrences += 1
+            state.current_value = value
+            state.last_seen_at = at
+            state.recovering_since = None
+            state.dirty = True
+            return
+
+        if state is None:
+            return
+        state.current_value = value
+        state.dirty = True
+        if not recovered:
+            state.recovering_since = None
+            return
+        state.recovering_since = state.recovering_since or at
+        recovered_for = (at - state.recovering_since).total_seconds()
+        # An alert another request opened but has not inserted yet has no id to resolve; try again next reading.
+        if recovered_for >= self.min_resolve_seconds and (state.alert_id is not None or id(state) in opening):
+            del self._states[key]
+            resolving.append((state, at))
+
+    def _written(self, state: AlertState) -> dict[str, Any]:
+        state.dirty = False
+        state.written_at = time.monotonic()
+        return state.snapshot()
+
+    def _collect(
+        self,
+        touched: set[AlertKey],
+        opening: dict[int, AlertState],
+        resolving: list[tuple[AlertState, datetime]],
+    ) -> tuple[list[tuple[AlertState, dict[str, Any]]], list[dict[str, Any]], list[dict[str, Any]]]:
+        resolved_at = {id(state): at for state, at in resolving}
+        opens = []
+        for state in opening.values():
+            row = self._written(state)
+            del row["id"]
+            at = resolved_at.pop(id(state), None)
+            opens.append((state, {
+                **row,
+                "timestamp": state.opened_at,
+                "device_id": state.device_id,
+                "parameter": state.parameter,
+                "severity": "critical",
+                "resolved": at is not None,
+                "resolved_at": at,
+            }))
+        resolves = [
+            {**self._written(state), "resolved": True, "resolved_at": at}
+            for state, at in resolving
+            if id(state) in resolved_at
+        ]
+
+        updates = []
+        now = time.monotonic()
+        for key in touched:
+            state = self._states.get(key)
+            if state is None or not state.dirty or state.alert_id is None:
+                continue
+            if now - state.written_at >= self.update_interval:
+                updates.append(self._written(state))
+            else:
+                self._updates_deferred += 1
+
+        self._opened += len(opens)
+        self._resolved += len(resolving)
+        self._updates_written += len(updates)
+        return opens, updates, resolves
+
+
+alert_tracker = AlertTracker(
+    {
+        "temperature": settings.alert_hysteresis_temperature,
+        "moisture": settings.alert_hysteresis_moisture,
+        "ph": settings.alert_hysteresis_ph,
+    },
+    settings.alert_min_resolve_seconds,
+    settings.alert_update_interval_seconds,
+)
+
+
+@event.listens_for(Session, "after_commit")
+def _forget_committed_keys(session: Session) -> None:
+    session.info.pop(PENDING_KEY, None)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _reload_rolled_back_keys(session: Session, previous_transaction: Any) -> None:
+    for tracker, keys in session.info.pop(PENDING_KEY, {}).items():
+        tracker.invalidate(keys)
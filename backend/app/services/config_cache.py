@@ -0,0 +1,101 @@
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any, TypeVar
+
+from sqlalchemy import inspect
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+def _snapshot(row: T) -> T:
+    # A detached copy is safe to share between sessions and threads; the
+    # cached object must never be attached to a session or mutated.
+    mapper = inspect(row).mapper
+    return mapper.class_(**{attr.key: getattr(row, attr.key) for attr in mapper.column_attrs})
+
+
+def _default_stamp_path(database_url: str) -> Path:
+    digest = hashlib.sha1(database_url.encode()).hexdigest()[:12]
+    return Path(tempfile.gettempdir()) / f"mushroom-config-{digest}.stamp"
+
+
+class SingletonCache:
+    """Write-through cache for the single-row config tables.
+
+    Entries expire after ``ttl`` seconds. Writers also replace a small stamp
+    file, and every lookup compares the stamp's inode and mtime, so other
+    worker processes on the same host drop their copy on the next request.
+    """
+
+    def __init__(self, ttl: float, stamp_path: Path) -> None:
+        self.ttl = ttl
+        self.stamp_path = stamp_path
+        self._entries: dict[type, tuple[tuple[int, int], float, Any]] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0
+
+    def _generation(self) -> tuple[int, int]:
+        try:
+            stat = os.stat(self.stamp_path)
+        except OSError:
+            return (0, 0)
+        return (stat.st_ino, stat.st_mtime_ns)
+
+    def _bump(self) -> tuple[int, int]:
+        tmp_path = self.stamp_path.with_name(f"{self.stamp_path.name}.{os.getpid()}.{threading.get_ident()}")
+        try:
+            tmp_path.write_text(str(time.time_ns()))
+            os.replace(tmp_path, self.stamp_path)
+        except OSError as exc:
+            logger.warning("Could not update config cache stamp %s: %s", self.stamp_path, exc)
+        return self._generation()
+
+    def get(self, model: type[T], loader: Callable[[], T]) -> T:
+        if not self.enabled:
+            return loader()
+
+        generation = self._generation()
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(model)
+        if entry is not None and entry[0] == generation and now - entry[1] < self.ttl:
+            return entry[2]
+
+        value = _snapshot(loader())
+        with self._lock:
+            self._entries[model] = (generation, now, value)
+        return value
+
+    def set(self, model: type[T], row: T) -> None:
+        generation = self._bump()
+        if not self.enabled:
+            return
+        with self._lock:
+            self._entries[model] = (generation, time.monotonic(), _snapshot(row))
+
+    def invalidate(self, model: type | None = None) -> None:
+        self._bump()
+        with self._lock:
+            if model is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(model, None)
+
+
+config_cache = SingletonCache(
+    settings.config_cache_ttl,
+    Path(settings.config_cache_stamp_file) if settings.config_cache_stamp_file else _default_stamp_path(settings.database_url),
+)
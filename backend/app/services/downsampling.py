@@ -0,0 +1,161 @@
+import math
+from collections.abc import Sequence
+from datetime import datetime, timedelta, timezone
+from typing import Any, Literal
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.crud import reading_counter_crud, sensor_crud, sensor_rollup_crud
+
+METRICS = ("temperature", "moisture", "ph")
+EPOCH = datetime(1970, 1, 1)
+MICROSECOND = timedelta(microseconds=1)
+BUCKET_STEPS = {"minute": timedelta(minutes=1), "hour": timedelta(hours=1), "day": timedelta(days=1)}
+
+DownsampleMethod = Literal["lttb", "minmax"]
+
+
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """Indexes of the points Largest-Triangle-Three-Buckets keeps, first and last included.
+
+    The points between the ends are split into ``threshold - 2`` equal-count
+    buckets; from each, the point forming the largest triangle with the point
+    kept before it and the mean of the next bucket is kept.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    x = (x - x[0]).astype(np.float64)
+    y = y.astype(np.float64)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    kept = np.empty(threshold, dtype=np.int64)
+    kept[0], kept[-1] = 0, n - 1
+    anchor = 0
+    for bucket in range(threshold - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        if bucket + 2 < len(edges):
+            next_x = x[end:edges[bucket + 2]].mean()
+            next_y = y[end:edges[bucket + 2]].mean()
+        else:
+            next_x, next_y = x[-1], y[-1]
+        area = np.abs(
+            (x[anchor] - next_x) * (y[start:end] - y[anchor])
+            - (x[anchor] - x[start:end]) * (next_y - y[anchor])
+        )
+        anchor = start + int(np.argmax(area))
+        kept[bucket + 1] = anchor
+    return kept
+
+
+def min_max(x: np.ndarray, low: np.ndarray, high: np.ndarray, threshold: int) -> tuple[np.ndarray, np.ndarray]:
+    """Lowest and highest point of each of ``threshold // 2`` equal-time buckets, in time order.
+
+    ``low`` and ``high`` are the same array for raw readings and the bucket
+    minimum and maximum for rollups. Returns the kept timestamps and values.
+    """
+    n = len(x)
+    if n <= threshold and np.array_equal(low, high):
+        return x, low
+    buckets = max(threshold // 2, 1)
+    span = int(x[-1] - x[0]) + 1
+    ids = (x - x[0]) * buckets // span
+    lowest = np.lexsort((low, ids))
+    highest = np.lexsort((-high, ids))
+    firsts = np.flatnonzero(np.r_[True, np.diff(ids[lowest]) != 0])
+    low_index, high_index = lowest[firsts], highest[firsts]
+    # A bucket holding one raw reading would otherwise emit it twice.
+    distinct = (high_index != low_index) | (high[high_index] != low[low_index])
+    times = np.concatenate([x[low_index], x[high_index[distinct]]])
+    values = np.concatenate([low[low_index], high[high_index[distinct]]])
+    order = np.argsort(times, kind="stable")
+    return times[order], values[order]
+
+
+def _micros(values: Sequence[datetime]) -> np.ndarray:
+    # Timedelta arithmetic is several times faster than numpy's conversion of datetime objects.
+    naive = (value if value.tzinfo is None else value.astimezone(timezone.utc).replace(tzinfo=None) for value in values)
+    return np.fromiter(((value - EPOCH) // MICROSECOND for value in naive), dtype=np.int64, count=len(values))
+
+
+def _floats(values: Sequence[Any]) -> np.ndarray:
+    return np.array([math.nan if value is None else value for value in values], dtype=np.float64)
+
+
+def _estimated_readings(db: Session, start_time: datetime, end_time: datetime) -> int:
+    # Whole-day counters across all devices: an upper bound that costs one small read.
+    first, last = start_time.date().isoformat(), end_time.date().isoformat()
+    return sum(count for day, count in reading_counter_crud.get_scope(db, "day").items() if first <= day <= last)
+
+
+def choose_source(
+    db: Session,
+    start_time: datetime,
+    end_time: datetime,
+    device_id: str | None,
+    max_rows: int,
+) -> str:
+    """``raw`` if the range holds at most ``max_rows`` readings, else the finest rollup that does."""
+    if _estimated_readings(db, start_time, end_time) <= max_rows:
+        return "raw"
+    devices = 1 if device_id is not None else max(len(reading_counter_crud.get_scope(db, "device")), 1)
+    for granularity, step in BUCKET_STEPS.items():
+        if ((end_time - start_time) / step + 1) * devices <= max_rows:
+            return granularity
+    return "day"
+
+
+def _series(times: np.ndarray, values: np.ndarray) -> dict[str, list[Any]]:
+    return {"timestamp": times.astype("datetime64[us]").tolist(), "value": values.tolist()}
+
+
+def downsample_history(
+    db: Session,
+    start_time: datetime,
+    end_time: datetime,
+    device_id: str | None = None,
+    points: int = 500,
+    method: DownsampleMethod = "lttb",
+    max_source_rows: int = 100_000,
+    chunk_size: int = 5000,
+) -> dict[str, Any]:
+    """At most ``points`` points per metric for [start_time, end_time].
+
+    At most ``max_source_rows`` rows are read whatever the range: raw
+    readings when few enough, otherwise minute, hour or day rollups, whose
+    timestamps are bucket starts and whose values are bucket means (``lttb``)
+    or bucket extremes (``minmax``).
+    """
+    source = choose_source(db, start_time, end_time, device_id, max_source_rows)
+    if source == "raw":
+        columns = ("timestamp", *METRICS)
+        rows = [
+            row
+            for chunk in sensor_crud.iter_chunks(db, columns, start_time, end_time, device_id, chunk_size=chunk_size)
+            for row in chunk
+        ]
+        x = _micros([row[0] for row in rows])
+        low = high = mean = {metric: _floats([row[index] for row in rows]) for index, metric in enumerate(METRICS, 1)}
+    else:
+        rows = sensor_rollup_crud.get_buckets(db, source, start_time, end_time, device_id=device_id)
+        x = _micros([row["bucket_start"] for row in rows])
+        mean, low, high = {}, {}, {}
+        for metric in METRICS:
+            counts = np.array([row["ph_count" if metric == "ph" else "count"] for row in rows], dtype=np.float64)
+            sums = _floats([row[f"{metric}_sum"] for row in rows])
+            with np.errstate(invalid="ignore", divide="ignore"):
+                mean[metric] = np.where(counts > 0, sums / counts, math.nan)
+            low[metric] = _floats([row[f"{metric}_min"] for row in rows])
+            high[metric] = _floats([row[f"{metric}_max"] for row in rows])
+
+    series = {}
+    for metric in METRICS:
+        present = ~np.isnan(mean[metric])
+        times = x[present]
+        if method == "minmax":
+            series[metric] = _series(*min_max(times, low[metric][present], high[metric][present], points))
+        else:
+            values = mean[metric][present]
+            kept = lttb(times, values, points)
+            series[metric] = _series(times[kept], values[kept])
+    return {"source": source, "source_rows": len(rows), "series": series}
@@ -1,24 +1,94 @@
+import asyncio
+import time
 from typing import Any
 
-import requests
+import httpx
 
 from app.core.config import settings
+from app.core.metrics import metrics
+
+DEFAULT_DEVICE_ID = "esp32"
+
+request_duration = metrics.histogram(
+    "esp32_request_duration_seconds",
+    "ESP32 HTTP calls, successful or not, by device and operation.",
+    ("device", "operation"),
+)
+request_errors = metrics.counter(
+    "esp32_request_errors_total",
+    "Failed ESP32 HTTP calls by device, operation and exception type; Cancelled covers poll timeouts.",
+    ("device", "operation", "error"),
+)
 
 
 class ESP32Client:
-    def __init__(self, base_url: str, timeout: int) -> None:
+    def __init__(
+        self,
+        base_url: str,
+        connect_timeout: float,
+        read_timeout: float,
+        max_connections: int,
+        keepalive_expiry: float,
+    ) -> None:
         self.base_url = base_url.rstrip("/")
-        self.timeout = timeout
+        self.timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self._http: httpx.AsyncClient | None = None
 
-    def fetch_current_data(self) -> dict[str, Any]:
-        response = requests.get(f"{self.base_url}/api/data", timeout=self.timeout)
-        response.raise_for_status()
-        return response.json()
+    def _client(self) -> httpx.AsyncClient:
+        # Created lazily so the pool binds to the running event loop.
+        if self._http is None or self._http.is_closed:
+            self._http = httpx.AsyncClient(timeout=self.timeout, limits=self.limits)
+        return self._http
+
+    def _url(self, base_url: str | None, path: str) -> str:
+        return f"{(base_url or self.base_url).rstrip('/')}{path}"
 
-    def send_control(self, payload: dict[str, Any]) -> dict[str, Any]:
-        response = requests.post(f"{self.base_url}/api/control", json=payload, timeout=self.timeout)
+    @staticmethod
+    def _json(response: httpx.Response) -> dict[str, Any]:
         response.raise_for_status()
-        return response.json()
+        try:
+            return response.json()
+        except ValueError as exc:
+            raise httpx.DecodingError(f"Invalid JSON from ESP32: {exc}", request=response.request) from exc
+
+    async def _request(self, device_id: str, operation: str, method: str, url: str, **kwargs: Any) -> dict[str, Any]:
+        started = time.perf_counter()
+        try:
+            return self._json(await self._client().request(method, url, **kwargs))
+        except asyncio.CancelledError:
+            request_errors.inc(1.0, device_id, operation, "Cancelled")
+            raise
+        except Exception as exc:
+            request_errors.inc(1.0, device_id, operation, exc.__class__.__name__)
+            raise
+        finally:
+            request_duration.observe(time.perf_counter() - started, device_id, operation)
+
+    async def fetch_current_data(
+        self, base_url: str | None = None, device_id: str = DEFAULT_DEVICE_ID
+    ) -> dict[str, Any]:
+        return await self._request(device_id, "fetch", "GET", self._url(base_url, "/api/data"))
+
+    async def send_control(
+        self, payload: dict[str, Any], base_url: str | None = None, device_id: str = DEFAULT_DEVICE_ID
+    ) -> dict[str, Any]:
+        return await self._request(device_id, "control", "POST", self._url(base_url, "/api/control"), json=payload)
+
+    async def aclose(self) -> None:
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
 
 
-esp32_client = ESP32Client(settings.esp32_base_url, settings.esp32_timeout)
+esp32_client = ESP32Client(
+    settings.esp32_base_url,
+    settings.esp32_connect_timeout,
+    settings.esp32_read_timeout,
+    settings.esp32_max_connections,
+    settings.esp32_keepalive_expiry,
+)
@@ -0,0 +1,178 @@
+import asyncio
+import threading
+from collections import deque
+from collections.abc import AsyncIterator, Iterable
+from dataclasses import dataclass
+from typing import Any
+
+import orjson
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.metrics import metrics
+
+STAGED_KEY = "event_stream_staged"
+
+EVENT_TYPES = ("readings", "alert", "control", "targets", "runtime_mode")
+
+
+@dataclass(frozen=True)
+class StreamEvent:
+    id: int
+    type: str
+    data: Any
+
+    def encode(self) -> bytes:
+        return b"id: %d\nevent: %s\ndata: %s\n\n" % (self.id, self.type.encode(), orjson.dumps(self.data))
+
+
+class _Subscriber:
+    def __init__(self, loop: asyncio.AbstractEventLoop, types: frozenset[str], maxsize: int) -> None:
+        self.loop = loop
+        self.types = types
+        self.queue: asyncio.Queue[StreamEvent | None] = asyncio.Queue(maxsize)
+        self.overflowed = False
+
+    def offer(self, item: StreamEvent | None) -> None:
+        try:
+            self.loop.call_soon_threadsafe(self._put, item)
+        except RuntimeError:
+            pass  # event loop already closed
+
+    def _put(self, item: StreamEvent | None) -> None:
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(item)
+        except asyncio.QueueFull:
+            # A client this far behind is cut off. Everything still queued is discarded too, so the
+            # last event it received is the one before the gap and its Last-Event-ID replays from there.
+            self.overflowed = True
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(None)
+
+
+class EventHub:
+    """Fans committed changes out to Server-Sent Events subscribers.
+
+    Writers ``stage`` events on their session; they are published after the
+    session commits and dropped if it rolls back, so clients never see a
+    change that did not persist. The last ``replay_size`` events are kept so
+    a client reconnecting with ``Last-Event-ID`` misses nothing.
+
+    Subscribers only see changes committed by their own process.
+    """
+
+    def __init__(self, replay_size: int, subscriber_queue_size: int, heartbeat_seconds: float) -> None:
+        self.subscriber_queue_size = max(1, subscriber_queue_size)
+        self.heartbeat = max(heartbeat_seconds, 1.0)
+
+        self._lock = threading.Lock()
+        self._history: deque[StreamEvent] = deque(maxlen=max(0, replay_size))
+        self._subscribers: set[_Subscriber] = set()
+        self._last_id = 0
+        self._published = 0
+        self._connections = 0
+
+    def stage(self, db: Session, event_type: str, data: Any) -> None:
+        db.info.setdefault(STAGED_KEY, []).append((event_type, data))
+
+    def publish(self, event_type: str, data: Any) -> StreamEvent:
+        with self._lock:
+            self._last_id += 1
+            item = StreamEvent(self._last_id, event_type, data)
+            self._history.append(item)
+            self._published += 1
+            # Offered under the lock so concurrent commits reach every subscriber in id order.
+            for subscriber in self._subscribers:
+                if event_type in subscriber.types:
+                    subscriber.offer(item)
+        return item
+
+    def close(self) -> None:
+        """End every open stream, e.g. on shutdown."""
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            subscriber.offer(None)
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "subscribers": len(self._subscribers),
+                "connections": self._connections,
+                "published": self._published,
+                "last_event_id": self._last_id,
+                "replay_size": self._history.maxlen,
+                "heartbeat_seconds": self.heartbeat,
+            }
+
+    def queue_depths(self) -> list[int]:
+        """Events waiting in each subscriber's queue."""
+        with self._lock:
+            subscribers = list(self._subscribers)
+        return [subscriber.queue.qsize() for subscriber in subscribers]
+
+    async def stream(self, types: Iterable[str], last_event_id: int | None = None) -> AsyncIterator[bytes]:
+        subscriber = _Subscriber(asyncio.get_running_loop(), frozenset(types), self.subscriber_queue_size)
+        with self._lock:
+            self._subscribers.add(subscriber)
+            self._connections += 1
+            replay = [item for item in self._history if last_event_id is not None and item.id > last_event_id]
+            oldest = self._history[0].id if self._history else self._last_id + 1
+            missed = last_event_id is not None and (last_event_id > self._last_id or oldest > last_event_id + 1)
+            current_id = self._last_id
+        try:
+            yield b"retry: 3000\n\n"
+            if missed:
+                # Events were lost (replay buffer overrun or a server restart); the client should reload its state.
+                yield StreamEvent(current_id, "reset", {}).encode()
+            for item in replay:
+                if item.type in subscriber.types:
+                    yield item.encode()
+            while True:
+                try:
+                    item = await asyncio.wait_for(subscriber.queue.get(), self.heartbeat)
+                except asyncio.TimeoutError:
+                    yield b": keep-alive\n\n"
+                    continue
+                if item is None:
+                    return
+                yield item.encode()
+        finally:
+            with self._lock:
+                self._subscribers.discard(subscriber)
+
+
+event_hub = EventHub(settings.stream_replay_events, settings.stream_subscriber_queue, settings.stream_heartbeat_seconds)
+
+
+def _stream_queues() -> list[tuple[tuple[str, ...], float]]:
+    depths = event_hub.queue_depths()
+    return [
+        (("subscribers",), len(depths)),
+        (("queued",), sum(depths)),
+        (("deepest",), max(depths, default=0)),
+        (("capacity",), event_hub.subscriber_queue_size),
+    ]
+
+
+metrics.gauge(
+    "stream_subscriber_queues",
+    "Open Server-Sent Events subscribers, events queued across them, the deepest single queue, and its capacity.",
+    _stream_queues,
+    ("state",),
+)
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_staged_events(session: Session) -> None:
+    for event_type, data in session.info.pop(STAGED_KEY, ()):
+        event_hub.publish(event_type, data)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _drop_staged_events(session: Session, previous_transaction: Any) -> None:
+    session.info.pop(STAGED_KEY, None)
@@ -0,0 +1,191 @@
+import csv
+import io
+import json
+import logging
+from collections.abc import Callable, Iterable, Iterator
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any
+
+from app.core.config import settings
+from app.core.database import ReadSessionLocal
+from app.crud import sensor_crud
+
+logger = logging.getLogger(__name__)
+
+EXPORT_COLUMNS = (
+    "id",
+    "timestamp",
+    "device_id",
+    "location",
+    "temperature",
+    "moisture",
+    "ph",
+    "temp_min",
+    "temp_max",
+    "moisture_min",
+    "moisture_max",
+    "ph_min",
+    "ph_max",
+)
+
+Chunks = Iterable[list[tuple[Any, ...]]]
+
+
+class ExportFormatUnavailable(Exception):
+    pass
+
+
+class _DrainableSink(io.RawIOBase):
+    """Write-only file object whose contents are handed out and dropped chunk by chunk."""
+
+    def __init__(self) -> None:
+        self._parts: list[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data: Any) -> int:
+        chunk = bytes(data)
+        self._parts.append(chunk)
+        self._position += len(chunk)
+        return len(chunk)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._parts)
+        self._parts.clear()
+        return data
+
+
+def _pyarrow() -> Any:
+    try:
+        import pyarrow
+        import pyarrow.ipc  # noqa: F401
+        import pyarrow.parquet  # noqa: F401
+    except ImportError as exc:
+        raise ExportFormatUnavailable("Parquet and Arrow export require the pyarrow package") from exc
+    return pyarrow
+
+
+def _arrow_schema(pa: Any) -> Any:
+    types = {
+        "id": pa.int64(),
+        "timestamp": pa.timestamp("us", tz="UTC"),
+        "device_id": pa.string(),
+        "location": pa.string(),
+        "moisture": pa.int32(),
+        "moisture_min": pa.int32(),
+        "moisture_max": pa.int32(),
+    }
+    return pa.schema([(name, types.get(name, pa.float64())) for name in EXPORT_COLUMNS])
+
+
+def _record_batch(pa: Any, schema: Any, chunk: list[tuple[Any, ...]]) -> Any:
+    columns = list(zip(*chunk))
+    return pa.RecordBatch.from_arrays(
+        [pa.array(values, type=field.type) for values, field in zip(columns, schema)], schema=schema
+    )
+
+
+def _encode_csv(chunks: Chunks) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    for chunk in chunks:
+        writer.writerows(
+            tuple(value.isoformat() if isinstance(value, datetime) else value for value in row) for row in chunk
+        )
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+def _encode_ndjson(chunks: Chunks) -> Iterator[bytes]:
+    for chunk in chunks:
+        yield "".join(
+            json.dumps(dict(zip(EXPORT_COLUMNS, row)), default=datetime.isoformat) + "\n" for row in chunk
+        ).encode()
+
+
+def _encode_arrow(chunks: Chunks) -> Iterator[bytes]:
+    pa = _pyarrow()
+    schema = _arrow_schema(pa)
+    sink = _DrainableSink()
+    with pa.ipc.new_stream(pa.PythonFile(sink, mode="w"), schema) as writer:
+        yield sink.drain()
+        for chunk in chunks:
+            writer.write_batch(_record_batch(pa, schema, chunk))
+            yield sink.drain()
+    yield sink.drain()
+
+
+def _encode_parquet(chunks: Chunks) -> Iterator[bytes]:
+    pa = _pyarrow()
+    schema = _arrow_schema(pa)
+    sink = _DrainableSink()
+    # Each chunk becomes one row group, so only one chunk is ever held in memory.
+    with pa.parquet.ParquetWriter(pa.PythonFile(sink, mode="w"), schema, compression="zstd") as writer:
+        for chunk in chunks:
+            writer.write_batch(_record_batch(pa, schema, chunk))
+            yield sink.drain()
+    yield sink.drain()
+
+
+@dataclass(frozen=True)
+class ExportFormat:
+    media_type: str
+    extension: str
+    encode: Callable[[Chunks], Iterator[bytes]]
+    needs_pyarrow: bool = False
+
+
+EXPORT_FORMATS = {
+    "csv": ExportFormat("text/csv", "csv", _encode_csv),
+    "ndjson": ExportFormat("application/x-ndjson", "ndjson", _encode_ndjson),
+    "parquet": ExportFormat("application/vnd.apache.parquet", "parquet", _encode_parquet, needs_pyarrow=True),
+    "arrow": ExportFormat("application/vnd.apache.arrow.stream", "arrows", _encode_arrow, needs_pyarrow=True),
+}
+
+
+def export_format(name: str) -> ExportFormat:
+    export = EXPORT_FORMATS[name]
+    if export.needs_pyarrow:
+        _pyarrow()
+    return export
+
+
+def stream_sensor_export(
+    name: str,
+    start_time: datetime | None = None,
+    end_time: datetime | None = None,
+    device_id: str | None = None,
+) -> Iterator[bytes]:
+    """Encode readings in [start_time, end_time] chunk by chunk with its own session."""
+    export = export_format(name)
+    exported = 0
+
+    def counted(chunks: Chunks) -> Chunks:
+        nonlocal exported
+        for chunk in chunks:
+            exported += len(chunk)
+            yield chunk
+
+    with ReadSessionLocal() as db:
+        chunks = sensor_crud.iter_chunks(
+            db,
+            EXPORT_COLUMNS,
+            start_time=start_time,
+            end_time=end_time,
+            device_id=device_id,
+            chunk_size=settings.export_chunk_rows,
+        )
+        for data in export.encode(counted(chunks)):
+            if data:
+                yield data
+    logger.info("Exported %s readings as %s", exported, name)
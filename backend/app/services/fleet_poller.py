@@ -0,0 +1,273 @@
+import asyncio
+import json
+import logging
+import random
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any
+
+import httpx
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.services.esp32_client import ESP32Client, esp32_client
+
+logger = logging.getLogger(__name__)
+
+FleetSink = Callable[[list[dict[str, Any]]], Any]
+
+
+@dataclass
+class FleetDevice:
+    device_id: str
+    base_url: str
+    location: str | None = None
+    poll_interval: float = 30.0
+    timeout: float = 5.0
+
+
+@dataclass
+class DeviceStats:
+    polls: int = 0
+    failures: int = 0
+    consecutive_failures: int = 0
+    last_success_at: datetime | None = None
+    last_error_at: datetime | None = None
+    last_error: str | None = None
+    last_latency_ms: float | None = None
+    last_lag_ms: float | None = None
+    max_lag_ms: float = 0.0
+    _last_success_monotonic: float | None = field(default=None, repr=False)
+
+    def as_dict(self) -> dict[str, Any]:
+        staleness = None
+        if self._last_success_monotonic is not None:
+            staleness = round(time.monotonic() - self._last_success_monotonic, 3)
+        return {
+            "polls": self.polls,
+            "failures": self.failures,
+            "consecutive_failures": self.consecutive_failures,
+            "last_success_at": self.last_success_at,
+            "seconds_since_success": staleness,
+            "last_error_at": self.last_error_at,
+            "last_error": self.last_error,
+            "last_latency_ms": self.last_latency_ms,
+            "last_lag_ms": self.last_lag_ms,
+            "max_lag_ms": self.max_lag_ms,
+        }
+
+
+def parse_fleet_devices(raw: str, default_interval: float, default_timeout: float) -> list[FleetDevice]:
+    if not raw.strip():
+        return []
+    entries = json.loads(raw)
+    return [
+        FleetDevice(
+            device_id=str(entry["device_id"]),
+            base_url=str(entry["base_url"]).rstrip("/"),
+            location=entry.get("location"),
+            poll_interval=float(entry.get("poll_interval", default_interval)),
+            timeout=float(entry.get("timeout", default_timeout)),
+        )
+        for entry in entries
+    ]
+
+
+def configured_fleet_devices() -> list[FleetDevice]:
+    devices = parse_fleet_devices(settings.fleet_devices_raw, settings.fleet_poll_interval, settings.fleet_poll_timeout)
+    if devices:
+        return devices
+    return [
+        FleetDevice(
+            device_id="esp32",
+            base_url=settings.esp32_base_url.rstrip("/"),
+            poll_interval=settings.fleet_poll_interval,
+            timeout=settings.fleet_poll_timeout,
+        )
+    ]
+
+
+class FleetPoller:
+    def __init__(
+        self,
+        client: ESP32Client,
+        jitter: float,
+        write_batch_size: int,
+        write_interval_ms: int,
+    ) -> None:
+        self.client = client
+        self.jitter = min(max(jitter, 0.0), 0.5)
+        self.write_batch_size = max(1, write_batch_size)
+        self.write_interval = max(write_interval_ms, 1) / 1000
+
+        self._devices: dict[str, FleetDevice] = {}
+        self._stats: dict[str, DeviceStats] = {}
+        self._tasks: dict[str, asyncio.Task] = {}
+        self._writer: asyncio.Task | None = None
+        self._pending: list[dict[str, Any]] = []
+        self._pending_ready: asyncio.Event | None = None
+        self._sink: FleetSink | None = None
+        self._written = 0
+        self._write_failures = 0
+
+    @property
+    def running(self) -> bool:
+        return self._writer is not None and not self._writer.done()
+
+    def devices(self) -> list[FleetDevice]:
+        return list(self._devices.values())
+
+    def register(self, device: FleetDevice) -> None:
+        self._devices[device.device_id] = device
+        self._stats.setdefault(device.device_id, DeviceStats())
+        if self.running:
+            self._restart_device(device)
+
+    def unregister(self, device_id: str) -> bool:
+        device = self._devices.pop(device_id, None)
+        self._stats.pop(device_id, None)
+        task = self._tasks.pop(device_id, None)
+        if task is not None:
+            task.cancel()
+        return device is not None
+
+    def start(self, sink: FleetSink) -> None:
+        if self.running:
+            return
+        self._sink = sink
+        self._pending_ready = asyncio.Event()
+        self._writer = asyncio.create_task(self._write_loop(), name="fleet-writer")
+        for device in self._devices.values():
+            self._restart_device(device)
+        logger.info("Fleet poller started for %s device(s)", len(self._devices))
+
+    async def stop(self) -> None:
+        tasks = list(self._tasks.values())
+        self._tasks.clear()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+        if self._writer is not None:
+            self._writer.cancel()
+            await asyncio.gather(self._writer, return_exceptions=True)
+            self._writer = None
+        await self._flush()
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "running": self.running,
+            "pending_writes": len(self._pending),
+            "written": self._written,
+            "write_failures": self._write_failures,
+            "devices": [
+                {
+                    "device_id": device.device_id,
+                    "base_url": device.base_url,
+                    "location": device.location,
+                    "poll_interval": device.poll_interval,
+                    "timeout": device.timeout,
+                    **self._stats[device.device_id].as_dict(),
+                }
+                for device in self._devices.values()
+            ],
+        }
+
+    def _restart_device(self, device: FleetDevice) -> None:
+        previous = self._tasks.pop(device.device_id, None)
+        if previous is not None:
+            previous.cancel()
+        self._tasks[device.device_id] = asyncio.create_task(
+            self._poll_loop(device), name=f"fleet-poll-{device.device_id}"
+        )
+
+    def _next_delay(self, interval: float) -> float:
+        return interval * (1 + random.uniform(-self.jitter, self.jitter))
+
+    async def _poll_loop(self, device: FleetDevice) -> None:
+        # Random phase so devices sharing an interval do not all fire together.
+        scheduled = time.monotonic() + random.uniform(0, device.poll_interval)
+        while True:
+            delay = scheduled - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            started = time.monotonic()
+            await self._poll_once(device, lag=started - scheduled)
+            scheduled = max(scheduled + self._next_delay(device.poll_interval), time.monotonic())
+
+    async def _poll_once(self, device: FleetDevice, lag: float) -> None:
+        stats = self._stats.setdefault(device.device_id, DeviceStats())
+        stats.polls += 1
+        stats.last_lag_ms = round(max(lag, 0.0) * 1000, 1)
+        stats.max_lag_ms = max(stats.max_lag_ms, stats.last_lag_ms)
+        started = time.monotonic()
+        try:
+            payload = await asyncio.wait_for(
+                self.client.fetch_current_data(base_url=device.base_url, device_id=device.device_id),
+                timeout=device.timeout,
+            )
+            if not isinstance(payload, dict):
+                raise ValueError(f"expected a JSON object from the device, got {type(payload).__name__}")
+        except Exception as exc:
+            # Anything else (a malformed base_url, an unexpected body) would otherwise end this device's task.
+            stats.failures += 1
+            stats.consecutive_failures += 1
+            stats.last_error_at = datetime.utcnow()
+            stats.last_error = str(exc) or exc.__class__.__name__
+            expected = isinstance(exc, (httpx.HTTPError, asyncio.TimeoutError, ValueError))
+            if expected or stats.consecutive_failures > 1:
+                logger.warning("Fleet poll of %s failed: %s", device.device_id, stats.last_error)
+            else:
+                logger.exception("Fleet poll of %s failed unexpectedly", device.device_id)
+            return
+
+        stats.last_latency_ms = round((time.monotonic() - started) * 1000, 1)
+        stats.consecutive_failures = 0
+        stats.last_success_at = datetime.utcnow()
+        stats._last_success_monotonic = time.monotonic()
+
+        payload["device_id"] = device.device_id
+        if device.location is not None:
+            payload.setdefault("location", device.location)
+        self._pending.append(payload)
+        if len(self._pending) >= self.write_batch_size and self._pending_ready is not None:
+            self._pending_ready.set()
+
+    async def _write_loop(self) -> None:
+        assert self._pending_ready is not None
+        while True:
+            try:
+                await asyncio.wait_for(self._pending_ready.wait(), timeout=self.write_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._pending_ready.clear()
+            await self._flush()
+
+    async def _flush(self) -> None:
+        if not self._pending or self._sink is None:
+            return
+        batch, self._pending = self._pending, []
+        try:
+            await run_in_threadpool(self._sink, batch)
+        except Exception:
+            self._write_failures += len(batch)
+            logger.exception("Failed to persist %s fleet readings", len(batch))
+            return
+        self._written += len(batch)
+
+
+fleet_poller = FleetPoller(
+    esp32_client,
+    settings.fleet_poll_jitter,
+    settings.fleet_write_batch_size,
+    settings.fleet_write_interval_ms,
+)
+
+metrics.gauge(
+    "fleet_pending_writes",
+    "Polled readings waiting for the fleet writer's next batch.",
+    lambda: [((), len(fleet_poller._pending))],
+)
@@ -0,0 +1,240 @@
+import logging
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy.exc import OperationalError
+
+from app.core.config import settings
+from app.core.database import SessionLocal, unit_of_work
+from app.core.metrics import metrics
+from app.crud import sensor_crud
+from app.services.alert_engine import alert_tracker
+from app.services.event_stream import event_hub
+from app.services.reading_buffer import reading_buffer
+
+logger = logging.getLogger(__name__)
+
+BACKPRESSURE_POLICIES = {"block", "reject", "drop_oldest"}
+
+
+class IngestQueueFull(Exception):
+    pass
+
+
+class IngestQueue:
+    def __init__(
+        self,
+        maxsize: int,
+        flush_rows: int,
+        flush_interval_ms: int,
+        backpressure: str,
+        block_timeout_ms: int,
+        write_retries: int,
+        retry_backoff_ms: int,
+    ) -> None:
+        policy = backpressure.strip().lower()
+        if policy not in BACKPRESSURE_POLICIES:
+            raise ValueError(f"backpressure must be one of {sorted(BACKPRESSURE_POLICIES)}, got {backpressure!r}")
+
+        self.maxsize = max(1, maxsize)
+        self.flush_rows = max(1, flush_rows)
+        self.flush_interval = max(flush_interval_ms, 1) / 1000
+        self.backpressure = policy
+        self.block_timeout = max(block_timeout_ms, 0) / 1000
+        self.write_retries = max(write_retries, 0)
+        self.retry_backoff = max(retry_backoff_ms, 0) / 1000
+
+        self._items: deque[dict[str, Any]] = deque()
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+        self._not_full = threading.Condition(self._lock)
+        self._oldest_enqueued_at: float | None = None
+        self._thread: threading.Thread | None = None
+        self._stopping = False
+
+        self._enqueued = 0
+        self._written = 0
+        self._dropped = 0
+        self._rejected = 0
+        self._failed = 0
+        self._retries = 0
+        self._flushes = 0
+        self._last_flush_at: datetime | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="ingest-flusher", daemon=True)
+        self._thread.start()
+        logger.info(
+            "Write-behind ingest started (maxsize=%s, flush_rows=%s, flush_interval=%.3fs, backpressure=%s)",
+            self.maxsize,
+            self.flush_rows,
+            self.flush_interval,
+            self.backpressure,
+        )
+
+    def stop(self, timeout: float | None = 30.0) -> None:
+        if self._thread is None:
+            return
+        with self._lock:
+            self._stopping = True
+            self._not_empty.notify_all()
+            self._not_full.notify_all()
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            logger.error("Write-behind ingest did not drain within %ss; %s rows left", timeout, len(self._items))
+        self._thread = None
+
+    def submit(self, row: dict[str, Any]) -> int:
+        with self._lock:
+            if self._stopping or self._thread is None:
+                raise IngestQueueFull("ingest queue is not accepting writes")
+
+            if len(self._items) >= self.maxsize:
+                if self.backpressure == "drop_oldest":
+                    self._items.popleft()
+                    self._dropped += 1
+                elif self.backpressure == "reject":
+                    self._rejected += 1
+                    raise IngestQueueFull("ingest queue is full")
+                else:
+                    deadline = time.monotonic() + self.block_timeout
+                    while len(self._items) >= self.maxsize and not self._stopping:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            break
+                        self._not_full.wait(remaining)
+                    if len(self._items) >= self.maxsize or self._stopping:
+                        self._rejected += 1
+                        raise IngestQueueFull("ingest queue is full")
+
+            if not self._items:
+                self._oldest_enqueued_at = time.monotonic()
+            self._items.append(row)
+            self._enqueued += 1
+            depth = len(self._items)
+            if depth == 1 or depth >= self.flush_rows:
+                self._not_empty.notify()
+            return depth
+
+    def depth(self) -> int:
+        with self._lock:
+            return len(self._items)
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "enabled": self.running,
+                "depth": len(self._items),
+                "maxsize": self.maxsize,
+                "flush_rows": self.flush_rows,
+                "flush_interval_ms": int(self.flush_interval * 1000),
+                "backpressure": self.backpressure,
+                "enqueued": self._enqueued,
+                "written": self._written,
+                "dropped": self._dropped,
+                "rejected": self._rejected,
+                "failed": self._failed,
+                "retries": self._retries,
+                "flushes": self._flushes,
+                "last_flush_at": self._last_flush_at,
+            }
+
+    def _take_batch(self) -> list[dict[str, Any]] | None:
+        with self._lock:
+            while not self._items and not self._stopping:
+                self._not_empty.wait()
+
+            while len(self._items) < self.flush_rows and not self._stopping:
+                waited = time.monotonic() - (self._oldest_enqueued_at or time.monotonic())
+                remaining = self.flush_interval - waited
+                if remaining <= 0:
+                    break
+                self._not_empty.wait(remaining)
+
+            if not self._items:
+                return None
+
+            count = min(len(self._items), self.flush_rows)
+            batch = [self._items.popleft() for _ in range(count)]
+            self._oldest_enqueued_at = time.monotonic() if self._items else None
+            self._not_full.notify_all()
+            return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._take_batch()
+            if batch is None:
+                return
+            self._write(batch)
+
+    def _commit(self, rows: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        with SessionLocal() as db, unit_of_work(db):
+            created = sensor_crud.create_multi(db, rows)
+            event_hub.stage(db, "readings", created)
+            alert_tracker.observe(db, created)
+        return created
+
+    def _write(self, rows: list[dict[str, Any]]) -> None:
+        # These readings were already acknowledged with 202, so transient errors (a locked
+        # database, a dropped connection) are retried with exponential backoff. While the
+        # flusher waits the queue keeps filling and the backpressure policy applies.
+        for attempt in range(self.write_retries + 1):
+            try:
+                created = self._commit(rows)
+                break
+            except OperationalError:
+                if attempt == self.write_retries:
+                    logger.exception("Write-behind flush of %s readings failed after %s attempts", len(rows), attempt + 1)
+                    with self._lock:
+                        self._failed += len(rows)
+                    return
+                delay = self.retry_backoff * 2**attempt
+                logger.warning("Write-behind flush of %s readings failed; retrying in %.2fs", len(rows), delay)
+                with self._lock:
+                    self._retries += 1
+                time.sleep(delay)
+            except Exception:
+                if len(rows) > 1:
+                    # Not transient: retry row by row so one bad reading does not take the batch with it.
+                    logger.warning("Write-behind flush of %s readings failed; writing them one at a time", len(rows))
+                    for row in rows:
+                        self._write([row])
+                    return
+                logger.exception("Write-behind write of a reading failed")
+                with self._lock:
+                    self._failed += 1
+                return
+
+        reading_buffer.extend(created)
+        with self._lock:
+            self._written += len(rows)
+            self._flushes += 1
+            self._last_flush_at = datetime.utcnow()
+
+
+ingest_queue = IngestQueue(
+    settings.ingest_queue_maxsize,
+    settings.ingest_flush_rows,
+    settings.ingest_flush_interval_ms,
+    settings.ingest_backpressure,
+    settings.ingest_block_timeout_ms,
+    settings.ingest_write_retries,
+    settings.ingest_retry_backoff_ms,
+)
+
+metrics.gauge(
+    "ingest_queue_rows",
+    "Readings waiting in the write-behind queue, and the queue's capacity.",
+    lambda: [(("queued",), ingest_queue.depth()), (("capacity",), ingest_queue.maxsize)],
+    ("state",),
+)
@@ -0,0 +1,131 @@
+import re
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from itertools import islice
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.crud import actuator_crud, alert_crud, reading_counter_crud, sensor_crud, sensor_rollup_crud
+
+_SCAN = re.compile(r"^SCAN (?!CONSTANT ROW)(?!\()(\S+)(?: AS \S+)?(?: USING (?:COVERING )?INDEX (\S+))?")
+
+
+def _week_ago() -> datetime:
+    return datetime.utcnow() - timedelta(days=7)
+
+
+def _first_chunk(rows: Any) -> list[Any]:
+    return list(islice(rows, 1))
+
+
+HOT_QUERIES: dict[str, Callable[[Session], Any]] = {
+    "history page": lambda db: sensor_crud.get_page_rows(db, limit=100),
+    "history page for a device": lambda db: sensor_crud.get_page_rows(db, limit=100, device_id="esp32"),
+    "history page after a cursor": lambda db: sensor_crud.get_page_rows(
+        db, limit=100, device_id="esp32", before=(datetime.utcnow(), 1_000_000)
+    ),
+    "history time range": lambda db: sensor_crud.get_page_rows(
+        db, limit=100, start_time=_week_ago(), end_time=datetime.utcnow()
+    ),
+    "latest report readings": lambda db: sensor_crud.get_latest_metrics(db, limit=500),
+    "readings after an id": lambda db: sensor_crud.get_rows_after(db, after_id=1_000, limit=500),
+    "readings after an id for a device": lambda db: sensor_crud.get_rows_after(
+        db, after_id=1_000, device_id="esp32", limit=500
+    ),
+    "readings after a time": lambda db: sensor_crud.get_rows_after(db, after_time=_week_ago(), limit=500),
+    "export time range": lambda db: _first_chunk(
+        sensor_crud.iter_chunks(db, ("id", "timestamp", "temperature"), start_time=_week_ago(), chunk_size=10)
+    ),
+    "export for a device": lambda db: _first_chunk(
+        sensor_crud.iter_chunks(db, ("id", "timestamp", "temperature"), device_id="esp32", chunk_size=10)
+    ),
+    "statistics": lambda db: sensor_rollup_crud.get_statistics(
+        db, _week_ago() + timedelta(seconds=30), datetime.utcnow() - timedelta(seconds=30)
+    ),
+    "statistics for a device": lambda db: sensor_rollup_crud.get_statistics(
+        db, _week_ago() + timedelta(seconds=30), datetime.utcnow() - timedelta(seconds=30), device_id="esp32"
+    ),
+    "downsampling buckets": lambda db: sensor_rollup_crud.get_buckets(
+        db, "hour", _week_ago(), datetime.utcnow()
+    ),
+    "downsampling buckets for a device": lambda db: sensor_rollup_crud.get_buckets(
+        db, "hour", _week_ago(), datetime.utcnow(), device_id="esp32"
+    ),
+    "reading counts": lambda db: (reading_counter_crud.get_total(db), reading_counter_crud.get_scope(db, "day", limit=30)),
+    "unresolved alerts": lambda db: alert_crud.get_unresolved_alert_rows(db),
+    "unresolved alerts by severity": lambda db: alert_crud.get_unresolved_alert_rows(db, severity="critical"),
+    "open alert for a device": lambda db: alert_crud.get_open_alert_states(db, device_id="esp32", parameter="ph"),
+    "recent alerts": lambda db: alert_crud.get_recent_alert_rows(db, hours=168, limit=500),
+    "actuator history": lambda db: actuator_crud.get_actuator_history(db, limit=10),
+    "actuator history by type": lambda db: actuator_crud.get_actuator_history(db, actuator_type="fan", limit=10),
+    "retention of raw readings": lambda db: sensor_crud.delete_older_than(db, _week_ago(), limit=1),
+}
+
+
+@dataclass
+class QueryPlan:
+    name: str
+    statement: str
+    plan: list[str] = field(default_factory=list)
+    partial_indexes: set[str] = field(default_factory=set)
+
+    @property
+    def table_scans(self) -> list[str]:
+        """Tables read in full.
+
+        A bare ``SCAN`` reads every row. ``SCAN ... USING INDEX`` walks a whole
+        index in order, which is fine for an unfiltered ``ORDER BY ... LIMIT``
+        but means every row is visited and tested when the query has a
+        ``WHERE`` clause, unless the index is partial and holds only the rows
+        the filter wants.
+        """
+        filtered = " WHERE " in self.statement
+        scans = []
+        for match in map(_SCAN.match, self.plan):
+            if match is None:
+                continue
+            table, index = match.groups()
+            if index is None or (filtered and index not in self.partial_indexes):
+                scans.append(table)
+        return scans
+
+
+def explain_hot_queries(db: Session) -> list[QueryPlan]:
+    """Run every hot query, then ``EXPLAIN QUERY PLAN`` each statement it issued. SQLite only.
+
+    The queries run inside a transaction that is rolled back, so the
+    retention delete leaves the data untouched.
+    """
+    connection = db.connection()
+    if connection.dialect.name != "sqlite":
+        raise RuntimeError("query plan checks are only implemented for SQLite")
+
+    captured: list[tuple[str, str, Any]] = []
+    current = ""
+
+    def capture(conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool) -> None:
+        if not executemany and statement.lstrip().upper().startswith(("SELECT", "DELETE", "UPDATE")):
+            captured.append((current, statement, parameters))
+
+    event.listen(connection, "before_cursor_execute", capture)
+    try:
+        for current, run in HOT_QUERIES.items():
+            run(db)
+    finally:
+        event.remove(connection, "before_cursor_execute", capture)
+
+    partial_indexes = {
+        index[1]
+        for (table,) in connection.exec_driver_sql("SELECT name FROM sqlite_master WHERE type = 'table'").all()
+        for index in connection.exec_driver_sql(f"PRAGMA index_list('{table}')").all()
+        if index[4]
+    }
+    plans = []
+    for name, statement, parameters in captured:
+        rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all()
+        plans.append(QueryPlan(name, " ".join(statement.split()), [row[-1] for row in rows], partial_indexes))
+    db.rollback()
+    return plans
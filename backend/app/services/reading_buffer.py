@@ -0,0 +1,193 @@
+import logging
+import threading
+from collections import OrderedDict
+from collections.abc import Iterable
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+import numpy as np
+from sqlalchemy import desc, func, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.crud import sensor_crud
+from app.models.sensor_data import SensorData
+
+logger = logging.getLogger(__name__)
+
+NUMERIC_FIELDS = (
+    "temperature",
+    "moisture",
+    "ph",
+    "temp_min",
+    "temp_max",
+    "moisture_min",
+    "moisture_max",
+    "ph_min",
+    "ph_max",
+)
+INTEGER_FIELDS = {"moisture", "moisture_min", "moisture_max"}
+_EPOCH = datetime(1970, 1, 1)
+
+
+def _to_micros(value: datetime) -> tuple[int, bool]:
+    if value.tzinfo is not None:
+        return int((value.astimezone(timezone.utc).replace(tzinfo=None) - _EPOCH) / timedelta(microseconds=1)), True
+    return int((value - _EPOCH) / timedelta(microseconds=1)), False
+
+
+def _from_micros(value: int, aware: bool) -> datetime:
+    result = _EPOCH + timedelta(microseconds=int(value))
+    return result.replace(tzinfo=timezone.utc) if aware else result
+
+
+class ReadingRing:
+    """Fixed-size, array-backed ring of the most recent readings."""
+
+    def __init__(self, capacity: int) -> None:
+        self.capacity = capacity
+        self._ids = np.zeros(capacity, dtype=np.int64)
+        self._timestamps = np.zeros(capacity, dtype=np.int64)
+        self._aware = np.zeros(capacity, dtype=bool)
+        self._values = np.full((capacity, len(NUMERIC_FIELDS)), np.nan, dtype=np.float64)
+        self._device_ids: list[str | None] = [None] * capacity
+        self._locations: list[str | None] = [None] * capacity
+        self._next = 0
+        self._size = 0
+        self._unordered = False
+
+    def __len__(self) -> int:
+        return self._size
+
+    def append(self, row: dict[str, Any]) -> None:
+        slot = self._next
+        if self._size and row["id"] < self._ids[(slot - 1) % self.capacity]:
+            self._unordered = True
+        self._ids[slot] = row["id"]
+        self._timestamps[slot], self._aware[slot] = _to_micros(row["timestamp"])
+        self._values[slot] = [np.nan if row.get(name) is None else row[name] for name in NUMERIC_FIELDS]
+        self._device_ids[slot] = row.get("device_id")
+        self._locations[slot] = row.get("location")
+        self._next = (slot + 1) % self.capacity
+        self._size = min(self._size + 1, self.capacity)
+
+    def _slots_newest_first(self) -> np.ndarray:
+        slots = (self._next - 1 - np.arange(self._size)) % self.capacity
+        if self._unordered:
+            slots = slots[np.argsort(-self._ids[slots], kind="stable")]
+        return slots
+
+    def latest(self, limit: int) -> list[dict[str, Any]]:
+        slots = self._slots_newest_first()[:limit]
+        rows: list[dict[str, Any]] = []
+        for slot in slots.tolist():
+            row: dict[str, Any] = {
+                "id": int(self._ids[slot]),
+                "timestamp": _from_micros(self._timestamps[slot], bool(self._aware[slot])),
+                "device_id": self._device_ids[slot],
+                "location": self._locations[slot],
+            }
+            for index, name in enumerate(NUMERIC_FIELDS):
+                value = self._values[slot, index]
+                if np.isnan(value):
+                    row[name] = None
+                else:
+                    row[name] = int(value) if name in INTEGER_FIELDS else float(value)
+            rows.append(row)
+        return rows
+
+
+class ReadingBuffer:
+    """Recent readings overall and for the ``max_devices`` most recently seen devices.
+
+    ``device_id`` comes from clients, so per-device rings are evicted least
+    recently written first; ``latest_for_device`` returns ``None`` for an
+    evicted device and callers read the database instead.
+    """
+
+    def __init__(self, capacity: int, max_devices: int) -> None:
+        self.capacity = max(capacity, 0)
+        self.max_devices = max(max_devices, 0)
+        self._all = ReadingRing(self.capacity) if self.capacity else None
+        self._devices: OrderedDict[str | None, ReadingRing] = OrderedDict()
+        self._lock = threading.Lock()
+        self._warm = False
+
+    @property
+    def enabled(self) -> bool:
+        return self._all is not None
+
+    @property
+    def ready(self) -> bool:
+        return self.enabled and self._warm
+
+    def extend(self, rows: Iterable[dict[str, Any]]) -> None:
+        if self._all is None:
+            return
+        with self._lock:
+            for row in rows:
+                self._all.append(row)
+                if not self.max_devices:
+                    continue
+                device_id = row.get("device_id")
+                ring = self._devices.get(device_id)
+                if ring is None:
+                    ring = self._devices[device_id] = ReadingRing(self.capacity)
+                    if len(self._devices) > self.max_devices:
+                        self._devices.popitem(last=False)
+                else:
+                    self._devices.move_to_end(device_id)
+                ring.append(row)
+
+    def latest(self, limit: int = 1) -> list[dict[str, Any]]:
+        with self._lock:
+            return self._all.latest(limit) if self._all is not None else []
+
+    def latest_for_device(self, device_id: str | None, limit: int = 1) -> list[dict[str, Any]] | None:
+        with self._lock:
+            ring = self._devices.get(device_id)
+            return ring.latest(limit) if ring is not None else None
+
+    def covers(self, limit: int) -> bool:
+        # Rows older than the buffer are in the DB only once it has wrapped.
+        if self._all is None or not self._warm:
+            return False
+        with self._lock:
+            return limit <= len(self._all) or len(self._all) < self.capacity
+
+    def warm(self, db: Session) -> None:
+        if self._all is None:
+            return
+        readings = sensor_crud.select_columns(("id", "timestamp", "device_id", "location") + NUMERIC_FIELDS)
+        device_ids = db.execute(
+            select(SensorData.device_id)
+            .group_by(SensorData.device_id)
+            .order_by(desc(func.max(SensorData.id)))
+            .limit(self.max_devices)
+        ).scalars().all()
+        recent = db.execute(readings.order_by(desc(SensorData.id)).limit(self.capacity)).mappings().all()
+        per_device = {
+            device_id: db.execute(
+                readings
+                .where(SensorData.device_id.is_(None) if device_id is None else SensorData.device_id == device_id)
+                .order_by(desc(SensorData.id))
+                .limit(self.capacity)
+            ).mappings().all()
+            for device_id in device_ids
+        }
+
+        with self._lock:
+            self._all = ReadingRing(self.capacity)
+            for row in reversed(recent):
+                self._all.append(dict(row))
+            self._devices = OrderedDict()
+            # Least recently written first, matching the eviction order in extend.
+            for device_id, rows in reversed(per_device.items()):
+                ring = self._devices[device_id] = ReadingRing(self.capacity)
+                for row in reversed(rows):
+                    ring.append(dict(row))
+            self._warm = True
+        logger.info("Reading buffer warmed with %s readings across %s device(s)", len(recent), len(per_device))
+
+
+reading_buffer = ReadingBuffer(settings.reading_buffer_size, settings.reading_buffer_max_devices)
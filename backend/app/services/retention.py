@@ -0,0 +1,220 @@
+import logging
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal, engine, unit_of_work
+from app.crud import actuator_crud, alert_crud, reading_counter_crud, sensor_crud, sensor_rollup_crud
+
+logger = logging.getLogger(__name__)
+
+DeleteBatch = Callable[[Session, datetime, int], int]
+
+
+@dataclass(frozen=True)
+class RetentionPolicy:
+    name: str
+    days: int
+    delete_batch: DeleteBatch
+
+
+@dataclass
+class RetentionReport:
+    started_at: datetime
+    finished_at: datetime | None = None
+    deleted: dict[str, int] = field(default_factory=dict)
+    bytes_freed: int = 0
+    bytes_reusable: int = 0
+    auto_vacuum: str | None = None
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "deleted": dict(self.deleted),
+            "rows_deleted": sum(self.deleted.values()),
+            "bytes_freed": self.bytes_freed,
+            "bytes_reusable": self.bytes_reusable,
+            "auto_vacuum": self.auto_vacuum,
+        }
+
+
+def _rollup_policy(granularity: str, days: int) -> RetentionPolicy:
+    return RetentionPolicy(
+        f"sensor_rollups.{granularity}",
+        days,
+        lambda db, cutoff, limit: sensor_rollup_crud.delete_older_than(db, granularity, cutoff, limit),
+    )
+
+
+def configured_policies() -> list[RetentionPolicy]:
+    """Policies from settings. Rollups outlive raw readings, so old ranges keep hourly and daily statistics."""
+    return [
+        RetentionPolicy("sensor_data", settings.retention_raw_days, sensor_crud.delete_older_than),
+        _rollup_policy("minute", settings.retention_minute_rollup_days),
+        _rollup_policy("hour", settings.retention_hour_rollup_days),
+        _rollup_policy("day", settings.retention_day_rollup_days),
+        RetentionPolicy("alerts.resolved", settings.retention_resolved_alert_days, alert_crud.delete_resolved_before),
+        RetentionPolicy("actuator_logs", settings.retention_actuator_log_days, actuator_crud.delete_older_than),
+    ]
+
+
+class RetentionEngine:
+    """Deletes expired rows in small committed batches, then returns free pages to the filesystem.
+
+    Each batch is its own short transaction with a pause after it, so ingest
+    never waits long for the write lock. Space is only returned on SQLite
+    databases with ``auto_vacuum=INCREMENTAL`` (the default for databases
+    created with the performance profile); elsewhere freed pages are reused
+    by later inserts and reported as ``bytes_reusable``.
+    """
+
+    def __init__(
+        self,
+        policies: list[RetentionPolicy],
+        interval_minutes: float,
+        batch_rows: int,
+        batch_pause_ms: int,
+        vacuum_pages: int,
+    ) -> None:
+        self.policies = policies
+        self.interval = max(interval_minutes, 1 / 60) * 60
+        self.batch_rows = max(1, batch_rows)
+        self.batch_pause = max(batch_pause_ms, 0) / 1000
+        self.vacuum_pages = max(1, vacuum_pages)
+
+        self._lock = threading.Lock()
+        self._run_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._runs = 0
+        self._failures = 0
+        self._last_report: RetentionReport | None = None
+        self._last_error: str | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="retention", daemon=True)
+        self._thread.start()
+        logger.info(
+            "Retention started (every %.0f min; %s)",
+            self.interval / 60,
+            ", ".join(f"{policy.name}={policy.days}d" for policy in self.policies if policy.days > 0) or "nothing expires",
+        )
+
+    def stop(self, timeout: float | None = 30.0) -> None:
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join(timeout)
+        self._thread = None
+
+    def run_once(self, now: datetime | None = None) -> RetentionReport:
+        now = now or datetime.utcnow()
+        with self._run_lock:
+            report = RetentionReport(started_at=datetime.utcnow())
+            sqlite = engine.dialect.name == "sqlite"
+            pages_before = self._page_count() if sqlite else 0
+            for policy in self.policies:
+                if policy.days <= 0 or self._stop.is_set():
+                    continue
+                report.deleted[policy.name] = self._expire(policy, now - timedelta(days=policy.days))
+
+            if report.deleted.get("sensor_data"):
+                with SessionLocal() as db, unit_of_work(db):
+                    reading_counter_crud.prune(db)
+            if sqlite:
+                self._vacuum(report, pages_before)
+            report.finished_at = datetime.utcnow()
+
+        with self._lock:
+            self._runs += 1
+            self._last_report = report
+        logger.info(
+            "Retention deleted %s rows (%s), freed %s bytes",
+            sum(report.deleted.values()),
+            ", ".join(f"{name}={count}" for name, count in report.deleted.items() if count) or "nothing expired",
+            report.bytes_freed,
+        )
+        return report
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "enabled": self.running,
+                "interval_minutes": self.interval / 60,
+                "batch_rows": self.batch_rows,
+                "policies": {policy.name: policy.days for policy in self.policies},
+                "runs": self._runs,
+                "failures": self._failures,
+                "last_error": self._last_error,
+                "last_run": self._last_report.as_dict() if self._last_report else None,
+            }
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception as exc:
+                logger.exception("Retention run failed")
+                with self._lock:
+                    self._failures += 1
+                    self._last_error = str(exc)
+            self._stop.wait(self.interval)
+
+    def _expire(self, policy: RetentionPolicy, cutoff: datetime) -> int:
+        deleted = 0
+        while not self._stop.is_set():
+            with SessionLocal() as db, unit_of_work(db):
+                count = policy.delete_batch(db, cutoff, self.batch_rows)
+            deleted += count
+            if count == 0:
+                break
+            time.sleep(self.batch_pause)
+        return deleted
+
+    def _sqlite_pragma(self, connection: Any, name: str) -> Any:
+        return connection.exec_driver_sql(f"PRAGMA {name}").scalar()
+
+    def _page_count(self) -> int:
+        with engine.connect() as connection:
+            return self._sqlite_pragma(connection, "page_count")
+
+    def _vacuum(self, report: RetentionReport, pages_before: int) -> None:
+        with engine.connect() as connection:
+            page_size = self._sqlite_pragma(connection, "page_size")
+            mode = self._sqlite_pragma(connection, "auto_vacuum")
+            report.auto_vacuum = {0: "none", 1: "full", 2: "incremental"}.get(mode)
+            if report.auto_vacuum == "incremental":
+                while self._sqlite_pragma(connection, "freelist_count") and not self._stop.is_set():
+                    # The sqlite3 driver steps a statement that returns no columns only once, freeing a
+                    # single page; executescript runs it to completion, freeing up to vacuum_pages.
+                    connection.connection.driver_connection.executescript(
+                        f"PRAGMA incremental_vacuum({self.vacuum_pages});"
+                    )
+                    connection.commit()
+                    time.sleep(self.batch_pause)
+            pages_after = self._sqlite_pragma(connection, "page_count")
+            report.bytes_freed = max(pages_before - pages_after, 0) * page_size
+            report.bytes_reusable = self._sqlite_pragma(connection, "freelist_count") * page_size
+
+
+retention_engine = RetentionEngine(
+    configured_policies(),
+    settings.retention_interval_minutes,
+    settings.retention_batch_rows,
+    settings.retention_batch_pause_ms,
+    settings.retention_vacuum_pages,
+)
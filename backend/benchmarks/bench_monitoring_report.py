@@ -0,0 +1,116 @@
+"""Latency of the monitoring report's reading query before and after narrowing it.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_monitoring_report [--sizes 1000 10000 100000] [--runs 50]
+
+Uses a throwaway SQLite database unless DATABASE_URL is set, growing it to
+each size in turn. The reading buffer is disabled so every report reads
+from the database. "before" is a copy of the old code: at least 100 rows
+with thresholds joined, copied into separate chart and log lists. "after"
+fetches exactly the rows and columns the report shows, once, and both
+lists share them.
+"""
+
+import argparse
+import math
+import os
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import Any
+
+if "DATABASE_URL" not in os.environ:
+    os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/bench.db"
+os.environ["READING_BUFFER_SIZE"] = "0"
+
+from sqlalchemy.orm import Session  # noqa: E402
+
+from app.api.routes import _report_readings  # noqa: E402
+from app.core.database import SessionLocal, unit_of_work  # noqa: E402
+from app.core.migrations import upgrade_database  # noqa: E402
+from app.crud import sensor_crud  # noqa: E402
+
+
+def legacy_readings(db: Session, points: int, log_items: int) -> tuple[list, list, tuple]:
+    history_desc = sensor_crud.get_page_rows(db, limit=max(points, log_items, 100))
+    sample = history_desc[: max(points, log_items)]
+    averages = (
+        sum(item["temperature"] for item in sample) / len(sample),
+        sum(item["moisture"] for item in sample) / len(sample),
+        sum(float(item["ph"] or 7.0) for item in sample) / len(sample),
+    )
+
+    def copy(item: dict[str, Any]) -> dict[str, Any]:
+        return {
+            "timestamp": item["timestamp"],
+            "temperature": item["temperature"],
+            "moisture": item["moisture"],
+            "ph": float(item["ph"] or 7.0),
+        }
+
+    return [copy(item) for item in reversed(history_desc[:points])], [copy(item) for item in history_desc[:log_items]], averages
+
+
+def narrow_readings(db: Session, points: int, log_items: int) -> tuple[list, list, tuple]:
+    history_desc, averages = _report_readings(db, max(points, log_items))
+    return history_desc[:points][::-1], history_desc[:log_items], tuple(averages.values())
+
+
+def same_report(before: tuple[list, list, tuple], after: tuple[list, list, tuple]) -> bool:
+    # fmean sums exactly, so averages may differ from a running sum in the last bits.
+    return before[:2] == after[:2] and all(map(math.isclose, before[2], after[2]))
+
+
+def grow(target: int, current: int, start: datetime) -> None:
+    with SessionLocal() as db, unit_of_work(db):
+        for offset in range(current, target, 5000):
+            sensor_crud.create_multi(db, [
+                {
+                    "timestamp": start + timedelta(seconds=30 * (offset + i)),
+                    "temperature": 24.0 + (i % 7) * 0.1,
+                    "moisture": 60 + i % 10,
+                    "ph": None if i % 13 == 0 else 6.7,
+                    "device_id": f"esp32-{i % 4}",
+                }
+                for i in range(min(5000, target - offset))
+            ])
+
+
+def measure(build: Any, points: int, log_items: int, runs: int) -> float:
+    samples = []
+    with SessionLocal() as db:
+        build(db, points, log_items)
+        for _ in range(runs):
+            started = time.perf_counter()
+            build(db, points, log_items)
+            samples.append((time.perf_counter() - started) * 1000)
+            db.rollback()
+    return statistics.median(samples)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--runs", type=int, default=50)
+    args = parser.parse_args()
+
+    upgrade_database()
+    start = datetime.utcnow() - timedelta(seconds=30 * max(args.sizes))
+    cases = [(20, 10), (100, 10), (500, 100)]
+    current = 0
+    print(f"{'readings':>9} {'points/log':>11} {'before ms':>10} {'after ms':>10} {'speedup':>8}")
+    for size in sorted(args.sizes):
+        grow(size, current, start)
+        current = size
+        for points, log_items in cases:
+            with SessionLocal() as db:
+                assert same_report(legacy_readings(db, points, log_items), narrow_readings(db, points, log_items))
+            before = measure(legacy_readings, points, log_items, args.runs)
+            after = measure(narrow_readings, points, log_items, args.runs)
+            print(f"{size:>9} {f'{points}/{log_items}':>11} {before:>10.2f} {after:>10.2f} {before / after:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+"""Latency of the list endpoints before and after the column-tuple + orjson path.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_serialization [--readings 20000] [--alerts 500] [--runs 30]
+
+Uses a throwaway SQLite database unless DATABASE_URL is set. The "before"
+numbers come from legacy copies of the handlers, registered under /legacy,
+that load ORM entities, build a Pydantic model per row and let FastAPI
+serialize the response model. The legacy report also reads the settings,
+actuator state and runtime mode rows on every request and counts the
+readings table, as the original handler did.
+"""
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+if "DATABASE_URL" not in os.environ:
+    os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/bench.db"
+
+from fastapi import APIRouter, Depends, Query  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import desc, func, select  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+from app.api.routes import (  # noqa: E402
+    _get_or_create_control_state_row,
+    _get_or_create_runtime_mode_row,
+    _get_or_create_settings_row,
+    _parameter_status,
+    _serialize_control_state,
+    _serialize_runtime_mode,
+    _serialize_thresholds,
+)
+from app.core.database import SessionLocal, get_db, unit_of_work  # noqa: E402
+from app.crud import alert_crud, sensor_crud  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models import Alert, SensorData  # noqa: E402
+from app.schemas import AlertListResponse, AlertOut, SensorHistoryResponse, SensorOut  # noqa: E402
+
+legacy = APIRouter()
+
+
+@legacy.get("/sensor/history", response_model=SensorHistoryResponse)
+def legacy_history(limit: int = Query(default=100, le=2000), db: Session = Depends(get_db)) -> SensorHistoryResponse:
+    items = db.execute(select(SensorData).order_by(desc(SensorData.timestamp)).limit(limit)).scalars().all()
+    serialized = [SensorOut.model_validate(item) for item in items]
+    return SensorHistoryResponse(items=serialized, count=len(serialized))
+
+
+@legacy.get("/alerts", response_model=AlertListResponse)
+def legacy_alerts(db: Session = Depends(get_db)) -> AlertListResponse:
+    alerts = db.execute(select(Alert).where(Alert.resolved == False).order_by(desc(Alert.timestamp))).scalars().all()  # noqa: E712
+    serialized = [AlertOut.model_validate(alert) for alert in alerts]
+    return AlertListResponse(items=serialized, count=len(serialized))
+
+
+@legacy.get("/monitoring/report")
+def legacy_report(points: int = 20, log_items: int = 10, db: Session = Depends(get_db)) -> dict:
+    settings = _get_or_create_settings_row(db)
+    state = _get_or_create_control_state_row(db)
+    runtime_mode = _get_or_create_runtime_mode_row(db)
+
+    history_desc = sensor_crud.get_multi(db, limit=max(points, log_items, 100))
+    latest = history_desc[0] if history_desc else None
+    total_readings = db.execute(select(func.count(SensorData.id))).scalar_one() or 0
+
+    if latest:
+        temp_status = _parameter_status(latest.temperature, settings.temp_min, settings.temp_max)
+        moisture_status = _parameter_status(float(latest.moisture), settings.moisture_min, settings.moisture_max)
+        ph_status = _parameter_status(float(latest.ph or 7.0), settings.ph_min, settings.ph_max)
+    else:
+        temp_status = moisture_status = ph_status = "unknown"
+
+    sample = history_desc[: max(points, log_items)]
+    if sample:
+        avg_temp = round(sum(item.temperature for item in sample) / len(sample), 2)
+        avg_moisture = round(sum(item.moisture for item in sample) / len(sample), 1)
+        avg_ph = round(sum(float(item.ph or 7.0) for item in sample) / len(sample), 2)
+    else:
+        avg_temp = avg_moisture = avg_ph = None
+
+    def row(item: SensorData) -> dict:
+        return {
+            "timestamp": item.timestamp,
+            "temperature": item.temperature,
+            "moisture": item.moisture,
+            "ph": float(item.ph or 7.0),
+        }
+
+    return {
+        "generated_at": datetime.utcnow(),
+        "runtime_mode": _serialize_runtime_mode(runtime_mode),
+        "targets": _serialize_thresholds(settings),
+        "control_state": _serialize_control_state(state),
+        "current": {
+            "temperature": latest.temperature if latest else None,
+            "moisture": latest.moisture if latest else None,
+            "ph": float(latest.ph or 7.0) if latest else None,
+            "timestamp": latest.timestamp if latest else None,
+        },
+        "deviation": {
+            "temperature": {
+                "status": temp_status,
+                "current": latest.temperature if latest else None,
+                "target": round((settings.temp_min + settings.temp_max) / 2, 2),
+            },
+            "moisture": {
+                "status": moisture_status,
+                "current": latest.moisture if latest else None,
+                "target": round((settings.moisture_min + settings.moisture_max) / 2, 1),
+            },
+            "ph": {
+                "status": ph_status,
+                "current": float(latest.ph or 7.0) if latest else None,
+                "target": round((settings.ph_min + settings.ph_max) / 2, 2),
+            },
+        },
+        "live_series": [row(item) for item in reversed(history_desc[:points])],
+        "readings_log": [row(item) for item in history_desc[:log_items]],
+        "report": {
+            "status": {"temperature": temp_status, "moisture": moisture_status, "ph": ph_status},
+            "averages": {"temperature": avg_temp, "moisture": avg_moisture, "ph": avg_ph},
+            "total_readings": total_readings,
+            "active_actuators": sum([state.fan, state.heater, state.humidifier, state.ph_actuator]),
+            "max_actuators": 4,
+        },
+    }
+
+
+app.include_router(legacy, prefix="/legacy")
+
+
+def seed(readings: int, alerts: int) -> None:
+    start = datetime.utcnow() - timedelta(seconds=30 * readings)
+    with SessionLocal() as db, unit_of_work(db):
+        for offset in range(0, readings, 5000):
+            sensor_crud.create_multi(db, [
+                {
+                    "timestamp": start + timedelta(seconds=30 * (offset + i)),
+                    "temperature": 24.0 + (i % 7) * 0.1,
+                    "moisture": 60 + i % 10,
+                    "ph": 6.7,
+                    "device_id": f"esp32-{i % 4}",
+                    "location": "room-1",
+                }
+                for i in range(min(5000, readings - offset))
+            ])
+        alert_crud.create_multi(db, [
+            {
+                "severity": "warning",
+                "parameter": "temperature",
+                "message": "Temperature above target range",
+                "threshold_value": 26.0,
+                "current_value": 27.1,
+                "device_id": f"esp32-{i}",
+            }
+            for i in range(alerts)
+        ])
+
+
+def measure(client: TestClient, path: str, params: dict, runs: int) -> float:
+    client.get(path, params=params).raise_for_status()
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        client.get(path, params=params).raise_for_status()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--readings", type=int, default=20000)
+    parser.add_argument("--alerts", type=int, default=500)
+    parser.add_argument("--runs", type=int, default=30)
+    args = parser.parse_args()
+
+    cases = [
+        ("/sensor/history", {"limit": 2000}),
+        ("/sensor/history", {"limit": 100}),
+        ("/alerts", {}),
+        ("/monitoring/report", {"points": 500, "log_items": 100}),
+    ]
+    with TestClient(app) as client:
+        seed(args.readings, args.alerts)
+        print(f"{'endpoint':<44} {'before ms':>10} {'after ms':>10} {'speedup':>8}")
+        for path, params in cases:
+            before = measure(client, f"/legacy{path}", params, args.runs)
+            after = measure(client, f"/api{path}", params, args.runs)
+            label = path + ("?" + "&".join(f"{k}={v}" for k, v in params.items()) if params else "")
+            print(f"{label:<44} {before:>10.2f} {after:>10.2f} {before / after:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
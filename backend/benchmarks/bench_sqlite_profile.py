@@ -0,0 +1,142 @@
+"""Ingest throughput and report latency with the SQLite profile on and off.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_sqlite_profile [--writers 4] [--readers 4] [--seconds 10] [--seed 20000]
+
+Each configuration runs in a fresh subprocess against its own throwaway
+database file, because the engine reads its settings at import time. Writer
+threads store one reading per transaction through the same path as
+``POST /api/sensor/ingest``; reader threads build ``/monitoring/report``
+(points=500, log_items=100) on their own sessions. The reading buffer is
+disabled so every report reads from the database.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+CONFIGURATIONS = [
+    ("profile off, NullPool", {"SQLITE_PERFORMANCE_PROFILE": "false", "DB_POOL_CLASS": "null"}),
+    ("profile off, QueuePool", {"SQLITE_PERFORMANCE_PROFILE": "false", "DB_POOL_CLASS": "queue"}),
+    ("profile on, QueuePool", {"SQLITE_PERFORMANCE_PROFILE": "true", "DB_POOL_CLASS": "queue"}),
+]
+
+
+def run(args: argparse.Namespace) -> dict:
+    from app.api.routes import (
+        _build_monitoring_report,
+        _get_or_create_control_state,
+        _get_or_create_runtime_mode,
+        _get_or_create_settings,
+        _save_sensor_payload,
+    )
+    from app.core.database import SessionLocal, unit_of_work
+    from app.core.migrations import upgrade_database
+    from app.crud import sensor_crud
+
+    upgrade_database()
+    start = datetime.utcnow() - timedelta(seconds=30 * args.seed)
+    with SessionLocal() as db, unit_of_work(db):
+        sensor_crud.create_multi(db, [
+            {"timestamp": start + timedelta(seconds=30 * i), "temperature": 24.0, "moisture": 65, "ph": 6.7}
+            for i in range(args.seed)
+        ])
+        # Create the singleton config rows up front instead of racing for them.
+        _get_or_create_settings(db)
+        _get_or_create_control_state(db)
+        _get_or_create_runtime_mode(db)
+
+    stop = threading.Event()
+    written = [0] * args.writers
+    report_ms: list[float] = []
+    errors: list[str] = []
+
+    def writer(index: int) -> None:
+        while not stop.is_set():
+            db = SessionLocal()
+            try:
+                settings = _get_or_create_settings(db)
+                _save_sensor_payload(db, {"temperature": 24.5, "moisture": 65, "ph": 6.8, "device_id": f"w{index}"}, settings)
+                written[index] += 1
+            except Exception as exc:  # noqa: BLE001 - counted and reported
+                errors.append(type(exc).__name__ + ": " + str(exc)[:300].replace("\n", " "))
+            finally:
+                db.close()
+
+    def reader() -> None:
+        while not stop.is_set():
+            db = SessionLocal()
+            try:
+                started = time.perf_counter()
+                _build_monitoring_report(db, 500, 100)
+                report_ms.append((time.perf_counter() - started) * 1000)
+            except Exception as exc:  # noqa: BLE001 - counted and reported
+                errors.append(type(exc).__name__ + ": " + str(exc)[:300].replace("\n", " "))
+            finally:
+                db.close()
+
+    threads = [threading.Thread(target=writer, args=(i,)) for i in range(args.writers)]
+    threads += [threading.Thread(target=reader) for _ in range(args.readers)]
+    began = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - began
+
+    report_ms.sort()
+    return {
+        "ingest_per_s": sum(written) / elapsed,
+        "report_p50": statistics.median(report_ms) if report_ms else None,
+        "report_p95": report_ms[int(len(report_ms) * 0.95)] if report_ms else None,
+        "reports": len(report_ms),
+        "errors": len(errors),
+        "first_error": errors[0] if errors else "",
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--seed", type=int, default=20000)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run(args)))
+        return
+
+    print(f"{'configuration':<36} {'ingest/s':>9} {'report p50':>11} {'report p95':>11} {'errors':>7}")
+    for label, overrides in CONFIGURATIONS:
+        env = {
+            **os.environ,
+            **overrides,
+            "DATABASE_URL": f"sqlite:///{tempfile.mkdtemp()}/bench.db",
+            "READING_BUFFER_SIZE": "0",
+            "LOG_LEVEL": "WARNING",
+        }
+        command = [sys.executable, "-m", "benchmarks.bench_sqlite_profile", "--child"] + [
+            f"--{name}={getattr(args, name)}" for name in ("writers", "readers", "seconds", "seed")
+        ]
+        output = subprocess.run(command, env=env, capture_output=True, text=True, check=True).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        p50, p95 = (f"{result[key]:.1f}ms" if result[key] is not None else "-" for key in ("report_p50", "report_p95"))
+        print(f"{label:<36} {result['ingest_per_s']:>9.0f} {p50:>11} {p95:>11} {result['errors']:>7}")
+        if result["first_error"]:
+            print(f"    first error: {result['first_error']}")
+
+
+if __name__ == "__main__":
+    main()
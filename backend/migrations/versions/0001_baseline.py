@@ -0,0 +1,154 @@
+"""Baseline schema
+
+Databases created before migrations existed were built with
+Base.metadata.create_all, so this revision only creates the tables and
+indexes that are missing. Running it on such a database brings it to the
+same state as a fresh install.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def _tables() -> dict[str, tuple[list[sa.Column], list[tuple[str, list[str]]]]]:
+    return {
+        "sensor_data": (
+            [
+                sa.Column("id", sa.Integer(), primary_key=True),
+                sa.Column("timestamp", sa.DateTime(timezone=True), server_default=sa.func.now()),
+                sa.Column("temperature", sa.Float(), nullable=False),
+                sa.Column("moisture", sa.Integer(), nullable=False),
+                sa.Column("ph", sa.Float(), nullable=True),
+                sa.Column("temp_min", sa.Float(), nullable=True),
+                sa.Column("temp_max", sa.Float(), nullable=True),
+                sa.Column("moisture_min", sa.Integer(), nullable=True),
+                sa.Column("moisture_max", sa.Integer(), nullable=True),
+                sa.Column("ph_min", sa.Float(), nullable=True),
+                sa.Column("ph_max", sa.Float(), nullable=True),
+                sa.Column("device_id", sa.String(), nullable=True),
+                sa.Column("location", sa.String(), nullable=True),
+            ],
+            [
+                ("ix_sensor_data_id", ["id"]),
+                ("ix_sensor_data_timestamp", ["timestamp"]),
+                ("ix_sensor_data_device_id_timestamp_id", ["device_id", "timestamp", "id"]),
+            ],
+        ),
+        "alerts": (
+            [
+                sa.Column("id", sa.Integer(), primary_key=True),
+                sa.Column("timestamp", sa.DateTime(timezone=True), server_default=sa.func.now()),
+                sa.Column("severity", sa.String(), nullable=False),
+                sa.Column("parameter", sa.String(), nullable=False),
+                sa.Column("message", sa.String(), nullable=False),
+                sa.Column("threshold_value", sa.Float(), nullable=True),
+                sa.Column("current_value", sa.Float(), nullable=True),
+                sa.Column("resolved", sa.Boolean(), nullable=True),
+                sa.Column("resolved_at", sa.DateTime(timezone=True), nullable=True),
+            ],
+            [("ix_alerts_id", ["id"]), ("ix_alerts_timestamp", ["timestamp"])],
+        ),
+        "actuator_logs": (
+            [
+                sa.Column("id", sa.Integer(), primary_key=True),
+                sa.Column("timestamp", sa.DateTime(timezone=True), server_default=sa.func.now()),
+                sa.Column("actuator_type", sa.String(), nullable=False),
+                sa.Column("action", sa.String(), nullable=False),
+                sa.Column("duration_seconds", sa.Float(), nullable=True),
+                sa.Column("triggered_by", sa.String(), nullable=False),
+                sa.Column("sensor_temperature", sa.Float(), nullable=True),
+                sa.Column("sensor_moisture", sa.Integer(), nullable=True),
+                sa.Column("sensor_ph", sa.Float(), nullable=True),
+            ],
+            [("ix_actuator_logs_id", ["id"]), ("ix_actuator_logs_timestamp", ["timestamp"])],
+        ),
+        "system_settings": (
+            [
+                sa.Column("id", sa.Integer(), primary_key=True),
+                sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+                sa.Column("temp_min", sa.Float(), nullable=False),
+                sa.Column("temp_max", sa.Float(), nullable=False),
+                sa.Column("moisture_min", sa.Integer(), nullable=False),
+                sa.Column("moisture_max", sa.Integer(), nullable=False),
+                sa.Column("ph_min", sa.Float(), nullable=False),
+                sa.Column("ph_max", sa.Float(), nullable=False),
+            ],
+            [("ix_system_settings_id", ["id"])],
+        ),
+        "control_state": (
+            [
+                sa.Column("id", sa.Integer(), primary_key=True),
+                sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+                sa.Column("mode", sa.String(), nullable=False),
+                sa.Column("fan", sa.Boolean(), nullable=False),
+                sa.Column("heater", sa.Boolean(), nullable=False),
+                sa.Column("humidifier", sa.Boolean(), nullable=False),
+                sa.Column("ph_actuator", sa.Boolean(), nullable=False),
+            ],
+            [("ix_control_state_id", ["id"])],
+        ),
+        "runtime_mode": (
+            [
+                sa.Column("id", sa.Integer(), primary_key=True),
+                sa.Column("mode", sa.String(), nullable=False),
+                sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+            ],
+            [("ix_runtime_mode_id", ["id"])],
+        ),
+        "reading_counters": (
+            [
+                sa.Column("scope", sa.String(), primary_key=True),
+                sa.Column("key", sa.String(), primary_key=True),
+                sa.Column("count", sa.Integer(), nullable=False),
+            ],
+            [],
+        ),
+        "sensor_rollups": (
+            [
+                sa.Column("granularity", sa.String(), primary_key=True),
+                sa.Column("bucket_start", sa.DateTime(), primary_key=True),
+                sa.Column("device_id", sa.String(), primary_key=True),
+                sa.Column("count", sa.Integer(), nullable=False),
+                sa.Column("temperature_sum", sa.Float(), nullable=False),
+                sa.Column("temperature_sumsq", sa.Float(), nullable=False),
+                sa.Column("temperature_min", sa.Float(), nullable=True),
+                sa.Column("temperature_max", sa.Float(), nullable=True),
+                sa.Column("moisture_sum", sa.Float(), nullable=False),
+                sa.Column("moisture_sumsq", sa.Float(), nullable=False),
+                sa.Column("moisture_min", sa.Float(), nullable=True),
+                sa.Column("moisture_max", sa.Float(), nullable=True),
+                sa.Column("ph_count", sa.Integer(), nullable=False),
+                sa.Column("ph_sum", sa.Float(), nullable=False),
+                sa.Column("ph_sumsq", sa.Float(), nullable=False),
+                sa.Column("ph_min", sa.Float(), nullable=True),
+                sa.Column("ph_max", sa.Float(), nullable=True),
+            ],
+            [],
+        ),
+    }
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    for table, (columns, indexes) in _tables().items():
+        if not inspector.has_table(table):
+            op.create_table(table, *columns)
+            existing = set()
+        else:
+            existing = {index["name"] for index in inspector.get_indexes(table)}
+        for name, index_columns in indexes:
+            if name not in existing:
+                op.create_index(name, table, index_columns)
+
+
+def downgrade() -> None:
+    for table in reversed(list(_tables())):
+        op.drop_table(table)
@@ -0,0 +1,107 @@
+"""Move per-reading thresholds into threshold_profiles
+
+Every distinct (temp_min, temp_max, moisture_min, moisture_max, ph_min,
+ph_max) set found in sensor_data becomes one profile, numbered in order of
+first use, and each reading keeps only the profile id. The sensor_data table
+is rebuilt without the six threshold columns; run VACUUM afterwards to hand
+the freed pages back to the filesystem.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+# Model defaults of the old columns; rows written without them read back as these.
+THRESHOLD_DEFAULTS = {
+    "temp_min": 22.0,
+    "temp_max": 26.0,
+    "moisture_min": 60,
+    "moisture_max": 70,
+    "ph_min": 6.5,
+    "ph_max": 7.0,
+}
+
+
+def _coalesced(prefix: str = "") -> str:
+    return ", ".join(f"COALESCE({prefix}{name}, {default}) AS {name}" for name, default in THRESHOLD_DEFAULTS.items())
+
+
+def upgrade() -> None:
+    op.create_table(
+        "threshold_profiles",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("temp_min", sa.Float(), nullable=False),
+        sa.Column("temp_max", sa.Float(), nullable=False),
+        sa.Column("moisture_min", sa.Integer(), nullable=False),
+        sa.Column("moisture_max", sa.Integer(), nullable=False),
+        sa.Column("ph_min", sa.Float(), nullable=False),
+        sa.Column("ph_max", sa.Float(), nullable=False),
+    )
+    op.create_index("ix_threshold_profiles_id", "threshold_profiles", ["id"])
+
+    names = ", ".join(THRESHOLD_DEFAULTS)
+    op.execute(
+        f"""
+        INSERT INTO threshold_profiles (created_at, {names})
+        SELECT MIN(timestamp), {names}
+        FROM (SELECT timestamp, {_coalesced()} FROM sensor_data) AS readings
+        GROUP BY {names}
+        ORDER BY MIN(timestamp)
+        """
+    )
+
+    with op.batch_alter_table("sensor_data") as batch:
+        batch.add_column(sa.Column("threshold_profile_id", sa.Integer(), nullable=True))
+
+    matches = " AND ".join(
+        f"threshold_profiles.{name} = COALESCE(sensor_data.{name}, {default})"
+        for name, default in THRESHOLD_DEFAULTS.items()
+    )
+    op.execute(
+        f"""
+        UPDATE sensor_data SET threshold_profile_id = (
+            SELECT MIN(threshold_profiles.id) FROM threshold_profiles WHERE {matches}
+        )
+        """
+    )
+
+    with op.batch_alter_table("sensor_data") as batch:
+        for name in THRESHOLD_DEFAULTS:
+            batch.drop_column(name)
+        batch.create_foreign_key(
+            "fk_sensor_data_threshold_profile_id", "threshold_profiles", ["threshold_profile_id"], ["id"]
+        )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("sensor_data") as batch:
+        batch.drop_constraint("fk_sensor_data_threshold_profile_id", type_="foreignkey")
+        batch.add_column(sa.Column("temp_min", sa.Float(), nullable=True))
+        batch.add_column(sa.Column("temp_max", sa.Float(), nullable=True))
+        batch.add_column(sa.Column("moisture_min", sa.Integer(), nullable=True))
+        batch.add_column(sa.Column("moisture_max", sa.Integer(), nullable=True))
+        batch.add_column(sa.Column("ph_min", sa.Float(), nullable=True))
+        batch.add_column(sa.Column("ph_max", sa.Float(), nullable=True))
+
+    for name in THRESHOLD_DEFAULTS:
+        op.execute(
+            f"""
+            UPDATE sensor_data SET {name} = (
+                SELECT threshold_profiles.{name} FROM threshold_profiles
+                WHERE threshold_profiles.id = sensor_data.threshold_profile_id
+            )
+            """
+        )
+
+    with op.batch_alter_table("sensor_data") as batch:
+        batch.drop_column("threshold_profile_id")
+    op.drop_index("ix_threshold_profiles_id", table_name="threshold_profiles")
+    op.drop_table("threshold_profiles")
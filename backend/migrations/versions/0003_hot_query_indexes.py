@@ -0,0 +1,32 @@
+"""Indexes for the unresolved-alert list and per-actuator history
+
+sensor_data already has (device_id, timestamp, id), which also serves
+(device_id, timestamp) lookups, so it gets no new index here.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_alerts_unresolved_timestamp",
+        "alerts",
+        ["timestamp"],
+        sqlite_where=sa.text("resolved = 0"),
+        postgresql_where=sa.text("NOT resolved"),
+    )
+    op.create_index("ix_actuator_logs_actuator_type_timestamp", "actuator_logs", ["actuator_type", "timestamp"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_actuator_logs_actuator_type_timestamp", table_name="actuator_logs")
+    op.drop_index("ix_alerts_unresolved_timestamp", table_name="alerts")
@@ -0,0 +1,67 @@
+"""Track one alert per (device, parameter) excursion
+
+Adds the device an alert belongs to, the furthest value seen while it was
+open, how many readings were out of band and when the last one arrived.
+Existing alerts count as a single occurrence peaking at their current value.
+
+At most one alert per (device, parameter) may be open, enforced by a
+partial unique index so API workers cannot each open their own. The
+stateless engine could leave several open, so all but the newest per key
+are resolved first.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("alerts") as batch:
+        batch.add_column(sa.Column("device_id", sa.String(), nullable=True))
+        batch.add_column(sa.Column("peak_value", sa.Float(), nullable=True))
+        batch.add_column(sa.Column("occurrences", sa.Integer(), nullable=False, server_default="1"))
+        batch.add_column(sa.Column("last_seen_at", sa.DateTime(timezone=True), nullable=True))
+    op.execute("UPDATE alerts SET peak_value = current_value, last_seen_at = timestamp")
+
+    alerts = sa.table(
+        "alerts",
+        sa.column("id", sa.Integer),
+        sa.column("parameter", sa.String),
+        sa.column("device_id", sa.String),
+        sa.column("resolved", sa.Boolean),
+        sa.column("resolved_at", sa.DateTime),
+    )
+    newest = (
+        sa.select(sa.func.max(alerts.c.id))
+        .where(alerts.c.resolved == sa.false())
+        .group_by(sa.func.coalesce(alerts.c.device_id, ""), alerts.c.parameter)
+    )
+    op.execute(
+        alerts.update()
+        .where(alerts.c.resolved == sa.false(), alerts.c.id.not_in(newest))
+        .values(resolved=True, resolved_at=sa.func.now())
+    )
+    op.create_index(
+        "uq_alerts_open_device_parameter",
+        "alerts",
+        [sa.text("coalesce(device_id, '')"), "parameter"],
+        unique=True,
+        sqlite_where=sa.text("resolved = 0"),
+        postgresql_where=sa.text("NOT resolved"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("uq_alerts_open_device_parameter", table_name="alerts")
+    with op.batch_alter_table("alerts") as batch:
+        batch.drop_column("last_seen_at")
+        batch.drop_column("occurrences")
+        batch.drop_column("peak_value")
+        batch.drop_column("device_id")
@@ -0,0 +1,30 @@
+"""Add resource_versions for conditional GETs
+
+One row per resource (readings, alerts) whose version is bumped in the same
+transaction as every write to it. Read endpoints derive ETag and
+Last-Modified from it without touching the resource's own table.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "resource_versions",
+        sa.Column("name", sa.String(), primary_key=True),
+        sa.Column("version", sa.Integer(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("resource_versions")
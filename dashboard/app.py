@@ -1,5 +1,10 @@
 import json
 import os
+import threading
+import time
+from collections import deque
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from typing import Any
 
@@ -7,6 +12,7 @@ import pandas as pd
 import plotly.graph_objects as go
 import requests
 import streamlit as st
+from requests.adapters import HTTPAdapter
 
 try:
     from streamlit_autorefresh import st_autorefresh
@@ -16,14 +22,30 @@ except Exception:  # pragma: no cover
 
 DEFAULT_BACKEND_URL = os.getenv("BACKEND_API_URL", "http://localhost:8000/api")
 REQUEST_TIMEOUT = 8
+STREAM_READ_TIMEOUT = 60  # well above the backend's keep-alive interval
+STREAM_RETRY_SECONDS = 3
+LIVE_CHECK_INTERVAL_MS = 1000
+HTTP_POOL_SIZE = 8
+LIVE_WINDOW_OPTIONS = [20, 100, 300, 1000, 2000]
+SLOW_RESOURCE_TTL_SECONDS = 30  # targets and runtime mode; push events and our own edits refresh them sooner
 
 
 st.set_page_config(page_title="Mushroom Monitoring Dashboard", layout="wide")
 
 
+@st.cache_resource
+def http_session() -> requests.Session:
+    # One keep-alive pool for every rerun and every browser session of this server.
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
 def api_get(base_url: str, path: str) -> tuple[dict[str, Any] | None, str | None]:
     try:
-        response = requests.get(f"{base_url}{path}", timeout=REQUEST_TIMEOUT)
+        response = http_session().get(f"{base_url}{path}", timeout=REQUEST_TIMEOUT)
         response.raise_for_status()
         return response.json(), None
     except requests.RequestException as exc:
@@ -32,7 +54,7 @@ def api_get(base_url: str, path: str) -> tuple[dict[str, Any] | None, str | None
 
 def api_post(base_url: str, path: str, payload: dict[str, Any] | None = None) -> tuple[dict[str, Any] | None, str | None]:
     try:
-        response = requests.post(f"{base_url}{path}", json=payload or {}, timeout=REQUEST_TIMEOUT)
+        response = http_session().post(f"{base_url}{path}", json=payload or {}, timeout=REQUEST_TIMEOUT)
         response.raise_for_status()
         return response.json() if response.content else {}, None
     except requests.RequestException as exc:
@@ -41,7 +63,7 @@ def api_post(base_url: str, path: str, payload: dict[str, Any] | None = None) ->
 
 def api_put(base_url: str, path: str, payload: dict[str, Any]) -> tuple[dict[str, Any] | None, str | None]:
     try:
-        response = requests.put(f"{base_url}{path}", json=payload, timeout=REQUEST_TIMEOUT)
+        response = http_session().put(f"{base_url}{path}", json=payload, timeout=REQUEST_TIMEOUT)
         response.raise_for_status()
         return response.json() if response.content else {}, None
     except requests.RequestException as exc:
@@ -92,6 +114,209 @@ def refresh_page() -> None:
     st.experimental_rerun()
 
 
+class LiveEvents:
+    """Listens to the backend's ``/stream`` and counts committed changes, so reruns can skip refetching."""
+
+    def __init__(self, base_url: str) -> None:
+        self.base_url = base_url
+        self.version = 0
+        self.connected = False
+        self._last_event_id: str | None = None
+        self._counts: dict[str, int] = {}
+        self._gaps = 0
+        threading.Thread(target=self._run, name="live-events", daemon=True).start()
+
+    def generation(self, event_type: str) -> tuple[int, int] | None:
+        """Changes to one event type seen so far; ``None`` while the stream is down."""
+        if not self.connected:
+            return None
+        return self._gaps, self._counts.get(event_type, 0)
+
+    def _run(self) -> None:
+        while True:
+            headers = {"Last-Event-ID": self._last_event_id} if self._last_event_id else {}
+            try:
+                with requests.get(
+                    f"{self.base_url}/stream",
+                    headers=headers,
+                    stream=True,
+                    timeout=(REQUEST_TIMEOUT, STREAM_READ_TIMEOUT),
+                ) as response:
+                    response.raise_for_status()
+                    self.connected = True
+                    for line in response.iter_lines(decode_unicode=True):
+                        if line.startswith("id:"):
+                            self._last_event_id = line[3:].strip()
+                        elif line.startswith("event:"):
+                            event_type = line[6:].strip()
+                            if event_type == "reset":
+                                self._gaps += 1
+                            self._counts[event_type] = self._counts.get(event_type, 0) + 1
+                            self.version += 1
+            except requests.RequestException:
+                pass
+            # Anything may have changed while disconnected.
+            self.connected = False
+            self._gaps += 1
+            self.version += 1
+            time.sleep(STREAM_RETRY_SECONDS)
+
+
+@st.cache_resource
+def live_events(base_url: str) -> LiveEvents:
+    return LiveEvents(base_url)
+
+
+class SlowResourceCache:
+    """Recent successful GETs of rarely changing resources, shared by every session of this server."""
+
+    def __init__(self, ttl_seconds: float) -> None:
+        self.ttl = ttl_seconds
+        self._lock = threading.Lock()
+        self._items: dict[tuple[Any, ...], tuple[float, dict[str, Any]]] = {}
+
+    def get(self, base_url: str, path: str, generation: Any = None) -> tuple[dict[str, Any] | None, str | None]:
+        key = (base_url, path, generation)
+        with self._lock:
+            cached = self._items.get(key)
+        if cached and cached[0] > time.monotonic():
+            return cached[1], None
+        data, error = api_get(base_url, path)
+        if error is None:
+            with self._lock:
+                self._items = {item: value for item, value in self._items.items() if item[:2] != key[:2]}
+                self._items[key] = (time.monotonic() + self.ttl, data)
+        return data, error
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+
+
+@st.cache_resource
+def slow_resources() -> SlowResourceCache:
+    return SlowResourceCache(SLOW_RESOURCE_TTL_SECONDS)
+
+
+@st.cache_resource
+def request_pool() -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(max_workers=HTTP_POOL_SIZE, thread_name_prefix="dashboard-api")
+
+
+class ReadingWindow:
+    """The newest readings, kept across reruns and topped up with only the readings added since."""
+
+    def __init__(self, size: int) -> None:
+        self.size = size
+        self.rows: deque[dict[str, Any]] = deque(maxlen=size)
+        self.last_id: int | None = None
+        self._frame: pd.DataFrame | None = None
+
+    def delta_path(self) -> str:
+        path = f"/sensor/since?limit={self.size}"
+        return path if self.last_id is None else f"{path}&after_id={self.last_id}"
+
+    def apply(self, page: dict[str, Any]) -> bool:
+        """Append a ``/sensor/since`` page; ``False`` if readings were skipped and the window must be reseeded."""
+        if page.get("has_more"):
+            # More arrived than the window holds; start over from the newest readings.
+            self.rows.clear()
+            self.last_id = None
+            self._frame = None
+            return False
+        if page.get("items"):
+            self.rows.extend(page["items"])
+            self.last_id = page["last_id"]
+            self._frame = None
+        return True
+
+    def frame(self) -> pd.DataFrame:
+        if self._frame is None:
+            frame = pd.DataFrame(list(self.rows), columns=["timestamp", "temperature", "moisture", "ph"])
+            frame["timestamp"] = pd.to_datetime(frame["timestamp"])
+            frame["ph"] = frame["ph"].fillna(7.0)
+            # Backfilled readings arrive by id, not by time.
+            self._frame = frame.sort_values("timestamp", kind="stable")
+        return self._frame
+
+    def newest(self, count: int) -> list[dict[str, Any]]:
+        return [self.rows[-index] for index in range(1, min(count, len(self.rows)) + 1)]
+
+
+def load_dashboard_data(
+    base_url: str,
+    window: ReadingWindow,
+    events: LiveEvents | None = None,
+) -> tuple[dict[str, Any], ...]:
+    """Fetch everything a render needs, concurrently, so the page waits about one round trip."""
+    cache = slow_resources()
+
+    def slow(path: str, event_type: str) -> Callable[[], tuple[dict[str, Any] | None, str | None]]:
+        generation = events.generation(event_type) if events is not None else None
+        return lambda: cache.get(base_url, path, generation)
+
+    readings_path = window.delta_path()
+    calls = {
+        "health": lambda: api_get(base_url, "/health"),
+        "settings": slow("/settings/targets", "targets"),
+        "control_state": lambda: api_get(base_url, "/control/state"),
+        "runtime_mode": slow("/runtime/mode", "runtime_mode"),
+        "report": lambda: api_get(base_url, "/monitoring/report?points=20&log_items=10&series=false"),
+        "readings": lambda: api_get(base_url, readings_path),
+    }
+    futures = {name: request_pool().submit(call) for name, call in calls.items()}
+    results = {name: future.result() for name, future in futures.items()}
+
+    health, health_error = results["health"]
+    if health_error:
+        st.error(f"Backend unavailable: {health_error}")
+        st.stop()
+
+    settings, settings_error = results["settings"]
+    if settings_error:
+        settings = {
+            "temp_min": 22.0,
+            "temp_max": 26.0,
+            "moisture_min": 60,
+            "moisture_max": 70,
+            "ph_min": 6.5,
+            "ph_max": 7.0,
+        }
+
+    control_state, state_error = results["control_state"]
+    if state_error:
+        control_state = {
+            "mode": "AUTO",
+            "fan": False,
+            "heater": False,
+            "humidifier": False,
+            "ph_actuator": False,
+        }
+
+    runtime_mode, runtime_error = results["runtime_mode"]
+    if runtime_error:
+        runtime_mode = {
+            "mode": "live",
+            "esp32_base_url": "unknown",
+            "allow_live_fallback": False,
+        }
+
+    report, report_error = results["report"]
+    if report_error:
+        st.error(f"Monitoring report unavailable: {report_error}")
+        st.stop()
+
+    readings, readings_error = results["readings"]
+    if readings is not None and not window.apply(readings):
+        readings, readings_error = api_get(base_url, window.delta_path())
+        if readings is not None:
+            window.apply(readings)
+    if readings_error:
+        st.warning(f"Live readings unavailable: {readings_error}")
+
+    return health, settings, control_state, runtime_mode, report
+
+
 st.markdown(
     """
 <style>
@@ -268,6 +493,8 @@ with left:
         st.session_state["backend_url"] = backend_url
         auto_refresh = st.checkbox("Auto refresh", value=True)
         refresh_seconds = st.slider("Refresh (seconds)", 5, 60, 15, 5)
+        live_updates = st.checkbox("Live updates (push)", value=True, help="Reload only when the backend reports a change")
+        live_window = st.select_slider("Live window (points)", LIVE_WINDOW_OPTIONS, value=300)
 
 if st.session_state.get("backend_url"):
     backend_url = st.session_state["backend_url"]
@@ -275,48 +502,30 @@ if st.session_state.get("backend_url"):
 if "auto_refresh" not in locals():
     auto_refresh = True
     refresh_seconds = 15
+    live_updates = True
+    live_window = 300
 
 if auto_refresh and st_autorefresh:
-    st_autorefresh(interval=refresh_seconds * 1000, key="dashboard-refresh")
-
-health, health_error = api_get(backend_url, "/health")
-if health_error:
-    st.error(f"Backend unavailable: {health_error}")
-    st.stop()
-
-settings, settings_error = api_get(backend_url, "/settings/targets")
-if settings_error:
-    settings = {
-        "temp_min": 22.0,
-        "temp_max": 26.0,
-        "moisture_min": 60,
-        "moisture_max": 70,
-        "ph_min": 6.5,
-        "ph_max": 7.0,
-    }
-
-control_state, state_error = api_get(backend_url, "/control/state")
-if state_error:
-    control_state = {
-        "mode": "AUTO",
-        "fan": False,
-        "heater": False,
-        "humidifier": False,
-        "ph_actuator": False,
-    }
-
-runtime_mode, runtime_error = api_get(backend_url, "/runtime/mode")
-if runtime_error:
-    runtime_mode = {
-        "mode": "live",
-        "esp32_base_url": "unknown",
-        "allow_live_fallback": False,
-    }
-
-report, report_error = api_get(backend_url, "/monitoring/report?points=20&log_items=10")
-if report_error:
-    st.error(f"Monitoring report unavailable: {report_error}")
-    st.stop()
+    # While the push stream is up, reruns only reload data after a change, so they can be frequent and cheap.
+    pushing = live_updates and live_events(backend_url).connected
+    st_autorefresh(interval=LIVE_CHECK_INTERVAL_MS if pushing else refresh_seconds * 1000, key="dashboard-refresh")
+
+reading_window = st.session_state.get("reading_window")
+if reading_window is None or reading_window["key"] != (backend_url, live_window):
+    reading_window = st.session_state["reading_window"] = {"key": (backend_url, live_window), "window": ReadingWindow(live_window)}
+    st.session_state.pop("dashboard_snapshot", None)
+window = reading_window["window"]
+
+events = live_events(backend_url) if live_updates else None
+snapshot = st.session_state.get("dashboard_snapshot")
+if events is not None and events.connected and snapshot and snapshot["key"] == (backend_url, events.version):
+    health, settings, control_state, runtime_mode, report = snapshot["data"]
+else:
+    # Read the version first: a change committed while loading triggers another fetch.
+    key = (backend_url, events.version if events is not None else None)
+    data = load_dashboard_data(backend_url, window, events)
+    st.session_state["dashboard_snapshot"] = {"key": key, "data": data}
+    health, settings, control_state, runtime_mode, report = data
 
 with left:
     current_runtime_mode = str(runtime_mode.get("mode", "live")).lower()
@@ -336,6 +545,7 @@ with left:
         if runtime_update_err:
             st.error(f"Failed to switch runtime mode: {runtime_update_err}")
         else:
+            slow_resources().clear()
             runtime_mode = updated_runtime
             st.success(f"Environment switched to {runtime_choice.upper()}")
             refresh_page()
@@ -387,6 +597,7 @@ with left:
         if target_err:
             st.error(f"Failed to update targets: {target_err}")
         else:
+            slow_resources().clear()
             settings = updated_targets
             st.success("Optimal conditions updated")
             refresh_page()
@@ -515,18 +726,18 @@ with right:
             unsafe_allow_html=True,
         )
 
-    st.markdown("#### Live Sensor Readings (Last 20 Points)")
-    series = report.get("live_series") or []
-    if series:
-        df_series = pd.DataFrame(series)
-        df_series["timestamp"] = pd.to_datetime(df_series["timestamp"])
+    st.markdown(f"#### Live Sensor Readings (Last {live_window} Points)")
+    if window.rows:
+        df_series = window.frame()
+        # Markers only help while points are far enough apart to see them.
+        trace_mode = "lines+markers" if len(df_series) <= 100 else "lines"
 
         fig = go.Figure()
         fig.add_trace(
             go.Scatter(
                 x=df_series["timestamp"],
                 y=df_series["moisture"],
-                mode="lines+markers",
+                mode=trace_mode,
                 name="Humidity (%)",
                 line={"color": "#3867d6", "width": 2},
                 marker={"size": 6},
@@ -536,7 +747,7 @@ with right:
             go.Scatter(
                 x=df_series["timestamp"],
                 y=df_series["temperature"],
-                mode="lines+markers",
+                mode=trace_mode,
                 name="Temperature (°C)",
                 line={"color": "#38a169", "width": 2},
                 marker={"size": 6},
@@ -546,7 +757,7 @@ with right:
             go.Scatter(
                 x=df_series["timestamp"],
                 y=df_series["ph"],
-                mode="lines+markers",
+                mode=trace_mode,
                 name="pH",
                 line={"color": "#d08a1f", "width": 2},
                 marker={"size": 6},
@@ -569,7 +780,7 @@ with right:
 
     with bottom_left:
         st.markdown("#### Sensor Readings Log")
-        log_rows = report.get("readings_log") or []
+        log_rows = window.newest(10)
         if not log_rows:
             st.info("No readings logged yet")
         else: